@@ -0,0 +1,187 @@
+"""
+Buffered admin audit log writer.
+
+Routes hand their `admin_logs` entries to `AuditLog.record` and carry on;
+the entries go into a bounded in-process queue and a background task writes
+them with `insert_many`, as soon as `batch_size` entries are waiting or
+`flush_seconds` after the first one arrived, whichever comes first.
+
+- Backpressure: when the queue is full `record` waits for room (up to
+  `put_timeout` seconds, then writes the entry itself), so a stalled database
+  slows callers down instead of growing memory or dropping entries.
+- Failed batches are retried with backoff. The driver assigns each entry its
+  `_id` before the first attempt, so a retry after a partially applied insert
+  gets duplicate key errors for the entries that made it; those count as
+  written.
+- `flush` wakes the writer, writes what is queued and waits for the batch
+  the writer holds, so everything recorded before it is in the collection.
+- `stop` drains the queue and writes everything still buffered; it runs on
+  shutdown after the routes have stopped.
+- In synchronous mode (AUDIT_LOG_SYNC=true, used by tests) and before
+  `start` / after `stop`, `record` writes the entry before returning.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Iterable, List, Optional
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+AUDIT_LOG_SYNC = os.environ.get('AUDIT_LOG_SYNC', 'false').lower() == 'true'
+DUPLICATE_KEY = 11000
+
+
+class AuditLog:
+    """Queues audit entries and writes them to `collection` in batches"""
+
+    def __init__(self, collection, batch_size: int = 200, flush_seconds: float = 1.0,
+                 max_queue: int = 10000, put_timeout: float = 5.0, synchronous: bool = AUDIT_LOG_SYNC,
+                 retry_seconds: float = 0.5, max_retry_seconds: float = 30.0, shutdown_attempts: int = 3):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.max_queue = max_queue
+        self.put_timeout = put_timeout
+        self.synchronous = synchronous
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self.shutdown_attempts = shutdown_attempts
+        self._queue: Optional[asyncio.Queue] = None
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None  # clear while the writer holds a batch
+        self._task: Optional[asyncio.Task] = None
+        self._in_flight: List[dict] = []
+        self.written = 0
+        self.lost = 0
+        self.backpressure_waits = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self.synchronous
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "in_flight": len(self._in_flight),
+            "written": self.written,
+            "lost": self.lost,
+            "backpressure_waits": self.backpressure_waits,
+        }
+
+    async def record(self, entry: dict):
+        """Queue one entry (write it now when not running in the background)"""
+        if not self.running:
+            await self._insert([entry])
+            return
+        if self._queue.full():
+            self.backpressure_waits += 1
+            try:
+                await asyncio.wait_for(self._queue.put(entry), self.put_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Audit log queue full for {self.put_timeout}s, writing entry inline")
+                await self._insert([entry])
+                return
+        else:
+            self._queue.put_nowait(entry)
+        if self._queue.qsize() >= self.batch_size:
+            self._batch_ready.set()
+
+    async def record_many(self, entries: Iterable[dict]):
+        entries = list(entries)
+        if not entries:
+            return
+        if not self.running:
+            await self._insert(entries)
+            return
+        for entry in entries:
+            await self.record(entry)
+
+    async def flush(self):
+        """Write everything recorded so far (e.g. before reading the logs back)"""
+        if self._queue is None:
+            return
+        # Wake the writer if it is holding a partial batch for flush_seconds
+        self._batch_ready.set()
+        batch = self._take(self._queue.qsize())
+        if batch:
+            await self._write(batch)
+        await self._idle.wait()
+
+    async def start(self):
+        if self._task or self.synchronous:
+            return
+        self._queue = asyncio.Queue(self.max_queue)
+        self._batch_ready = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if not self._task:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        # The batch being written when cancelled plus whatever is still queued
+        pending = self._in_flight + self._take(self._queue.qsize())
+        self._in_flight = []
+        for start in range(0, len(pending), self.batch_size):
+            await self._write(pending[start:start + self.batch_size], attempts=self.shutdown_attempts)
+        self._idle.set()
+
+    def _take(self, limit: int) -> List[dict]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        while True:
+            # Held in _in_flight while waiting so stop() still writes it
+            self._in_flight = [await self._queue.get()]
+            self._idle.clear()
+            if self._queue.qsize() < self.batch_size - 1:
+                self._batch_ready.clear()
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), self.flush_seconds)
+                except asyncio.TimeoutError:
+                    pass
+            self._in_flight += self._take(self.batch_size - 1)
+            await self._write(self._in_flight)
+            self._in_flight = []
+            self._idle.set()
+
+    async def _write(self, batch: List[dict], attempts: Optional[int] = None):
+        """Insert `batch`, retrying with backoff; gives up only after `attempts` tries"""
+        delay = self.retry_seconds
+        tries = 0
+        while batch:
+            tries += 1
+            try:
+                await self._insert(batch)
+                return
+            except BulkWriteError as e:
+                failed = {err['index'] for err in e.details.get('writeErrors', []) if err.get('code') != DUPLICATE_KEY}
+                self.written += len(batch) - len(failed)
+                batch = [entry for i, entry in enumerate(batch) if i in failed]
+                error = e
+            except Exception as e:
+                error = e
+            if not batch:
+                return
+            if attempts is not None and tries >= attempts:
+                self.lost += len(batch)
+                logger.error(f"Dropping {len(batch)} audit log entries after {tries} attempts: {error}")
+                return
+            logger.warning(f"Audit log write of {len(batch)} entries failed, retrying in {delay:.1f}s: {error}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_retry_seconds)
+
+    async def _insert(self, batch: List[dict]):
+        started = time.perf_counter()
+        await self.collection.insert_many(batch, ordered=False)
+        self.written += len(batch)
+        logger.debug(f"Wrote {len(batch)} audit log entries in {(time.perf_counter() - started) * 1000:.1f} ms")
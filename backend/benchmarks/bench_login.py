@@ -0,0 +1,114 @@
+"""
+Login latency benchmark: legacy multi-round-trip login vs single atomic update.
+
+Seeds a scratch database with users, then times the database part of an
+existing-user login both ways. Needs a reachable MongoDB (4.2+ for pipeline
+updates); the scratch database is dropped afterwards.
+
+Usage (from backend/):
+    MONGO_URL=mongodb://localhost:27017 python benchmarks/bench_login.py --users 2000 --logins 500
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def report(name, samples_ms):
+    print(f"{name:<10} n={len(samples_ms):<5} mean={statistics.mean(samples_ms):7.2f}ms "
+          f"p50={percentile(samples_ms, 50):7.2f}ms p95={percentile(samples_ms, 95):7.2f}ms "
+          f"p99={percentile(samples_ms, 99):7.2f}ms")
+
+
+async def seed_users(db, count):
+    now = datetime.now(timezone.utc)
+    users = []
+    for i in range(count):
+        is_student = i % 2 == 0
+        users.append({
+            "id": str(uuid.uuid4()),
+            "phone_number": f"+91{9000000000 + i}",
+            "name": f"Bench User {i}",
+            "is_student": is_student,
+            "dob": f"{random.randint(1998, 2008)}-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}" if is_student else None,
+            "loyalty_active": is_student,
+            "points": random.randint(0, 20),
+            "last_visit": (now - timedelta(hours=random.randint(1, 24 * 10))).isoformat(),
+            "created_at": now.isoformat()
+        })
+    await db.users.insert_many(users)
+    await db.users.create_index("phone_number")
+    await db.users.create_index("id")
+    return [u["phone_number"] for u in users]
+
+
+async def legacy_login(server, phone_number):
+    """The login sequence as it was before the single-update rewrite"""
+    db = server.db
+    user = await db.users.find_one({"phone_number": phone_number}, {"_id": 0})
+    await db.users.update_one(
+        {"id": user['id']},
+        {"$set": {"last_visit": datetime.now(timezone.utc).isoformat()}}
+    )
+    if user.get('is_student') and user.get('dob'):
+        student = await db.users.find_one({"id": user['id']}, {"_id": 0})
+        if not server.is_loyalty_eligible(student['dob']):
+            await db.users.update_one({"id": user['id']}, {"$set": {"loyalty_active": False}})
+        user = await db.users.find_one({"phone_number": phone_number}, {"_id": 0})
+    current = await db.users.find_one({"id": user['id']}, {"_id": 0})
+    if server.shop_calendar_service.calendar.should_reset_points(
+            datetime.fromisoformat(current['last_visit']), datetime.now(timezone.utc)):
+        await db.users.update_one({"id": user['id']}, {"$set": {"points": 0}})
+    return user
+
+
+async def atomic_login(server, phone_number):
+    return await server.login_existing_user(phone_number)
+
+
+async def run(args):
+    os.environ['DB_NAME'] = args.db
+    import server
+
+    await server.db.client.drop_database(args.db)
+    phones = await seed_users(server.db, args.users)
+    await server.shop_calendar_service.refresh()
+
+    for name, login in [("legacy", legacy_login), ("atomic", atomic_login)]:
+        for phone in random.sample(phones, min(50, len(phones))):
+            await login(server, phone)  # warm up connections and caches
+        samples = []
+        sem = asyncio.Semaphore(args.concurrency)
+
+        async def timed(phone):
+            async with sem:
+                started = time.perf_counter()
+                await login(server, phone)
+                samples.append((time.perf_counter() - started) * 1000)
+
+        await asyncio.gather(*(timed(random.choice(phones)) for _ in range(args.logins)))
+        report(name, samples)
+
+    await server.db.client.drop_database(args.db)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--logins", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--db", default="food_hub_bench")
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,98 @@
+"""
+Public endpoint latency during an admin login storm.
+
+Builds a minimal FastAPI app with a bcrypt login route and a cheap public
+route, then drives both concurrently in-process: a storm of logins plus a
+steady stream of public requests. Run once with bcrypt inline in the
+coroutine (the old behaviour) and once through PasswordHasher; the public
+route's p99 should stay flat in the second case.
+
+Usage (from backend/):
+    python benchmarks/bench_password_hashing.py --logins 40 --public 400
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import bcrypt
+import httpx
+from fastapi import FastAPI
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from passwords import PasswordHasher  # noqa: E402
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def build_app(mode: str, hasher: PasswordHasher, stored_hash: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/login")
+    async def login():
+        if mode == "inline":
+            ok = bcrypt.checkpw(b"admin@123", stored_hash.encode('utf-8'))
+        else:
+            ok = await hasher.verify("admin@123", stored_hash)
+        return {"ok": ok}
+
+    @app.get("/public")
+    async def public():
+        return {"status": "ok"}
+
+    return app
+
+
+async def run_mode(mode: str, args) -> dict:
+    hasher = PasswordHasher(rounds=args.rounds, max_pending=args.logins)
+    stored_hash = bcrypt.hashpw(b"admin@123", bcrypt.gensalt(rounds=args.rounds)).decode('utf-8')
+    app = build_app(mode, hasher, stored_hash)
+    public_ms = []
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def public_stream():
+            # Latency is measured from each request's scheduled send time, so
+            # time spent waiting for a blocked event loop is counted too.
+            first = time.perf_counter()
+            for i in range(args.public):
+                scheduled = first + i * args.interval / 1000
+                await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+                await client.get("/public")
+                public_ms.append((time.perf_counter() - scheduled) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(public_stream(), *(client.post("/login") for _ in range(args.logins)))
+        elapsed = time.perf_counter() - started
+
+    hasher.shutdown()
+    return {
+        "mode": mode,
+        "p50": percentile(public_ms, 50),
+        "p99": percentile(public_ms, 99),
+        "max": max(public_ms),
+        "mean": statistics.mean(public_ms),
+        "elapsed": elapsed
+    }
+
+
+async def main(args):
+    print(f"{args.logins} concurrent logins (cost {args.rounds}) + {args.public} public requests")
+    for mode in ("inline", "offloop"):
+        r = await run_mode(mode, args)
+        print(f"{r['mode']:<8} public p50={r['p50']:7.2f}ms p99={r['p99']:8.2f}ms "
+              f"max={r['max']:8.2f}ms total={r['elapsed']:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--public", type=int, default=400)
+    parser.add_argument("--interval", type=float, default=5.0, help="ms between public requests")
+    parser.add_argument("--rounds", type=int, default=12)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,110 @@
+"""
+Response serialization and compression for the largest list endpoints.
+
+Seeds documents shaped like /admin/users (1000 users), /admin/orders (1000
+enriched orders) and /loyalty/history (100 bills with OCR text), then compares
+the old path (jsonable_encoder + stdlib json via starlette's JSONResponse)
+with OrjsonResponse, and reports bytes on the wire for identity, gzip and
+brotli (if installed) along with compression time. No server or database.
+
+Usage (from backend/):
+    python benchmarks/bench_responses.py --repeat 20
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+
+from responses import OrjsonResponse, brotli, compress  # noqa: E402
+
+NAMES = ["Aarav", "Diya", "Kabir", "Meera", "Rohan", "Saanvi", "Vivaan", "Ananya", "Ishaan", "Kiara"]
+DISHES = ["Paneer Tikka", "Chicken 65", "Veg Biryani", "Masala Dosa", "Cold Coffee", "Butter Naan", "Dal Makhani"]
+RECEIPT_LINES = ["THU GO ZI CAFE", "GSTIN 07AAACT1234F1Z5", "Bill No: {n}", "Date: {d}", "Paneer Tikka 1 x 180.00",
+                 "Cold Coffee 2 x 90.00", "Sub Total 360.00", "CGST 2.5% 9.00", "SGST 2.5% 9.00",
+                 "Grand Total 378.00", "Thank you! Visit again"]
+
+
+def iso(rng, days=90):
+    return (datetime(2026, 6, 1, tzinfo=timezone.utc) - timedelta(minutes=rng.randrange(days * 1440))).isoformat()
+
+
+def seed_users(rng, n=1000):
+    return [{
+        "id": str(uuid.UUID(int=rng.getrandbits(128))), "phone_number": f"+9198{rng.randrange(10**8):08d}",
+        "firebase_uid": uuid.UUID(int=rng.getrandbits(128)).hex[:28], "name": f"{rng.choice(NAMES)} {i}",
+        "college": rng.choice([None, "Delhi University", "IIT Delhi"]), "verification_status": "approved",
+        "is_student": rng.random() < 0.6, "loyalty_active": True, "points": rng.randrange(2000),
+        "dob": "2004-05-17", "last_visit": iso(rng), "created_at": iso(rng, 365), "rejection_reason": None
+    } for i in range(n)]
+
+
+def seed_orders(rng, n=1000):
+    orders = []
+    for _ in range(n):
+        items = [{"menu_item_id": str(uuid.UUID(int=rng.getrandbits(128))), "quantity": rng.randint(1, 3),
+                  "price": float(rng.randrange(40, 300, 10)), "name": rng.choice(DISHES)}
+                 for _ in range(rng.randint(1, 5))]
+        total = sum(i["price"] * i["quantity"] for i in items)
+        orders.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))), "user_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "items": items, "total_amount": total, "delivery_fee": 20.0, "discount": 0.0,
+            "final_amount": total + 20.0, "delivery_address": f"Room {rng.randrange(400)}, Hostel {rng.randrange(12)}",
+            "latitude": 28.61 + rng.random() / 50, "longitude": 77.20 + rng.random() / 50,
+            "delivery_zone_id": None, "cook_minutes": rng.randint(10, 40),
+            "status": rng.choice(["pending", "preparing", "delivered"]), "created_at": iso(rng),
+            "estimated_ready_at": iso(rng), "user_name": rng.choice(NAMES), "user_phone": "+919800000000"
+        })
+    return orders
+
+
+def seed_bills(rng, n=100):
+    bills = []
+    for i in range(n):
+        date = iso(rng)
+        text = "\n".join(line.format(n=1000 + i, d=date[:10]) for line in RECEIPT_LINES * 3)
+        bills.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))), "user_id": "u1", "bill_number": str(1000 + i),
+            "amount": 378.0, "points_earned": 37, "date": date, "status": "approved", "extracted_text": text
+        })
+    return bills
+
+
+def time_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), result
+
+
+def main(args):
+    rng = random.Random(42)
+    payloads = {"/admin/users": seed_users(rng), "/admin/orders": seed_orders(rng),
+                "/loyalty/history": seed_bills(rng)}
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+    print(f"median of {args.repeat} runs" + ("" if brotli else "; brotli not installed"))
+    for path, docs in payloads.items():
+        old_ms, old_body = time_ms(lambda: JSONResponse(jsonable_encoder(docs)).body, args.repeat)
+        new_ms, new_body = time_ms(lambda: OrjsonResponse(docs).body, args.repeat)
+        print(f"\n{path} ({len(docs)} docs)")
+        print(f"  serialize  stdlib {old_ms:7.2f} ms   orjson {new_ms:6.2f} ms   ({old_ms / new_ms:.1f}x)")
+        print(f"  identity   {len(new_body):>9,} B")
+        for encoding in encodings:
+            ms, compressed = time_ms(lambda: compress(new_body, encoding), args.repeat)
+            print(f"  {encoding:<10} {len(compressed):>9,} B   {len(compressed) / len(new_body):6.1%}   {ms:6.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    main(parser.parse_args())
@@ -0,0 +1,74 @@
+"""
+Route planner timing and quality at realistic and stress order counts.
+
+Generates pending orders uniformly inside the delivery radius and reports
+planning time plus total distance of the planned trips, compared with the
+nearest-neighbour tours alone (no 2-opt).
+
+Usage (from backend/):
+    python benchmarks/bench_route_planner.py --orders 100 300 1000 --max-stops 6
+"""
+import argparse
+import math
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+
+from route_planner import (distance_matrix, nearest_neighbour_tour, plan_routes, project_km,  # noqa: E402
+                           sweep_batches, tour_length)
+
+SHOP = (28.6139, 77.2090)
+
+
+def random_orders(n: int, radius_km: float, seed: int):
+    rng = random.Random(seed)
+    orders = []
+    for i in range(n):
+        r = radius_km * math.sqrt(rng.random())
+        theta = rng.uniform(0, 2 * math.pi)
+        orders.append({
+            "id": f"o{i}",
+            "latitude": SHOP[0] + r * math.sin(theta) / 110.574,
+            "longitude": SHOP[1] + r * math.cos(theta) / (111.320 * math.cos(math.radians(SHOP[0])))
+        })
+    return orders
+
+
+def nn_only_km(orders, max_stops):
+    points = project_km(SHOP, [o['latitude'] for o in orders], [o['longitude'] for o in orders])
+    total = 0.0
+    for batch in sweep_batches(points, max_stops):
+        dist = distance_matrix(np.vstack([np.zeros((1, 2)), points[batch]]))
+        total += tour_length(nearest_neighbour_tour(dist), dist)
+    return total
+
+
+def main(args):
+    print(f"radius {args.radius} km, max {args.max_stops} stops per trip, {args.repeat} runs each")
+    for n in args.orders:
+        orders = random_orders(n, args.radius, seed=n)
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            plan = plan_routes(SHOP, orders, args.max_stops)
+            timings.append((time.perf_counter() - started) * 1000)
+        planned_km = sum(r['total_km'] for r in plan['routes'])
+        nn_km = nn_only_km(orders, args.max_stops)
+        print(f"{n:>5} orders  {len(plan['routes']):>4} trips  "
+              f"median {statistics.median(timings):8.2f}ms  max {max(timings):8.2f}ms  "
+              f"{planned_km:8.1f} km (nn only {nn_km:8.1f} km, -{(1 - planned_km / nn_km) * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, nargs="+", default=[100, 300, 1000])
+    parser.add_argument("--max-stops", type=int, default=6)
+    parser.add_argument("--radius", type=float, default=2.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
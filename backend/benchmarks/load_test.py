@@ -0,0 +1,448 @@
+"""
+Load test for the main user journeys, run in-process.
+
+Starts the Vision stub (vision_stub.py) on a local port, imports the app
+against a scratch database on a local MongoDB, seeds settings, menu,
+customers, loyalty students, past orders, pending verifications and a coupon,
+then drives the ASGI app through httpx with N virtual users. Each virtual
+user loops over weighted scenarios:
+
+    browse    GET /menu, /menu/search, /shop/status, /settings, /menu-pdf/active
+    login     POST /auth/send-otp + /auth/verify-otp (mock OTP, no Twilio)
+    checkout  GET /coupons/validate/{code}, POST /orders with the coupon, GET /orders/{order_id}
+    bill      POST /loyalty/upload-bill with a fresh receipt photo (OCR via the stub)
+    admin     the eleven requests the admin dashboard makes on load, concurrently
+
+and reports throughput and p50/p95/p99 per route. --save-baseline stores the
+results; --baseline compares a run with stored results and exits with status
+1 when a route's p95 or the overall throughput regressed by more than
+--tolerance. Startup, index creation and background services run as in
+production; rate limiting is switched off. The load generator shares the
+event loop with the app, so only compare runs made on the same machine with
+the same options (they are stored with the baseline and checked).
+
+Usage (from backend/):
+    MONGO_URL=mongodb://localhost:27017 python benchmarks/load_test.py --concurrency 20 --duration 60
+    ... --save-baseline benchmarks/baselines/load_baseline.json
+    ... --baseline benchmarks/baselines/load_baseline.json --tolerance 0.2
+"""
+import argparse
+import asyncio
+import io
+import itertools
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from vision_stub import VisionStub, start_stub, stop_stub  # noqa: E402
+
+SCENARIOS = ("browse", "login", "checkout", "bill", "admin")
+DEFAULT_MIX = "browse=50,login=10,checkout=20,bill=5,admin=15"
+SHOP_LAT, SHOP_LON = 28.6315, 77.2167
+COUPON_CODE = "LOAD10"
+CATEGORIES = ["Burgers", "Pizza", "Rolls", "Biryani", "South Indian", "Chinese", "Beverages", "Desserts"]
+DISHES = ["Paneer Tikka", "Cold Coffee", "Veg Biryani", "Masala Dosa", "Butter Naan", "Dal Makhani", "Masala Chai",
+          "Chicken Roll", "Hakka Noodles", "Gulab Jamun", "Classic Burger", "Farmhouse Pizza"]
+ADMIN_DASHBOARD = [
+    "/api/admin/dashboard", "/api/admin/users", "/api/admin/verifications/pending", "/api/menu",
+    "/api/admin/orders", "/api/settings", "/api/admin/menu-pdfs", "/api/admin/users/students",
+    "/api/admin/users/non-students", "/api/admin/loyalty/expiry-logs?limit=20", "/api/admin/coupons",
+]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def parse_mix(spec: str) -> dict:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+# ---- seed data ----
+
+def bill_photo(seed: int) -> bytes:
+    """A receipt photographed with its own framing; passes the quality gate and hashes apart from the others"""
+    rng = random.Random(seed)
+    receipt = Image.new("L", (400, 700), 245)
+    draw = ImageDraw.Draw(receipt)
+    font = ImageFont.load_default()
+    lines = ["THU GO ZI CAFE", "Connaught Place, New Delhi", f"Bill No: {seed:010d}", "-" * 40]
+    for _ in range(rng.randint(2, 12)):
+        lines.append(f"{rng.choice(DISHES):<24}{rng.randint(1, 3)} x {rng.randrange(40, 300, 10)}.00")
+    lines += ["-" * 40, "Grand Total", "Thank you! Visit again"]
+    for i, line in enumerate(lines):
+        draw.text((30, 20 + i * 22), line, fill=20, font=font)
+    width, height = rng.randint(520, 760), rng.randint(780, 1040)
+    photo = Image.new("L", (width, height), rng.randint(60, 160))
+    photo.paste(receipt, (rng.randint(0, width - 400), rng.randint(0, height - 700)))
+    photo = photo.rotate(rng.uniform(-3, 3), resample=Image.BICUBIC, fillcolor=photo.getpixel((0, 0)))
+    photo = photo.filter(ImageFilter.GaussianBlur(rng.uniform(0, 0.8)))
+    out = io.BytesIO()
+    photo.convert("RGB").save(out, "JPEG", quality=rng.randint(70, 90))
+    return out.getvalue()
+
+
+def bill_photos(count: int, seed: int) -> list:
+    # Not filtered for look-alikes: the photo check only compares a student's own bills, one each here
+    return [bill_photo(seed * 100003 + i) for i in range(count)]
+
+
+def iso_ago(rng, days: int) -> str:
+    return (datetime.now(timezone.utc) - timedelta(minutes=rng.randrange(1, days * 1440))).isoformat()
+
+
+async def seed(db, args, rng):
+    now = datetime.now(timezone.utc)
+    await db.settings.insert_one({
+        "delivery_charge": 30.0, "delivery_radius_km": 5.0, "shop_name": "Thu.Go.Zi", "shop_tagline": "Load test",
+        "shop_latitude": SHOP_LAT, "shop_longitude": SHOP_LON, "shop_address": "Connaught Place, New Delhi",
+        # No weekly off day and no hours, so checkouts never meet a closed shop whenever the test runs
+        "payment_info": "Cash on Delivery only", "weekly_off_day": None, "open_time": None, "close_time": None,
+        "cooking_stations": 4,
+    })
+
+    menu = [{
+        "id": f"item-{i}", "name": f"{DISHES[i % len(DISHES)]} {i}", "price": float(rng.randrange(40, 400, 10)),
+        "category": CATEGORIES[i % len(CATEGORIES)], "veg": i % 3 != 0, "prep_time": rng.randint(5, 25),
+        "available": True, "description": f"House special {DISHES[i % len(DISHES)].lower()}",
+    } for i in range(args.menu_items)]
+    await db.menu_items.insert_many(menu)
+
+    customers = [{
+        "id": str(uuid.uuid4()), "phone_number": f"+91{8000000000 + i}", "name": f"Load Customer {i}",
+        "college": None, "verification_status": "not_applied", "is_student": False, "loyalty_active": False,
+        "points": 0, "dob": None, "last_visit": iso_ago(rng, 5), "created_at": iso_ago(rng, 200),
+        "rejection_reason": None,
+    } for i in range(args.customers)]
+    students = [{
+        "id": str(uuid.uuid4()), "phone_number": f"+91{9000000000 + i}", "name": f"Load Student {i}",
+        "college": "Delhi University", "verification_status": "approved", "is_student": True,
+        "loyalty_active": True, "points": rng.randint(0, 8),
+        "dob": f"{now.year - rng.randint(18, 22)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "last_visit": iso_ago(rng, 2), "created_at": iso_ago(rng, 200), "rejection_reason": None,
+    } for i in range(args.bill_pool)]
+    await db.users.insert_many(customers + students)
+    await db.users.create_index("phone_number")
+    await db.users.create_index("id")
+
+    orders = []
+    for i in range(args.orders):
+        items = [{"menu_item_id": m["id"], "quantity": rng.randint(1, 3), "price": m["price"]}
+                 for m in rng.sample(menu, rng.randint(1, 4))]
+        total = sum(item["price"] * item["quantity"] for item in items)
+        orders.append({
+            "id": str(uuid.uuid4()), "user_id": rng.choice(customers)["id"], "items": items,
+            "total_amount": total, "delivery_fee": 30.0, "discount": 0, "final_amount": total + 30.0,
+            "delivery_address": f"{rng.randint(1, 200)} Block {rng.choice('ABCDEFGH')}, New Delhi",
+            "latitude": SHOP_LAT + rng.uniform(-0.02, 0.02), "longitude": SHOP_LON + rng.uniform(-0.02, 0.02),
+            "delivery_zone_id": None, "cook_minutes": 15, "status": "delivered", "created_at": iso_ago(rng, 30),
+        })
+    await db.orders.insert_many(orders)
+
+    await db.student_id_verifications.insert_many([{
+        "id": str(uuid.uuid4()), "user_id": c["id"], "user_name": c["name"], "user_phone": c["phone_number"],
+        "extracted_text": "DELHI UNIVERSITY STUDENT IDENTITY CARD", "user_provided_dob": "2004-05-12",
+        "ocr_extracted_dob": "2004-05-12", "dob_match": True, "image_data": "", "thumbnail_data": None,
+        "status": "pending", "created_at": iso_ago(rng, 3),
+    } for c in customers[:args.verifications]])
+
+    await db.coupons.insert_one({
+        "id": str(uuid.uuid4()), "code": COUPON_CODE, "type": "percentage", "value": 10, "min_order": 0,
+        "usage_limit": 10 ** 9, "used_count": 0, "active": True,
+        "expiry_date": (now + timedelta(days=365)).strftime("%Y-%m-%d"), "created_at": now.isoformat(),
+    })
+    return menu, customers, students
+
+
+# ---- load generation ----
+
+class Recorder:
+    def __init__(self):
+        self.recording = False
+        self.latencies = defaultdict(list)  # route label -> ms
+        self.errors = defaultdict(Counter)  # route label -> status -> count
+        self.scenarios = Counter()
+
+    def add(self, label: str, elapsed_ms: float, status, ok: bool):
+        if not self.recording:
+            return
+        self.latencies[label].append(elapsed_ms)
+        if not ok:
+            self.errors[label][str(status)] += 1
+
+
+class LoadContext:
+    def __init__(self, client, server, recorder, menu, customers, students, photos, admin_token):
+        self.client = client
+        self.server = server
+        self.recorder = recorder
+        self.menu = menu
+        self.customers = customers
+        self.customer_tokens = {c["id"]: server.create_jwt_token(c["id"]) for c in customers}
+        self.bill_uploads = list(zip(students, photos))
+        self.next_bill = itertools.count()
+        self.bills_skipped = 0
+        self.admin_headers = {"Authorization": f"Bearer {admin_token}"}
+
+    async def call(self, label: str, method: str, url: str, expect=200, **kwargs):
+        started = time.perf_counter()
+        response = None
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            status = response.status_code
+        except Exception as e:
+            status = type(e).__name__
+        ok = status == expect
+        self.recorder.add(label, (time.perf_counter() - started) * 1000, status, ok)
+        return response if ok else None
+
+
+async def browse(ctx: LoadContext, rng):
+    await ctx.call("GET /api/menu", "GET", "/api/menu")
+    await ctx.call("GET /api/menu/search", "GET", "/api/menu/search",
+                   params={"q": rng.choice(DISHES).split()[0].lower(), "veg": rng.choice(["true", "false"])})
+    await ctx.call("GET /api/shop/status", "GET", "/api/shop/status")
+    await ctx.call("GET /api/settings", "GET", "/api/settings")
+    await ctx.call("GET /api/menu-pdf/active", "GET", "/api/menu-pdf/active")
+
+
+async def login(ctx: LoadContext, rng):
+    phone = rng.choice(ctx.customers)["phone_number"]
+    sent = await ctx.call("POST /api/auth/send-otp", "POST", "/api/auth/send-otp", json={"phone_number": phone})
+    if sent is None:
+        return
+    otp = sent.json()["message"].rsplit(" ", 1)[-1]
+    await ctx.call("POST /api/auth/verify-otp", "POST", "/api/auth/verify-otp",
+                   json={"phone_number": phone, "otp_code": otp})
+
+
+async def checkout(ctx: LoadContext, rng):
+    customer = rng.choice(ctx.customers)
+    headers = {"Authorization": f"Bearer {ctx.customer_tokens[customer['id']]}"}
+    await ctx.call("GET /api/coupons/validate/{code}", "GET", f"/api/coupons/validate/{COUPON_CODE}")
+    items = [{"menu_item_id": m["id"], "quantity": rng.randint(1, 3), "price": m["price"]}
+             for m in rng.sample(ctx.menu, rng.randint(1, 4))]
+    order = await ctx.call("POST /api/orders", "POST", "/api/orders", headers=headers, json={
+        "items": items, "delivery_address": "12 Block C, New Delhi", "coupon_code": COUPON_CODE,
+        "latitude": SHOP_LAT + rng.uniform(-0.02, 0.02), "longitude": SHOP_LON + rng.uniform(-0.02, 0.02),
+    })
+    if order is not None:
+        await ctx.call("GET /api/orders/{order_id}", "GET", f"/api/orders/{order.json()['id']}", headers=headers)
+
+
+async def bill(ctx: LoadContext, rng):
+    index = next(ctx.next_bill)
+    if index >= len(ctx.bill_uploads):
+        # Each student can earn points once a day; more uploads than --bill-pool would only test rejections
+        ctx.bills_skipped += 1
+        await asyncio.sleep(0)  # nothing was awaited; let the app and other users run
+        return False
+    student, photo = ctx.bill_uploads[index]
+    token = ctx.server.create_jwt_token(student["id"])
+    await ctx.call("POST /api/loyalty/upload-bill", "POST", "/api/loyalty/upload-bill",
+                   headers={"Authorization": f"Bearer {token}"}, files={"file": ("bill.jpg", photo, "image/jpeg")})
+
+
+async def admin(ctx: LoadContext, rng):
+    # Same fan-out as AdminDashboard.js fetchData()
+    await asyncio.gather(*(
+        ctx.call(f"GET {path.split('?')[0]}", "GET", path, headers=ctx.admin_headers) for path in ADMIN_DASHBOARD
+    ))
+
+
+SCENARIO_FUNCS = {"browse": browse, "login": login, "checkout": checkout, "bill": bill, "admin": admin}
+
+
+async def virtual_user(ctx: LoadContext, vu: int, seed: int, mix: dict, stop_at: float, think_ms: float):
+    rng = random.Random(seed * 100003 + vu)
+    names, weights = list(mix), list(mix.values())
+    while time.monotonic() < stop_at:
+        name = rng.choices(names, weights)[0]
+        # A scenario returns False when it had nothing to do (bill pool used up); those runs are not counted
+        ran = await SCENARIO_FUNCS[name](ctx, rng) is not False
+        if ran and ctx.recorder.recording:
+            ctx.recorder.scenarios[name] += 1
+        if think_ms:
+            await asyncio.sleep(rng.expovariate(1000 / think_ms))
+
+
+# ---- reporting ----
+
+def summarize(recorder: Recorder, duration: float) -> dict:
+    routes = {}
+    for label, samples in sorted(recorder.latencies.items()):
+        routes[label] = {
+            "requests": len(samples),
+            "errors": sum(recorder.errors[label].values()),
+            "rps": round(len(samples) / duration, 2),
+            "mean_ms": round(statistics.mean(samples), 2),
+            "p50_ms": round(percentile(samples, 50), 2),
+            "p95_ms": round(percentile(samples, 95), 2),
+            "p99_ms": round(percentile(samples, 99), 2),
+        }
+    everything = [ms for samples in recorder.latencies.values() for ms in samples]
+    total = {
+        "requests": len(everything),
+        "errors": sum(r["errors"] for r in routes.values()),
+        "rps": round(len(everything) / duration, 2),
+        "p50_ms": round(percentile(everything, 50), 2) if everything else None,
+        "p95_ms": round(percentile(everything, 95), 2) if everything else None,
+        "p99_ms": round(percentile(everything, 99), 2) if everything else None,
+    }
+    return {"routes": routes, "total": total, "scenarios": dict(recorder.scenarios),
+            "errors": {label: dict(c) for label, c in recorder.errors.items() if c}}
+
+
+def print_report(results: dict):
+    print(f"\n{'route':<44}{'n':>7}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}  (ms)")
+    for label, r in results["routes"].items():
+        print(f"{label:<44}{r['requests']:>7}{r['errors']:>6}{r['rps']:>9.1f}"
+              f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}")
+    t = results["total"]
+    print(f"{'TOTAL':<44}{t['requests']:>7}{t['errors']:>6}{t['rps']:>9.1f}"
+          f"{t['p50_ms'] or 0:>9.1f}{t['p95_ms'] or 0:>9.1f}{t['p99_ms'] or 0:>9.1f}")
+    print(f"scenarios: {results['scenarios']}")
+    for label, statuses in results["errors"].items():
+        print(f"errors {label}: {statuses}")
+
+
+def compare(results: dict, baseline: dict, tolerance: float, noise_ms: float = 2.0) -> list:
+    """Routes whose p95 grew, or total throughput that fell, by more than `tolerance`"""
+    if baseline.get("options") != results.get("options"):
+        print(f"warning: baseline was recorded with different options: {baseline.get('options')}")
+    regressions = []
+    print(f"\n{'route':<44}{'base p95':>10}{'now p95':>10}{'change':>9}")
+    for label, now in results["routes"].items():
+        base = baseline["routes"].get(label)
+        if not base:
+            print(f"{label:<44}{'-':>10}{now['p95_ms']:>10.1f}{'new':>9}")
+            continue
+        change = (now["p95_ms"] - base["p95_ms"]) / base["p95_ms"] if base["p95_ms"] else 0.0
+        flag = change > tolerance and now["p95_ms"] - base["p95_ms"] > noise_ms
+        print(f"{label:<44}{base['p95_ms']:>10.1f}{now['p95_ms']:>10.1f}{change:>+8.0%}{'  REGRESSION' if flag else ''}")
+        if flag:
+            regressions.append(f"{label} p95 {base['p95_ms']}ms -> {now['p95_ms']}ms")
+    base_rps, now_rps = baseline["total"]["rps"], results["total"]["rps"]
+    print(f"{'throughput (req/s)':<44}{base_rps:>10.1f}{now_rps:>10.1f}{(now_rps - base_rps) / base_rps:>+8.0%}")
+    if now_rps < base_rps * (1 - tolerance):
+        regressions.append(f"throughput {base_rps} -> {now_rps} req/s")
+    return regressions
+
+
+# ---- driver ----
+
+async def run(args) -> int:
+    mix = parse_mix(args.mix)
+    if args.baseline and not Path(args.baseline).is_file():
+        print(f"Baseline {args.baseline} not found; record one with --save-baseline against a local MongoDB",
+              file=sys.stderr)
+        return 2
+    rng = random.Random(args.seed)
+    stub = VisionStub(args.vision_latency_ms, args.vision_jitter_ms, seed=args.seed)
+    stub_server, stub_task, vision_url = await start_stub(stub)
+    upload_root = tempfile.mkdtemp(prefix="loadtest-uploads-")
+    os.environ.update({
+        "DB_NAME": args.db,
+        "GOOGLE_VISION_URL": vision_url,
+        "GOOGLE_VISION_API_KEY": "stub",
+        "RATE_LIMIT_ENABLED": "false",
+        "TWILIO_VERIFY_SERVICE": "",  # mock OTP flow; set before .env is loaded
+        "UPLOAD_ROOT": upload_root,
+    })
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    import server
+
+    try:
+        await server.db.client.drop_database(args.db)
+        menu, customers, students = await seed(server.db, args, rng)
+        photos = await asyncio.to_thread(bill_photos, len(students), args.seed)
+        print(f"Seeded {len(menu)} menu items, {len(customers)} customers, {len(students)} students, "
+              f"{args.orders} orders; Vision stub at {vision_url} ({args.vision_latency_ms:.0f} ms)")
+
+        async with server.app.router.lifespan_context(server.app):
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60) as client:
+                login_response = await client.post("/api/admin/login", json={"username": "admin", "password": "admin@123"})
+                login_response.raise_for_status()
+                recorder = Recorder()
+                ctx = LoadContext(client, server, recorder, menu, customers, students, photos,
+                                  login_response.json()["token"])
+
+                started = time.monotonic()
+                stop_at = started + args.warmup + args.duration
+                users = [asyncio.create_task(virtual_user(ctx, vu, args.seed, mix, stop_at, args.think_ms))
+                         for vu in range(args.concurrency)]
+                await asyncio.sleep(args.warmup)
+                recorder.recording = True
+                measured_from = time.monotonic()
+                await asyncio.gather(*users)
+                measured = time.monotonic() - measured_from
+
+        results = summarize(recorder, measured)
+        results["options"] = {k: getattr(args, k) for k in (
+            "concurrency", "duration", "mix", "think_ms", "seed", "vision_latency_ms", "customers", "bill_pool",
+            "orders", "menu_items")}
+        results["ocr_calls"] = stub.calls
+        results["recorded_at"] = datetime.now(timezone.utc).isoformat()
+        print_report(results)
+        if ctx.bills_skipped:
+            print(f"note: {ctx.bills_skipped} bill uploads skipped after the --bill-pool of {args.bill_pool} ran out")
+    finally:
+        await server.db.client.drop_database(args.db)
+        await stop_stub(stub_server, stub_task)
+        shutil.rmtree(upload_root, ignore_errors=True)
+
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nBaseline written to {args.save_baseline}")
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            return 1
+        print("\nNo regressions beyond tolerance")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=20, help="virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="unmeasured seconds before measuring")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"scenario weights (default {DEFAULT_MIX})")
+    parser.add_argument("--think-ms", type=float, default=0, help="mean pause between scenarios per user")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--vision-latency-ms", type=float, default=150)
+    parser.add_argument("--vision-jitter-ms", type=float, default=30)
+    parser.add_argument("--customers", type=int, default=2000)
+    parser.add_argument("--bill-pool", type=int, default=300, help="students, one bill upload each")
+    parser.add_argument("--orders", type=int, default=3000, help="past orders for the admin lists")
+    parser.add_argument("--menu-items", type=int, default=80)
+    parser.add_argument("--verifications", type=int, default=50, help="pending student ID verifications")
+    parser.add_argument("--db", default=f"food_hub_load_{uuid.uuid4().hex[:8]}")
+    parser.add_argument("--baseline", help="compare with results stored by --save-baseline")
+    parser.add_argument("--save-baseline", help="write this run's results as a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 / throughput change (0.2 = 20%%)")
+    sys.exit(asyncio.run(run(parser.parse_args())))
@@ -0,0 +1,124 @@
+"""
+Micro-benchmarks for server.py's pure per-request helpers (pytest-benchmark).
+
+Inputs are shaped like production data: Vision OCR text of a restaurant
+receipt and of a student ID card (plus texts where no pattern matches, the
+slowest path), Delhi coordinates, stored DOBs and both coupon expiry formats.
+Every benchmark also checks the helper's result, so a "faster" change that
+breaks parsing fails here too.
+
+Baselines live in benchmarks/baselines (one folder per machine/interpreter).
+Usage (from backend/; pytest-benchmark is in requirements.txt):
+    python -m pytest benchmarks/test_hot_paths.py --benchmark-storage=benchmarks/baselines \\
+        --benchmark-compare --benchmark-compare-fail=median:25%
+    # record a new baseline after an intended change
+    python -m pytest benchmarks/test_hot_paths.py --benchmark-storage=benchmarks/baselines --benchmark-save=baseline
+Without the plugin the module is skipped.
+"""
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "food_hub_bench")
+
+import server  # noqa: E402
+
+# Short rounds keep the suite to a few seconds when it runs with the unit tests
+pytestmark = pytest.mark.benchmark(max_time=0.25, min_rounds=20)
+
+RECEIPT_TEXT = """THU GO ZI - FOOD ON TRUCK
+Connaught Place, New Delhi 110001
+GSTIN: 07AAACT1234F1Z5
+Ph: +91 98100 12345
+TAX INVOICE
+Bill No: 20260614583
+Date: 14/06/2026 Time: 19:42
+Table: Takeaway Cashier: Rohit
+Item Qty Rate Amount
+Paneer Tikka Roll 2 140.00 280.00
+Cold Coffee 1 90.00 90.00
+Veg Biryani 1 180.00 180.00
+Masala Chai 3 25.00 75.00
+Gulab Jamun (2 pc) 1 60.00 60.00
+Sub Total 685.00
+CGST @2.5% 17.13
+SGST @2.5% 17.13
+Round Off -0.26
+Total: Rs. 719.00
+Paid by UPI
+Thank you! Visit again"""
+
+RECEIPT_NO_MATCH = """THU GO ZI - FOOD ON TRUCK
+Connaught Place, New Delhi 110001
+Paneer Tikka Roll 2 140.00 280.00
+Cold Coffee 1 90.00 90.00
+Thank you! Visit again"""
+
+STUDENT_ID_TEXT = """UNIVERSITY OF DELHI
+SHRI RAM COLLEGE OF COMMERCE
+STUDENT IDENTITY CARD 2025-26
+Name: ANANYA SHARMA
+Course: B.Com (Hons.) Year: II
+Roll No: 24/11/0457
+Father's Name: RAKESH SHARMA
+DOB: 12/05/2005
+Blood Group: B+
+Valid upto: 31/07/2027
+Principal"""
+
+STUDENT_ID_NO_DOB = """UNIVERSITY OF DELHI
+SHRI RAM COLLEGE OF COMMERCE
+STUDENT IDENTITY CARD 2025-26
+Name: ANANYA SHARMA
+Course: B.Com (Hons.) Year: II
+Blood Group: B+
+Principal"""
+
+
+@pytest.mark.parametrize("text, expected", [
+    (RECEIPT_TEXT, ("20260614583", 719.0)),
+    (RECEIPT_NO_MATCH, (None, None)),
+], ids=["receipt", "no_match"])
+def test_extract_bill_info(benchmark, text, expected):
+    assert benchmark(server.extract_bill_info, text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    (STUDENT_ID_TEXT, "2005-05-12"),
+    (STUDENT_ID_NO_DOB, None),
+], ids=["student_id", "no_dob"])
+def test_extract_dob_from_text(benchmark, text, expected):
+    assert benchmark(server.extract_dob_from_text, text) == expected
+
+
+def test_calculate_distance(benchmark):
+    distance = benchmark(server.calculate_distance, 28.6315, 77.2167, 28.6448, 77.2167)
+    assert 1.4 < distance < 1.5
+
+
+def test_calculate_age_from_dob(benchmark):
+    age = benchmark(server.calculate_age_from_dob, "2005-05-12")
+    assert 18 <= age <= 30
+
+
+@pytest.mark.parametrize("dob, expected", [
+    (f"{datetime.now().year - 20}-01-15", True),
+    (f"{datetime.now().year - 30}-01-15", False),
+], ids=["eligible", "aged_out"])
+def test_is_loyalty_eligible(benchmark, dob, expected):
+    assert benchmark(server.is_loyalty_eligible, dob) is expected
+
+
+@pytest.mark.parametrize("expiry, expected", [
+    ("2026-12-31", datetime(2026, 12, 31, 23, 59, 59, tzinfo=timezone.utc)),
+    ("2026-12-31T18:30:00+05:30", datetime(2026, 12, 31, 13, 0, tzinfo=timezone.utc)),
+], ids=["date", "iso_datetime"])
+def test_parse_coupon_expiry(benchmark, expiry, expected):
+    assert benchmark(server.parse_coupon_expiry, expiry) == expected
@@ -0,0 +1,107 @@
+"""
+Local stand-in for the Google Vision `images:annotate` endpoint.
+
+Answers every POST with a TEXT_DETECTION response after a fixed latency (plus
+optional jitter). The text is a receipt whose bill number and total are
+derived from a hash of the submitted image, so each distinct photo yields a
+distinct bill and the same photo always yields the same one.
+
+Used by load_test.py; can also be run on its own and pointed at with
+GOOGLE_VISION_URL for manual testing:
+    python benchmarks/vision_stub.py --port 8085 --latency-ms 150
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import socket
+from typing import Optional, Tuple
+
+import uvicorn
+
+
+def receipt_text(image_bytes: bytes) -> str:
+    digest = hashlib.sha1(image_bytes).hexdigest()
+    bill_number = int(digest[:12], 16) % 10 ** 10
+    total = 100 + int(digest[12:16], 16) % 900
+    return (f"THU GO ZI CAFE\nConnaught Place, New Delhi\nBill No: {bill_number:010d}\n"
+            f"Paneer Tikka 1 x {total - 60}.00\nCold Coffee 1 x 60.00\nGrand Total: Rs. {total}.00\n"
+            f"Thank you! Visit again")
+
+
+class VisionStub:
+    """ASGI app answering Vision annotate requests"""
+
+    def __init__(self, latency_ms: float = 150.0, jitter_ms: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rng = random.Random(seed)
+        self.calls = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        body = b""
+        more = True
+        while more:
+            message = await receive()
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+
+        self.calls += 1
+        delay = self.latency_ms + (self.rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0)
+        await asyncio.sleep(max(0.0, delay) / 1000)
+        try:
+            content = json.loads(body)["requests"][0]["image"]["content"]
+            text = receipt_text(base64.b64decode(content))
+            status, payload = 200, {"responses": [{"textAnnotations": [{"description": text}]}]}
+        except (ValueError, KeyError, IndexError, TypeError):
+            status, payload = 400, {"error": {"code": 400, "message": "Invalid request"}}
+        data = json.dumps(payload).encode()
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(data)).encode())]})
+        await send({"type": "http.response.body", "body": data})
+
+
+async def start_stub(stub: VisionStub, host: str = "127.0.0.1",
+                     port: int = 0) -> Tuple[uvicorn.Server, asyncio.Task, str]:
+    """Serve `stub` on the running loop; returns the server, its task and the annotate URL"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    server = uvicorn.Server(uvicorn.Config(stub, log_level="warning", access_log=False))
+    task = asyncio.create_task(server.serve(sockets=[sock]))
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.01)
+    return server, task, f"http://{host}:{sock.getsockname()[1]}/v1/images:annotate"
+
+
+async def stop_stub(server: Optional[uvicorn.Server], task: Optional[asyncio.Task]):
+    if server:
+        server.should_exit = True
+    if task:
+        await task
+
+
+async def main(args):
+    server, task, url = await start_stub(VisionStub(args.latency_ms, args.jitter_ms), port=args.port)
+    print(f"Vision stub listening: GOOGLE_VISION_URL={url}")
+    await task
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8085)
+    parser.add_argument("--latency-ms", type=float, default=150.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    asyncio.run(main(parser.parse_args()))
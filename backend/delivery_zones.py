@@ -0,0 +1,153 @@
+"""
+Delivery zones: GeoJSON polygons with per-zone delivery fees.
+
+Zones are stored in the `delivery_zones` collection with a 2dsphere index, so
+MongoDB rejects invalid geometry on write. Order-time and validation lookups
+use an in-memory index: each zone's bounding box is checked first and the
+ray-casting point-in-polygon test only runs for zones whose box contains the
+point. When a point falls in several zones (e.g. nested rings for tiered
+pricing) the cheapest zone wins.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+Ring = Sequence[Sequence[float]]  # [[lon, lat], ...]
+
+
+class InvalidZoneGeometry(ValueError):
+    """Raised when a zone polygon is not a usable GeoJSON Polygon"""
+
+
+def normalize_polygon(polygon: dict) -> dict:
+    """Validate a GeoJSON Polygon and close any open rings"""
+    if not isinstance(polygon, dict) or polygon.get("type") != "Polygon":
+        raise InvalidZoneGeometry("Zone must be a GeoJSON Polygon")
+    rings = polygon.get("coordinates")
+    if not isinstance(rings, list) or not rings:
+        raise InvalidZoneGeometry("Polygon needs at least one ring")
+    closed_rings = []
+    for ring in rings:
+        try:
+            points = [[float(lon), float(lat)] for lon, lat in ring]
+        except (TypeError, ValueError):
+            raise InvalidZoneGeometry("Polygon coordinates must be [longitude, latitude] pairs")
+        for lon, lat in points:
+            if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+                raise InvalidZoneGeometry("Coordinates out of range (expected [longitude, latitude])")
+        if points and points[0] != points[-1]:
+            points.append(list(points[0]))
+        if len(points) < 4:
+            raise InvalidZoneGeometry("Each ring needs at least three distinct points")
+        closed_rings.append(points)
+    return {"type": "Polygon", "coordinates": closed_rings}
+
+
+def point_in_ring(lon: float, lat: float, ring: Ring) -> bool:
+    """Even-odd ray casting test (planar; fine at delivery-zone scale)"""
+    inside = False
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        xi, yi = ring[i][0], ring[i][1]
+        xj, yj = ring[j][0], ring[j][1]
+        if (yi > lat) != (yj > lat) and lon < (xj - xi) * (lat - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+@dataclass
+class Zone:
+    id: str
+    name: str
+    delivery_fee: float
+    rings: List[Ring]
+    bbox: Tuple[float, float, float, float]  # min_lon, min_lat, max_lon, max_lat
+
+    @classmethod
+    def from_doc(cls, doc: dict) -> "Zone":
+        rings = doc["polygon"]["coordinates"]
+        outer = rings[0]
+        lons = [p[0] for p in outer]
+        lats = [p[1] for p in outer]
+        return cls(doc["id"], doc.get("name", ""), float(doc.get("delivery_fee", 0)), rings,
+                   (min(lons), min(lats), max(lons), max(lats)))
+
+    def contains(self, lat: float, lon: float) -> bool:
+        min_lon, min_lat, max_lon, max_lat = self.bbox
+        if not (min_lon <= lon <= max_lon and min_lat <= lat <= max_lat):
+            return False
+        if not point_in_ring(lon, lat, self.rings[0]):
+            return False
+        # Inner rings are holes
+        return not any(point_in_ring(lon, lat, hole) for hole in self.rings[1:])
+
+
+class ZoneIndex:
+    def __init__(self, zones: List[Zone]):
+        # Cheapest first, so the first hit is the zone to charge
+        self.zones = sorted(zones, key=lambda z: (z.delivery_fee, z.name))
+
+    def __len__(self):
+        return len(self.zones)
+
+    def find(self, lat: float, lon: float) -> Optional[Zone]:
+        for zone in self.zones:
+            if zone.contains(lat, lon):
+                return zone
+        return None
+
+
+class DeliveryZoneService:
+    """In-memory zone index refreshed from MongoDB on change and periodically"""
+
+    def __init__(self, db, refresh_seconds: int = 60):
+        self.db = db
+        self.refresh_seconds = refresh_seconds
+        self.index = ZoneIndex([])
+        self._task: Optional[asyncio.Task] = None
+
+    async def ensure_indexes(self):
+        await self.db.delivery_zones.create_index([("polygon", "2dsphere")])
+        await self.db.delivery_zones.create_index("id", unique=True)
+
+    async def refresh(self):
+        zones = []
+        async for doc in self.db.delivery_zones.find({"active": True}, {"_id": 0}):
+            try:
+                zones.append(Zone.from_doc(doc))
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                logger.error(f"Skipping invalid delivery zone {doc.get('id')}: {str(e)}")
+        self.index = ZoneIndex(zones)
+
+    def find(self, lat: float, lon: float) -> Optional[Zone]:
+        return self.index.find(lat, lon)
+
+    @property
+    def has_zones(self) -> bool:
+        return len(self.index) > 0
+
+    async def start(self):
+        try:
+            await self.ensure_indexes()
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"Delivery zone load failed: {str(e)}")
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Delivery zone refresh failed: {str(e)}")
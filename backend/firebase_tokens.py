@@ -0,0 +1,176 @@
+"""
+Non-blocking Firebase ID token verification.
+
+Replaces the synchronous `firebase_auth.verify_id_token` call on the event loop.
+Google's signing certificates are fetched asynchronously, cached for the
+`max-age` Google sends, and refreshed in the background before they expire.
+Signature checks run in a worker thread, and tokens that already verified are
+remembered by SHA-256 fingerprint until they expire (capped by a short TTL),
+so client retries skip the crypto entirely.
+"""
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import httpx
+import jwt
+from cryptography import x509
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+ISSUER_PREFIX = "https://securetoken.google.com/"
+DEFAULT_CERT_MAX_AGE = 3600
+
+
+class FirebaseTokenError(Exception):
+    """Raised when a Firebase ID token is missing, malformed, expired or not signed by Google"""
+
+
+class FirebaseTokenVerifier:
+    def __init__(self, project_id: Optional[str], certs_url: str = GOOGLE_CERTS_URL,
+                 result_cache_ttl: int = 300, result_cache_size: int = 1024,
+                 clock_skew_seconds: int = 0, http_timeout: float = 10.0):
+        self.project_id = project_id
+        self.certs_url = certs_url
+        self.result_cache_ttl = result_cache_ttl
+        self.result_cache_size = result_cache_size
+        self.clock_skew_seconds = clock_skew_seconds
+        self.http_timeout = http_timeout
+        self._keys: Dict[str, object] = {}
+        self._keys_expire_at = 0.0
+        self._fetch_lock = asyncio.Lock()
+        self._results: "OrderedDict[str, tuple]" = OrderedDict()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    # ---- certificates ----
+
+    def load_certificates(self, certs: Dict[str, str], max_age: int = DEFAULT_CERT_MAX_AGE):
+        """Install PEM certificates keyed by `kid`, valid for `max_age` seconds"""
+        self._keys = {
+            kid: x509.load_pem_x509_certificate(pem.encode('utf-8')).public_key()
+            for kid, pem in certs.items()
+        }
+        self._keys_expire_at = time.monotonic() + max_age
+
+    @staticmethod
+    def _max_age(cache_control: str) -> int:
+        match = re.search(r'max-age=(\d+)', cache_control or '')
+        return int(match.group(1)) if match else DEFAULT_CERT_MAX_AGE
+
+    async def refresh_certificates(self):
+        async with httpx.AsyncClient(timeout=self.http_timeout) as client:
+            response = await client.get(self.certs_url)
+        response.raise_for_status()
+        max_age = self._max_age(response.headers.get('cache-control', ''))
+        self.load_certificates(response.json(), max_age)
+        logger.info(f"Loaded {len(self._keys)} Firebase signing certificates (max-age {max_age}s)")
+
+    async def _get_keys(self) -> Dict[str, object]:
+        if self._keys and time.monotonic() < self._keys_expire_at:
+            return self._keys
+        async with self._fetch_lock:
+            # Another request may have refreshed while we waited
+            if not self._keys or time.monotonic() >= self._keys_expire_at:
+                await self.refresh_certificates()
+        return self._keys
+
+    async def start(self):
+        """Prefetch certificates and keep them fresh in the background"""
+        try:
+            await self.refresh_certificates()
+        except Exception as e:
+            logger.warning(f"Firebase certificate prefetch failed: {str(e)}")
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+
+    async def _refresh_loop(self):
+        while True:
+            # Refresh shortly before expiry; retry sooner after failures
+            remaining = self._keys_expire_at - time.monotonic()
+            await asyncio.sleep(max(30.0, remaining * 0.9) if self._keys else 30.0)
+            try:
+                await self.refresh_certificates()
+            except Exception as e:
+                logger.warning(f"Firebase certificate refresh failed: {str(e)}")
+
+    # ---- verification ----
+
+    @staticmethod
+    def fingerprint(token: str) -> str:
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def _cached(self, fingerprint: str) -> Optional[dict]:
+        entry = self._results.get(fingerprint)
+        if not entry:
+            return None
+        claims, expires_at = entry
+        if time.time() >= expires_at:
+            del self._results[fingerprint]
+            return None
+        self._results.move_to_end(fingerprint)
+        return dict(claims)
+
+    def _remember(self, fingerprint: str, claims: dict):
+        expires_at = min(float(claims['exp']), time.time() + self.result_cache_ttl)
+        self._results[fingerprint] = (claims, expires_at)
+        self._results.move_to_end(fingerprint)
+        while len(self._results) > self.result_cache_size:
+            self._results.popitem(last=False)
+
+    def _verify_sync(self, token: str, keys: Dict[str, object]) -> dict:
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.PyJWTError as e:
+            raise FirebaseTokenError(f"Malformed token: {str(e)}")
+        if header.get('alg') != 'RS256':
+            raise FirebaseTokenError("Token must be signed with RS256")
+        key = keys.get(header.get('kid'))
+        if key is None:
+            raise FirebaseTokenError("Token signed with an unknown key")
+        try:
+            claims = jwt.decode(
+                token,
+                key=key,
+                algorithms=['RS256'],
+                audience=self.project_id,
+                issuer=ISSUER_PREFIX + self.project_id,
+                leeway=self.clock_skew_seconds,
+                options={"require": ["exp", "iat", "aud", "iss", "sub"]}
+            )
+        except jwt.PyJWTError as e:
+            raise FirebaseTokenError(f"Invalid token: {str(e)}")
+
+        subject = claims.get('sub')
+        if not isinstance(subject, str) or not subject or len(subject) > 128:
+            raise FirebaseTokenError("Token has an invalid subject")
+        if claims.get('auth_time', 0) > time.time() + self.clock_skew_seconds:
+            raise FirebaseTokenError("Token auth_time is in the future")
+        claims['uid'] = subject
+        return claims
+
+    async def verify(self, token: str) -> dict:
+        """Verify a Firebase ID token and return its claims (with `uid`)"""
+        if not self.project_id:
+            raise FirebaseTokenError("Firebase project is not configured")
+        if not token or not isinstance(token, str):
+            raise FirebaseTokenError("Token is empty")
+
+        fingerprint = self.fingerprint(token)
+        claims = self._cached(fingerprint)
+        if claims is not None:
+            return claims
+
+        keys = await self._get_keys()
+        claims = await asyncio.to_thread(self._verify_sync, token, keys)
+        self._remember(fingerprint, claims)
+        return claims
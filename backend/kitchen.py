@@ -0,0 +1,214 @@
+"""
+Kitchen queue model for order ETAs.
+
+Orders are cooked FIFO across `stations` parallel cooking stations. An order's
+cooking time is the longest `prep_time` among its items (items cook side by
+side) plus `extra_unit_minutes` for every additional unit. Orders in
+`preparing` hold a station from the time they started; `pending` and
+`confirmed` orders wait in the queue and take whichever station frees first.
+
+The schedule lives in memory. Appending an order costs one heap pop/push over
+the stations (O(log stations)) and ETA lookups are dict reads. `start` and
+`remove` are not incremental: they mark the schedule dirty and the next read
+replays the whole schedule, O(p log p + n log stations) for p preparing and n
+queued orders. Taking an order out of the middle of the queue moves every
+order behind it to a different station, so there is no exact update cheaper
+than the replay; with a few hundred active orders it takes well under a
+millisecond. `KitchenService` rebuilds from MongoDB on start and periodically
+so orders taken by other workers are included.
+"""
+import asyncio
+import heapq
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+KITCHEN_EXTRA_UNIT_MINUTES = float(os.environ.get('KITCHEN_EXTRA_UNIT_MINUTES', '1'))
+DEFAULT_PREP_MINUTES = 10
+
+QUEUED_STATUSES = ("pending", "confirmed")
+ACTIVE_STATUSES = QUEUED_STATUSES + ("preparing",)
+
+
+def cooking_minutes(items: Iterable[dict], prep_times: Dict[str, int],
+                    extra_unit_minutes: float = KITCHEN_EXTRA_UNIT_MINUTES) -> float:
+    """Minutes to cook one order's items at a single station"""
+    longest = 0
+    units = 0
+    for item in items:
+        longest = max(longest, prep_times.get(item['menu_item_id']) or DEFAULT_PREP_MINUTES)
+        units += max(1, int(item.get('quantity', 1)))
+    if units == 0:
+        return 0.0
+    return float(longest) + extra_unit_minutes * (units - 1)
+
+
+def to_iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+class KitchenSchedule:
+    def __init__(self, stations: int = 1, stale_after_seconds: float = 60.0):
+        self.stations = max(1, int(stations))
+        self.stale_after_seconds = stale_after_seconds
+        self._queued: Dict[str, float] = {}  # order_id -> cook seconds, FIFO by insertion
+        self._in_progress: Dict[str, tuple] = {}  # order_id -> (started_at, cook seconds)
+        self._eta: Dict[str, float] = {}
+        self._free: List[float] = []  # station free times after the last queued order
+        self._computed_at = 0.0
+        self._dirty = True
+
+    def __len__(self):
+        return len(self._queued) + len(self._in_progress)
+
+    def __contains__(self, order_id: str):
+        return order_id in self._queued or order_id in self._in_progress
+
+    def is_queued(self, order_id: str) -> bool:
+        """True while the order waits for a station (not yet preparing)"""
+        return order_id in self._queued
+
+    def add(self, order_id: str, cook_minutes: float, started_at: Optional[float] = None):
+        """Load an existing order (queued, or preparing since `started_at`) without computing ETAs"""
+        if started_at is None:
+            self._queued[order_id] = cook_minutes * 60
+        else:
+            self._in_progress[order_id] = (started_at, cook_minutes * 60)
+        self._dirty = True
+
+    def _recompute(self, now: float):
+        free = [now] * self.stations
+        eta = {}
+        for order_id, (started_at, seconds) in sorted(self._in_progress.items(), key=lambda kv: kv[1][0]):
+            station_free = heapq.heappop(free)
+            # An idle station means cooking began when the order was started
+            start = started_at if station_free <= now else station_free
+            eta[order_id] = max(start + seconds, now)
+            heapq.heappush(free, eta[order_id])
+        for order_id, seconds in self._queued.items():
+            start = heapq.heappop(free)
+            eta[order_id] = start + seconds
+            heapq.heappush(free, eta[order_id])
+        self._eta = eta
+        self._free = free
+        self._computed_at = now
+        self._dirty = False
+
+    def _ensure_fresh(self, now: float):
+        # Queued orders assume the kitchen keeps up; replay once time has moved on
+        if self._dirty or now - self._computed_at > self.stale_after_seconds:
+            self._recompute(now)
+
+    def enqueue(self, order_id: str, cook_minutes: float, now: Optional[float] = None) -> float:
+        """Add an order to the back of the queue and return its ready timestamp"""
+        now = time.time() if now is None else now
+        self._ensure_fresh(now)
+        if order_id in self:
+            return self._eta[order_id]
+        seconds = cook_minutes * 60
+        self._queued[order_id] = seconds
+        start = max(heapq.heappop(self._free), now)
+        self._eta[order_id] = start + seconds
+        heapq.heappush(self._free, self._eta[order_id])
+        return self._eta[order_id]
+
+    def start(self, order_id: str, cook_minutes: Optional[float] = None, started_at: Optional[float] = None):
+        """Move an order onto a station (status `preparing`); the next read replays the schedule"""
+        seconds = self._queued.pop(order_id, None)
+        if cook_minutes is not None:
+            seconds = cook_minutes * 60
+        if seconds is None:
+            return
+        self._in_progress[order_id] = (time.time() if started_at is None else started_at, seconds)
+        self._dirty = True
+
+    def remove(self, order_id: str):
+        """Drop an order that is cooked, out for delivery or cancelled; the next read replays the schedule"""
+        if self._queued.pop(order_id, None) is not None or self._in_progress.pop(order_id, None) is not None:
+            self._eta.pop(order_id, None)
+            self._dirty = True
+
+    def eta(self, order_id: str, now: Optional[float] = None) -> Optional[float]:
+        now = time.time() if now is None else now
+        self._ensure_fresh(now)
+        return self._eta.get(order_id)
+
+    def quote(self, cook_minutes: float, now: Optional[float] = None) -> float:
+        """Ready timestamp a new order would get, without adding it"""
+        now = time.time() if now is None else now
+        self._ensure_fresh(now)
+        return max(self._free[0], now) + cook_minutes * 60
+
+    def snapshot(self, now: Optional[float] = None) -> List[dict]:
+        now = time.time() if now is None else now
+        self._ensure_fresh(now)
+        rows = [{"order_id": oid, "status": "preparing", "ready_at": to_iso(self._eta[oid])} for oid in self._in_progress]
+        rows += [{"order_id": oid, "status": "queued", "ready_at": to_iso(self._eta[oid])} for oid in self._queued]
+        return sorted(rows, key=lambda r: r["ready_at"])
+
+
+class KitchenService:
+    """Per-worker kitchen schedule kept in sync with the orders collection"""
+
+    def __init__(self, db, refresh_seconds: int = 30):
+        self.db = db
+        self.refresh_seconds = refresh_seconds
+        self.schedule = KitchenSchedule()
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self):
+        settings = await self.db.settings.find_one({}, {"_id": 0, "cooking_stations": 1}) or {}
+        schedule = KitchenSchedule(settings.get('cooking_stations') or 1)
+        orders = await self.db.orders.find(
+            {"status": {"$in": list(ACTIVE_STATUSES)}},
+            {"_id": 0, "id": 1, "status": 1, "cook_minutes": 1, "prep_started_at": 1, "created_at": 1}
+        ).sort("created_at", 1).to_list(5000)
+        for order in orders:
+            minutes = order.get('cook_minutes') or DEFAULT_PREP_MINUTES
+            started_at = None
+            if order['status'] == 'preparing':
+                started = order.get('prep_started_at') or order.get('created_at')
+                started_at = datetime.fromisoformat(started).timestamp() if started else time.time()
+            schedule.add(order['id'], minutes, started_at)
+        self.schedule = schedule
+
+    def eta_iso(self, order_id: str) -> Optional[str]:
+        ready_at = self.schedule.eta(order_id)
+        return to_iso(ready_at) if ready_at is not None else None
+
+    def order_status_changed(self, order_id: str, status: str, cook_minutes: Optional[float] = None):
+        if status == "preparing":
+            self.schedule.start(order_id, cook_minutes)
+        elif status in QUEUED_STATUSES:
+            # Moved back from preparing (or unknown here): rejoin at the back of the queue
+            if order_id in self.schedule and not self.schedule.is_queued(order_id):
+                self.schedule.remove(order_id)
+            if order_id not in self.schedule and cook_minutes is not None:
+                self.schedule.enqueue(order_id, cook_minutes)
+        else:
+            self.schedule.remove(order_id)
+
+    async def start(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"Kitchen schedule load failed: {str(e)}")
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Kitchen schedule refresh failed: {str(e)}")
@@ -0,0 +1,634 @@
+"""
+Menu PDF ingestion: extract items from an uploaded PDF and sync menu_items.
+
+The parser is pure Python. It reads indirect objects (including compressed
+object streams), walks the page tree, decodes content streams (Flate,
+ASCII85, ASCIIHex) and collects text shown with Tj / TJ / ' / " while tracking
+the text position, so a dish name and its price printed at the same height
+end up on one line even if the PDF draws them column by column. Lines ending in a price become items;
+short lines without a price become the current category.
+
+Only simple fonts are decoded (bytes read as cp1252). Text in CID fonts
+without a usable encoding does not parse into items and shows up in the
+report's `unparsed_lines` instead.
+
+Syncing is a diff against menu_items keyed by normalised name: new dishes are
+inserted, changed prices / categories updated, and PDF-sourced dishes that
+disappeared are marked unavailable. Several menu PDFs can be active at once
+(e.g. food and drinks), so a dish is only removed by the PDF that created it,
+or by any PDF once the one that created it is no longer active. Everything is applied in one unordered
+bulk_write whose filters exclude `is_manual_override` items, so admin edits
+always win, even ones made while ingestion runs. A PDF whose content hash
+matches the most recently applied ingestion is a no-op.
+
+Two guards keep a bad parse from emptying the menu: a PDF that yields no items
+is recorded as "empty" and menu_items is left alone, and a diff that would
+remove more than MAX_UNCONFIRMED_REMOVAL of the available PDF-sourced dishes
+is recorded as "needs_confirmation" until it is re-run with confirm=True.
+"""
+import asyncio
+import base64
+import re
+import uuid
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from pymongo import InsertOne, UpdateOne
+
+DEFAULT_CATEGORY = "Menu"
+DEFAULT_PREP_MINUTES = 10
+MAX_UNCONFIRMED_REMOVAL = 0.5  # share of available PDF-sourced dishes a run may remove without confirm
+
+NON_VEG_WORDS = {
+    "chicken", "mutton", "lamb", "goat", "fish", "prawn", "prawns", "shrimp", "egg", "eggs", "omelette",
+    "keema", "beef", "pork", "crab", "tuna", "salmon", "bacon", "ham", "sausage", "meat", "nonveg", "non-veg"
+}
+
+
+class MenuPDFError(Exception):
+    """Raised when a file cannot be read as a PDF"""
+
+
+# ==================== PDF objects ====================
+
+_OBJ_RE = re.compile(rb"(\d+)\s+(\d+)\s+obj\b")
+_REF_RE = re.compile(rb"(\d+)\s+\d+\s+R")
+_STREAM_RE = re.compile(rb"stream\r?\n")
+
+
+def _dict_value(dictionary: bytes, key: bytes) -> Optional[bytes]:
+    """Raw token following /key in a dictionary (ref, name, number or array)"""
+    match = re.search(rb"/" + key + rb"(?![A-Za-z0-9])\s*(\[[^\]]*\]|\d+\s+\d+\s+R|/[^\s/\[\]<>()]+|-?\d+(?:\.\d+)?)", dictionary)
+    return match.group(1) if match else None
+
+
+def _refs(value: Optional[bytes]) -> List[int]:
+    return [int(n) for n in _REF_RE.findall(value or b"")]
+
+
+def _flate(data: bytes) -> bytes:
+    try:
+        return zlib.decompress(data)
+    except zlib.error:
+        # Tolerate trailing garbage / truncated streams
+        return zlib.decompressobj().decompress(data)
+
+
+def _ascii85(data: bytes) -> bytes:
+    data = re.sub(rb"\s", b"", data)
+    if data.startswith(b"<~"):
+        data = data[2:]
+    end = data.find(b"~>")
+    return base64.a85decode(data[:end] if end != -1 else data)
+
+
+def _ascii_hex(data: bytes) -> bytes:
+    digits = re.sub(rb"[^0-9A-Fa-f]", b"", data.split(b">")[0])
+    return bytes.fromhex((digits + b"0" * (len(digits) % 2)).decode("ascii"))
+
+
+_FILTERS = {
+    b"FlateDecode": _flate, b"Fl": _flate,
+    b"ASCII85Decode": _ascii85, b"A85": _ascii85,
+    b"ASCIIHexDecode": _ascii_hex, b"AHx": _ascii_hex,
+}
+
+
+class PDFDocument:
+    def __init__(self, data: bytes):
+        if not data.startswith(b"%PDF-"):
+            raise MenuPDFError("Not a PDF file")
+        self.data = data
+        self.objects: Dict[int, Tuple[bytes, Optional[bytes]]] = {}  # num -> (dictionary, raw stream)
+        self._scan()
+        self._expand_object_streams()
+
+    def _scan(self):
+        data = self.data
+        pos = 0
+        while True:
+            match = _OBJ_RE.search(data, pos)
+            if not match:
+                break
+            num = int(match.group(1))
+            start = match.end()
+            end = data.find(b"endobj", start)
+            if end == -1:
+                break
+            stream_match = _STREAM_RE.search(data, start, end)
+            if stream_match:
+                # Skip over stream data by /Length so its bytes are never scanned as objects
+                dictionary = data[start:stream_match.start()]
+                raw_start = stream_match.end()
+                length = _dict_value(dictionary, b"Length")
+                if length and length.isdigit() and raw_start + int(length) <= len(data):
+                    raw_end = raw_start + int(length)
+                    raw = data[raw_start:raw_end]
+                else:
+                    raw_end = data.find(b"endstream", raw_start)
+                    if raw_end == -1:
+                        break
+                    raw = data[raw_start:raw_end].rstrip(b"\r\n")
+                end = data.find(b"endobj", raw_end)
+                if end == -1:
+                    break
+                self.objects[num] = (dictionary, raw)
+            else:
+                self.objects[num] = (data[start:end], None)
+            pos = end + len(b"endobj")
+
+    def _expand_object_streams(self):
+        for num, (dictionary, raw) in list(self.objects.items()):
+            if raw is None or b"/ObjStm" not in dictionary:
+                continue
+            try:
+                content = self.decode_stream(dictionary, raw)
+            except MenuPDFError:
+                continue
+            first = int(_dict_value(dictionary, b"First") or 0)
+            count = int(_dict_value(dictionary, b"N") or 0)
+            header = content[:first].split()
+            pairs = [(int(header[i]), int(header[i + 1])) for i in range(0, min(len(header), count * 2) - 1, 2)]
+            for i, (obj_num, offset) in enumerate(pairs):
+                end = pairs[i + 1][1] if i + 1 < len(pairs) else len(content) - first
+                self.objects.setdefault(obj_num, (content[first + offset:first + end], None))
+
+    @staticmethod
+    def decode_stream(dictionary: bytes, raw: bytes) -> bytes:
+        filters = re.findall(rb"/(\w+)", _dict_value(dictionary, b"Filter") or b"")
+        data = raw
+        for name in filters:
+            decoder = _FILTERS.get(name)
+            if decoder is None:
+                raise MenuPDFError(f"Unsupported stream filter {name.decode('latin-1')}")
+            data = decoder(data)
+        return data
+
+    def dictionary(self, num: int) -> bytes:
+        return self.objects.get(num, (b"", None))[0]
+
+    def page_contents(self) -> List[bytes]:
+        """Decoded content streams in page order"""
+        pages = self._pages_in_order()
+        if not pages:
+            # No usable page tree: fall back to page objects in object order
+            pages = [num for num, (d, _) in sorted(self.objects.items()) if re.search(rb"/Type\s*/Page(?!s)", d)]
+        contents = []
+        for page in pages:
+            for ref in _refs(_dict_value(self.dictionary(page), b"Contents")):
+                dictionary, raw = self.objects.get(ref, (b"", None))
+                if raw is None:
+                    continue
+                try:
+                    contents.append(self.decode_stream(dictionary, raw))
+                except MenuPDFError:
+                    continue
+        return contents
+
+    def _pages_in_order(self) -> List[int]:
+        root = None
+        for num, (dictionary, _) in self.objects.items():
+            if re.search(rb"/Type\s*/Catalog", dictionary):
+                root = _refs(_dict_value(dictionary, b"Pages"))
+                break
+        if not root:
+            return []
+        pages, stack, seen = [], [root[0]], set()
+        while stack:
+            num = stack.pop()
+            if num in seen:
+                continue
+            seen.add(num)
+            dictionary = self.dictionary(num)
+            kids = _refs(_dict_value(dictionary, b"Kids"))
+            if kids:
+                stack.extend(reversed(kids))
+            elif re.search(rb"/Type\s*/Page(?!s)", dictionary):
+                pages.append(num)
+        return pages
+
+
+# ==================== Content streams ====================
+
+_DELIMITERS = b"()<>[]{}/%"
+_WHITESPACE = b" \t\r\n\x0c\x00"
+_ESCAPES = {ord("n"): b"\n", ord("r"): b"\r", ord("t"): b"\t", ord("b"): b"\b", ord("f"): b"\f"}
+
+
+def _read_literal(data: bytes, i: int) -> Tuple[bytes, int]:
+    """Parse a (literal string) starting after the opening paren"""
+    out = bytearray()
+    depth = 1
+    n = len(data)
+    while i < n:
+        c = data[i]
+        if c == 0x5C:  # backslash
+            i += 1
+            if i >= n:
+                break
+            c = data[i]
+            if c in _ESCAPES:
+                out += _ESCAPES[c]
+            elif 0x30 <= c <= 0x37:
+                digits = data[i:i + 3]
+                octal = re.match(rb"[0-7]{1,3}", digits).group(0)
+                out.append(int(octal, 8) & 0xFF)
+                i += len(octal) - 1
+            elif c in (0x0D, 0x0A):
+                if c == 0x0D and i + 1 < n and data[i + 1] == 0x0A:
+                    i += 1
+            else:
+                out.append(c)
+        elif c == 0x28:
+            depth += 1
+            out.append(c)
+        elif c == 0x29:
+            depth -= 1
+            if depth == 0:
+                return bytes(out), i + 1
+            out.append(c)
+        else:
+            out.append(c)
+        i += 1
+    return bytes(out), i
+
+
+def tokenize_content(data: bytes):
+    """Yield operands (as Python values) and operators (as str) from a content stream"""
+    i, n = 0, len(data)
+    while i < n:
+        c = data[i]
+        if c in _WHITESPACE:
+            i += 1
+        elif c == 0x25:  # % comment
+            while i < n and data[i] not in b"\r\n":
+                i += 1
+        elif c == 0x28:
+            value, i = _read_literal(data, i + 1)
+            yield ("str", value)
+        elif c == 0x3C and data[i + 1:i + 2] == b"<":
+            # Inline dictionary (e.g. marked-content properties): skip
+            end = data.find(b">>", i)
+            i = n if end == -1 else end + 2
+        elif c == 0x3C:
+            end = data.find(b">", i)
+            end = n if end == -1 else end
+            hexdigits = re.sub(rb"[^0-9A-Fa-f]", b"", data[i + 1:end])
+            if len(hexdigits) % 2:
+                hexdigits += b"0"
+            yield ("str", bytes.fromhex(hexdigits.decode("ascii")))
+            i = end + 1
+        elif c == 0x5B:
+            yield ("[", None)
+            i += 1
+        elif c == 0x5D:
+            yield ("]", None)
+            i += 1
+        elif c == 0x2F:
+            j = i + 1
+            while j < n and data[j] not in _WHITESPACE and data[j] not in _DELIMITERS:
+                j += 1
+            yield ("name", data[i + 1:j])
+            i = j
+        else:
+            j = i
+            while j < n and data[j] not in _WHITESPACE and data[j] not in _DELIMITERS:
+                j += 1
+            if j == i:
+                i += 1
+                continue
+            token = data[i:j]
+            i = j
+            try:
+                yield ("num", float(token))
+            except ValueError:
+                op = token.decode("latin-1")
+                if op == "BI":
+                    # Inline image data is binary; jump past EI
+                    end = data.find(b"EI", i)
+                    i = n if end == -1 else end + 2
+                    continue
+                yield ("op", op)
+
+
+def _decode_text(raw: bytes) -> str:
+    return raw.decode("cp1252", errors="replace")
+
+
+def extract_text_lines(content: bytes, tolerance: float = 2.0) -> List[str]:
+    """Text of one content stream, grouped into lines by baseline"""
+    segments: List[Tuple[float, float, int, str]] = []  # (y, x, seq, text)
+    operands: list = []
+    array: Optional[list] = None
+    line_x = line_y = 0.0
+    x = y = 0.0
+    leading = 0.0
+    seq = 0
+
+    def show(text: str):
+        nonlocal seq
+        if text.strip():
+            segments.append((y, x, seq, text))
+            seq += 1
+
+    def next_line():
+        nonlocal line_y, x, y
+        line_y -= leading
+        x, y = line_x, line_y
+
+    for kind, value in tokenize_content(content):
+        if kind == "[":
+            array = []
+        elif kind == "]":
+            operands.append(("array", array or []))
+            array = None
+        elif array is not None:
+            array.append((kind, value))
+        elif kind != "op":
+            operands.append((kind, value))
+        else:
+            nums = [v for k, v in operands if k == "num"]
+            if value == "BT":
+                line_x = line_y = x = y = 0.0
+            elif value == "Tm" and len(nums) >= 6:
+                line_x, line_y = nums[4], nums[5]
+                x, y = line_x, line_y
+            elif value in ("Td", "TD") and len(nums) >= 2:
+                line_x += nums[0]
+                line_y += nums[1]
+                x, y = line_x, line_y
+                if value == "TD":
+                    leading = -nums[1]
+            elif value == "TL" and nums:
+                leading = nums[0]
+            elif value == "T*":
+                next_line()
+            elif value == "Tj" and operands and operands[-1][0] == "str":
+                show(_decode_text(operands[-1][1]))
+            elif value in ("'", '"') and operands and operands[-1][0] == "str":
+                next_line()
+                show(_decode_text(operands[-1][1]))
+            elif value == "TJ" and operands and operands[-1][0] == "array":
+                parts = []
+                for k, v in operands[-1][1]:
+                    if k == "str":
+                        parts.append(_decode_text(v))
+                    elif k == "num" and v < -200:
+                        # Large negative kerning is a visual word gap
+                        parts.append(" ")
+                show("".join(parts))
+            operands = []
+
+    # Group by baseline (top to bottom), then left to right
+    lines: List[List[Tuple[float, int, str]]] = []
+    line_ys: List[float] = []
+    for seg_y, seg_x, seg_seq, text in sorted(segments, key=lambda s: (-s[0], s[1], s[2])):
+        if line_ys and abs(line_ys[-1] - seg_y) <= tolerance:
+            lines[-1].append((seg_x, seg_seq, text))
+        else:
+            line_ys.append(seg_y)
+            lines.append([(seg_x, seg_seq, text)])
+    return [re.sub(r"\s+", " ", " ".join(t for _, _, t in sorted(parts))).strip() for parts in lines]
+
+
+def extract_pdf_lines(data: bytes) -> List[str]:
+    document = PDFDocument(data)
+    lines: List[str] = []
+    for content in document.page_contents():
+        lines.extend(line for line in extract_text_lines(content) if line)
+    return lines
+
+
+# ==================== Menu lines ====================
+
+_PRICE_RE = re.compile(
+    r"^(?P<name>.*?)[\s.:\-–_…|]*(?:(?<![A-Za-z])(?:₹|rs\.?|inr))?\s*(?P<price>\d{1,5}(?:\.\d{1,2})?)\s*(?:/-|₹)?\s*$",
+    re.IGNORECASE
+)
+
+
+@dataclass
+class ParsedItem:
+    name: str
+    price: float
+    category: str
+
+
+def normalize_name(name: str) -> str:
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", name.lower())).strip()
+
+
+def guess_veg(name: str) -> bool:
+    words = set(normalize_name(name).split())
+    return not (words & NON_VEG_WORDS)
+
+
+def _split_price(line: str) -> Tuple[Optional[str], Optional[float]]:
+    match = _PRICE_RE.match(line)
+    if not match:
+        return None, None
+    return match.group("name").strip(), float(match.group("price"))
+
+
+def _is_heading(line: str) -> bool:
+    return bool(re.search(r"[A-Za-z]", line)) and len(line) <= 40
+
+
+def parse_menu_lines(lines: List[str]) -> Tuple[List[ParsedItem], List[str]]:
+    """Turn text lines into items; returns (items, lines that were not understood)"""
+    items: List[ParsedItem] = []
+    unparsed: List[str] = []
+    seen = set()
+    category = DEFAULT_CATEGORY
+    pending: Optional[str] = None  # a line without a price: heading, or a name whose price follows
+
+    def add(name: str, price: float):
+        key = normalize_name(name)
+        if key and key not in seen:
+            seen.add(key)
+            items.append(ParsedItem(name.strip(" .:-"), price, category))
+
+    for line in lines:
+        name, price = _split_price(line)
+        if price is not None and name and re.search(r"[A-Za-z]", name):
+            if pending is not None:
+                category = pending
+                pending = None
+            add(name, price)
+        elif price is not None and not name and pending is not None:
+            # Price printed on its own line under the dish name
+            add(pending, price)
+            pending = None
+        elif _is_heading(line):
+            if pending is not None:
+                category = pending
+            pending = line.strip(" :-").title() if line.isupper() else line.strip(" :-")
+        else:
+            unparsed.append(line)
+    return items, unparsed
+
+
+# ==================== Sync ====================
+
+@dataclass
+class MenuDiff:
+    added: List[ParsedItem] = field(default_factory=list)
+    updated: List[Tuple[dict, ParsedItem]] = field(default_factory=list)
+    removed: List[dict] = field(default_factory=list)
+    unchanged: int = 0
+    skipped_overrides: List[str] = field(default_factory=list)
+
+
+def _removable(item: dict, pdf_id: Optional[str], active_pdf_ids: Optional[Set[str]]) -> bool:
+    """Available PDF-sourced dish this ingestion may mark unavailable"""
+    if item.get('source') != 'pdf' or item.get('is_manual_override') or not item.get('available', True):
+        return False
+    if pdf_id is None or active_pdf_ids is None:
+        return True
+    source_pdf_id = item.get('source_pdf_id')
+    return source_pdf_id == pdf_id or source_pdf_id not in active_pdf_ids
+
+
+def diff_menu(parsed: List[ParsedItem], existing: List[dict], pdf_id: Optional[str] = None,
+              active_pdf_ids: Optional[Set[str]] = None) -> MenuDiff:
+    """Changes that sync `existing` menu_items to `parsed`; removals limited to dishes `pdf_id` owns"""
+    diff = MenuDiff()
+    by_name = {normalize_name(item.get('name', '')): item for item in existing}
+    parsed_names = set()
+    for item in parsed:
+        key = normalize_name(item.name)
+        parsed_names.add(key)
+        current = by_name.get(key)
+        if current is None:
+            diff.added.append(item)
+        elif current.get('is_manual_override'):
+            diff.skipped_overrides.append(current['id'])
+        elif (float(current.get('price', 0)) != item.price or current.get('category') != item.category
+              or not current.get('available', True)):
+            diff.updated.append((current, item))
+        else:
+            diff.unchanged += 1
+    for key, current in by_name.items():
+        if key not in parsed_names and _removable(current, pdf_id, active_pdf_ids):
+            diff.removed.append(current)
+    return diff
+
+
+def build_operations(diff: MenuDiff, pdf_id: str, now: str) -> list:
+    not_overridden = {"is_manual_override": {"$ne": True}}
+    ops = []
+    for item in diff.added:
+        ops.append(InsertOne({
+            "id": str(uuid.uuid4()),
+            "name": item.name,
+            "price": item.price,
+            "category": item.category,
+            "veg": guess_veg(item.name),
+            "prep_time": DEFAULT_PREP_MINUTES,
+            "available": True,
+            "image_url": None,
+            "description": None,
+            "is_manual_override": False,
+            "source": "pdf",
+            "source_pdf_id": pdf_id,
+            "updated_at": now
+        }))
+    for current, item in diff.updated:
+        ops.append(UpdateOne(
+            {"id": current['id'], **not_overridden},
+            {"$set": {"price": item.price, "category": item.category, "available": True,
+                      "source": "pdf", "source_pdf_id": pdf_id, "updated_at": now}}
+        ))
+    for current in diff.removed:
+        ops.append(UpdateOne(
+            {"id": current['id'], "source": "pdf", **not_overridden},
+            {"$set": {"available": False, "updated_at": now}}
+        ))
+    return ops
+
+
+def parse_menu_pdf(data: bytes) -> Tuple[List[ParsedItem], List[str]]:
+    try:
+        return parse_menu_lines(extract_pdf_lines(data))
+    except (zlib.error, ValueError, IndexError) as e:
+        # Malformed streams, object headers or hex strings
+        raise MenuPDFError(f"Could not parse PDF: {e}") from e
+
+
+def needs_confirmation(diff: MenuDiff, existing: List[dict], pdf_id: Optional[str] = None,
+                       active_pdf_ids: Optional[Set[str]] = None) -> bool:
+    """True when the diff would remove most of the available dishes this PDF may remove"""
+    available = sum(1 for item in existing if _removable(item, pdf_id, active_pdf_ids))
+    return bool(diff.removed) and len(diff.removed) > available * MAX_UNCONFIRMED_REMOVAL
+
+
+async def ingest_menu_pdf(db, pdf: dict, force: bool = False, confirm: bool = False) -> dict:
+    """Parse a stored menu PDF, apply the diff to menu_items and record a report"""
+    started_at = datetime.now(timezone.utc).isoformat()
+    report = {
+        "id": str(uuid.uuid4()),
+        "pdf_id": pdf['id'],
+        "content_hash": pdf.get('content_hash'),
+        "started_at": started_at,
+        "status": "running"
+    }
+
+    if not force and pdf.get('content_hash'):
+        previous = await db.menu_ingestions.find_one(
+            {"status": "applied"}, {"_id": 0, "id": 1, "content_hash": 1}, sort=[("finished_at", -1)]
+        )
+        if previous and previous.get('content_hash') == pdf['content_hash']:
+            report.update({"status": "unchanged", "previous_ingestion_id": previous['id']})
+            return await _finish(db, report)
+
+    try:
+        data = await asyncio.to_thread(_read_file, pdf['file_path'])
+        items, unparsed = await asyncio.to_thread(parse_menu_pdf, data)
+    except (MenuPDFError, OSError) as e:
+        report.update({"status": "failed", "error": str(e)})
+        return await _finish(db, report)
+
+    if not items:
+        report.update({"status": "empty", "parsed_count": 0, "error": "No menu items found in PDF",
+                       "unparsed_lines": unparsed[:200]})
+        return await _finish(db, report)
+
+    existing = await db.menu_items.find(
+        {}, {"_id": 0, "id": 1, "name": 1, "price": 1, "category": 1, "available": 1,
+             "is_manual_override": 1, "source": 1, "source_pdf_id": 1}
+    ).to_list(10000)
+    active_pdf_ids = {p['id'] for p in await db.menu_pdfs.find({"active": True}, {"_id": 0, "id": 1}).to_list(None)}
+    diff = diff_menu(items, existing, pdf['id'], active_pdf_ids)
+    if needs_confirmation(diff, existing, pdf['id'], active_pdf_ids) and not confirm:
+        status = "needs_confirmation"
+    else:
+        status = "applied"
+        ops = build_operations(diff, pdf['id'], started_at)
+        if ops:
+            await db.menu_items.bulk_write(ops, ordered=False)
+    report.update({
+        "status": status,
+        "parsed_count": len(items),
+        "added": [i.name for i in diff.added],
+        "updated": [{"id": c['id'], "name": c['name'], "old_price": c.get('price'), "new_price": i.price,
+                     "old_category": c.get('category'), "new_category": i.category} for c, i in diff.updated],
+        "removed": [{"id": c['id'], "name": c['name']} for c in diff.removed],
+        "unchanged_count": diff.unchanged,
+        "skipped_overrides": diff.skipped_overrides,
+        "unparsed_lines": unparsed[:200]
+    })
+    return await _finish(db, report)
+
+
+async def _finish(db, report: dict) -> dict:
+    report["finished_at"] = datetime.now(timezone.utc).isoformat()
+    await db.menu_ingestions.insert_one(report)
+    report.pop("_id", None)
+    return report
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
@@ -0,0 +1,209 @@
+"""
+In-memory menu search with facets and typeahead.
+
+An inverted index maps each token of an item's name, category and description
+to the items containing it, weighted by field (name > category > description).
+Every query term must match; the last term also matches as a prefix via a
+sorted vocabulary and bisect, so "pan" finds "paneer" while the user types.
+Facet counts for category and veg are disjunctive (each ignores its own
+filter), and prices are kept sorted for range filters.
+
+Admin menu routes call `upsert` / `remove` so the index tracks writes without
+a full rebuild; `MenuSearchService` also reloads periodically to pick up
+changes made through other workers.
+"""
+import asyncio
+import logging
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+FIELD_WEIGHTS = {"name": 3, "category": 2, "description": 1}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return _TOKEN_RE.findall(text.lower())
+
+
+class MenuSearchIndex:
+    def __init__(self, items: Iterable[dict] = ()):
+        self.items: Dict[str, dict] = {}
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)  # token -> {item_id: weight}
+        self._vocabulary: List[str] = []  # sorted tokens, for prefix lookups
+        self._tokens: Dict[str, Set[str]] = {}  # item_id -> tokens, for removal
+        self._prices: List[tuple] = []  # sorted (price, item_id)
+        for item in items:
+            self.upsert(item)
+
+    def __len__(self):
+        return len(self.items)
+
+    # ---- maintenance ----
+
+    def upsert(self, item: dict):
+        item_id = item['id']
+        if item_id in self.items:
+            self.remove(item_id)
+        self.items[item_id] = item
+        weights: Dict[str, int] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(item.get(field)):
+                weights[token] = max(weights.get(token, 0), weight)
+        for token, weight in weights.items():
+            if token not in self._postings:
+                insort(self._vocabulary, token)
+            self._postings[token][item_id] = weight
+        self._tokens[item_id] = set(weights)
+        insort(self._prices, (float(item.get('price', 0)), item_id))
+
+    def remove(self, item_id: str):
+        item = self.items.pop(item_id, None)
+        if item is None:
+            return
+        for token in self._tokens.pop(item_id, ()):
+            posting = self._postings[token]
+            posting.pop(item_id, None)
+            if not posting:
+                del self._postings[token]
+                del self._vocabulary[bisect_left(self._vocabulary, token)]
+        entry = (float(item.get('price', 0)), item_id)
+        del self._prices[bisect_left(self._prices, entry)]
+
+    # ---- queries ----
+
+    def _prefix_tokens(self, prefix: str) -> List[str]:
+        start = bisect_left(self._vocabulary, prefix)
+        end = bisect_left(self._vocabulary, prefix + "\x7f")
+        return self._vocabulary[start:end]
+
+    def _match(self, query: str) -> Optional[Dict[str, int]]:
+        """Scores for items matching every term (None = no query, match all)"""
+        terms = tokenize(query)
+        if not terms:
+            return None
+        scores: Optional[Dict[str, int]] = None
+        for i, term in enumerate(terms):
+            hits: Dict[str, int] = {}
+            tokens = self._prefix_tokens(term) if i == len(terms) - 1 else [term]
+            for token in tokens:
+                # Exact hits outrank prefix-only hits for the same field
+                bonus = 1 if token == term else 0
+                for item_id, weight in self._postings.get(token, {}).items():
+                    hits[item_id] = max(hits.get(item_id, 0), weight * 2 + bonus)
+            if scores is None:
+                scores = hits
+            else:
+                scores = {item_id: score + hits[item_id] for item_id, score in scores.items() if item_id in hits}
+            if not scores:
+                return {}
+        return scores
+
+    def _price_ids(self, min_price: Optional[float], max_price: Optional[float]) -> Optional[Set[str]]:
+        if min_price is None and max_price is None:
+            return None
+        lo = bisect_left(self._prices, (min_price, "")) if min_price is not None else 0
+        hi = bisect_right(self._prices, (max_price, "\uffff")) if max_price is not None else len(self._prices)
+        return {item_id for _, item_id in self._prices[lo:hi]}
+
+    def search(self, query: str = "", veg: Optional[bool] = None, category: Optional[str] = None,
+               min_price: Optional[float] = None, max_price: Optional[float] = None,
+               include_unavailable: bool = False, limit: int = 50) -> dict:
+        scores = self._match(query)
+        candidates = set(self.items) if scores is None else set(scores)
+        if not include_unavailable:
+            candidates = {i for i in candidates if self.items[i].get('available', True)}
+        price_ids = self._price_ids(min_price, max_price)
+        if price_ids is not None:
+            candidates &= price_ids
+
+        category_key = category.lower() if category else None
+
+        def veg_ok(item_id):
+            return veg is None or bool(self.items[item_id].get('veg')) == veg
+
+        def category_ok(item_id):
+            return category_key is None or (self.items[item_id].get('category') or '').lower() == category_key
+
+        # Disjunctive facets: each facet's counts ignore that facet's own filter
+        category_counts: Dict[str, int] = defaultdict(int)
+        veg_counts = {"veg": 0, "non_veg": 0}
+        results = []
+        for item_id in candidates:
+            item = self.items[item_id]
+            v_ok, c_ok = veg_ok(item_id), category_ok(item_id)
+            if v_ok:
+                category_counts[item.get('category') or 'Other'] += 1
+            if c_ok:
+                veg_counts["veg" if item.get('veg') else "non_veg"] += 1
+            if v_ok and c_ok:
+                results.append(item)
+
+        prices = [float(item.get('price', 0)) for item in results]
+        results.sort(key=lambda item: (-(scores or {}).get(item['id'], 0), item.get('name', '').lower()))
+        return {
+            "items": results[:limit],
+            "total": len(results),
+            "facets": {
+                "category": dict(sorted(category_counts.items())),
+                "veg": veg_counts,
+                "price": {"min": min(prices), "max": max(prices)} if prices else {"min": None, "max": None}
+            }
+        }
+
+    def suggest(self, prefix: str, limit: int = 8) -> List[str]:
+        """Vocabulary completions for typeahead"""
+        terms = tokenize(prefix)
+        if not terms:
+            return []
+        return self._prefix_tokens(terms[-1])[:limit]
+
+
+class MenuSearchService:
+    """Per-worker search index over menu_items"""
+
+    def __init__(self, db, refresh_seconds: int = 300):
+        self.db = db
+        self.refresh_seconds = refresh_seconds
+        self.index = MenuSearchIndex()
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self):
+        items = await self.db.menu_items.find({}, {"_id": 0}).to_list(10000)
+        self.index = MenuSearchIndex(items)
+
+    def upsert(self, item: Optional[dict]):
+        if item:
+            self.index.upsert(item)
+
+    def remove(self, item_id: str):
+        self.index.remove(item_id)
+
+    async def start(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"Menu search index load failed: {str(e)}")
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Menu search index refresh failed: {str(e)}")
@@ -0,0 +1,218 @@
+"""
+Token-bucket rate limiting middleware.
+
+Rules are attached to exact (method, path) pairs, so requests to unlimited
+routes cost one dict lookup. Each rule keeps a bucket per client IP, per user
+(from the JWT `user_id`, falling back to IP for anonymous calls) or one shared
+bucket for the route. Buckets live in process memory by default; with
+`MongoBucketStore` they are shared by all workers through one atomic
+find_one_and_update per check. Rejected requests get 429 with `Retry-After`.
+
+A route's buckets are checked narrowest first (user, ip, then route) and the
+check stops at the first rejection; tokens already taken from narrower
+buckets are refunded. A request only costs tokens when every bucket allows
+it, so a client over its own limit cannot drain a shared route bucket.
+"""
+import json
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import jwt
+from pymongo import ReturnDocument
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """`capacity` requests per `per_seconds`, bursting up to `capacity`"""
+    capacity: int
+    per_seconds: float
+    scope: str = "ip"  # ip, user or route
+
+    @property
+    def refill_rate(self) -> float:
+        return self.capacity / self.per_seconds
+
+
+# Evaluation order: narrow buckets first, the bucket shared by everyone last
+SCOPE_ORDER = {"user": 0, "ip": 1, "route": 2}
+
+
+class MemoryBucketStore:
+    """Per-process buckets: {key: [tokens, last_refill]}"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: Dict[str, list] = {}
+
+    async def take(self, key: str, limit: RateLimit, now: float) -> Tuple[bool, float]:
+        """Take one token; return (allowed, seconds until a token is available)"""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                self._evict_full(now)
+            bucket = self._buckets[key] = [float(limit.capacity), now]
+        else:
+            bucket[0] = min(limit.capacity, bucket[0] + (now - bucket[1]) * limit.refill_rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return True, 0.0
+        return False, (1 - bucket[0]) / limit.refill_rate
+
+    async def refund(self, key: str, limit: RateLimit):
+        """Give back a token taken by a request that was rejected by another bucket"""
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket[0] = min(limit.capacity, bucket[0] + 1)
+
+    def _evict_full(self, now: float):
+        # Buckets idle for long enough to be full again carry no state worth keeping
+        idle = [k for k, (tokens, updated) in self._buckets.items() if now - updated > 3600]
+        for k in idle:
+            del self._buckets[k]
+        if len(self._buckets) >= self.max_keys:
+            self._buckets.clear()
+
+
+class MongoBucketStore:
+    """Buckets shared across workers in the `rate_limits` collection.
+
+    The refill-and-take happens in one pipeline update, so concurrent workers
+    never double-spend a token. Documents expire through a TTL index once idle.
+    """
+
+    def __init__(self, db, collection: str = "rate_limits"):
+        self.collection = db[collection]
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    async def take(self, key: str, limit: RateLimit, now: float) -> Tuple[bool, float]:
+        refilled = {"$min": [
+            limit.capacity,
+            {"$add": [
+                {"$ifNull": ["$tokens", limit.capacity]},
+                {"$multiply": [{"$max": [0, {"$subtract": [now, {"$ifNull": ["$updated", now]}]}]}, limit.refill_rate]}
+            ]}
+        ]}
+        doc = await self.collection.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": refilled, "updated": now}},
+                {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+                {"$set": {
+                    "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                    "expires_at": datetime.now(timezone.utc) + timedelta(seconds=limit.per_seconds * 2)
+                }}
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        if doc["allowed"]:
+            return True, 0.0
+        return False, (1 - doc["tokens"]) / limit.refill_rate
+
+    async def refund(self, key: str, limit: RateLimit):
+        await self.collection.update_one(
+            {"_id": key}, [{"$set": {"tokens": {"$min": [limit.capacity, {"$add": ["$tokens", 1]}]}}}]
+        )
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware (no per-request task or body buffering)"""
+
+    def __init__(self, app, rules: Dict[Tuple[str, str], Iterable[RateLimit]], store=None,
+                 jwt_secret: Optional[str] = None, jwt_algorithm: str = "HS256",
+                 trust_forwarded_for: bool = False, enabled: bool = True):
+        self.app = app
+        self.rules: Dict[Tuple[str, str], List[RateLimit]] = {
+            (method.upper(), path): sorted(limits, key=lambda limit: SCOPE_ORDER.get(limit.scope, 0))
+            for (method, path), limits in rules.items()
+        }
+        self.store = store or MemoryBucketStore()
+        self.jwt_secret = jwt_secret
+        self.jwt_algorithm = jwt_algorithm
+        self.trust_forwarded_for = trust_forwarded_for
+        self.enabled = enabled
+        # Verified token -> (user_id, exp); skips re-decoding the JWT on every request
+        self._token_users: "OrderedDict[str, tuple]" = OrderedDict()
+        self._token_cache_size = 10_000
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        limits = self.rules.get((scope["method"], scope["path"]))
+        if not limits:
+            return await self.app(scope, receive, send)
+
+        now = time.time()
+        taken = []
+        for limit in limits:
+            key = f"{scope['method']}:{scope['path']}:{limit.scope}:{self._identity(scope, limit.scope)}"
+            allowed, wait = await self.store.take(key, limit, now)
+            if not allowed:
+                for taken_key, taken_limit in taken:
+                    await self.store.refund(taken_key, taken_limit)
+                return await self._reject(send, wait)
+            taken.append((key, limit))
+        return await self.app(scope, receive, send)
+
+    def _identity(self, scope, kind: str) -> str:
+        if kind == "route":
+            return "*"
+        if kind == "user":
+            user_id = self._user_id(scope)
+            if user_id:
+                return f"u:{user_id}"
+        return f"ip:{self._client_ip(scope)}"
+
+    def _client_ip(self, scope) -> str:
+        if self.trust_forwarded_for:
+            for name, value in scope.get("headers", []):
+                if name == b"x-forwarded-for":
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def _user_id(self, scope) -> Optional[str]:
+        if not self.jwt_secret:
+            return None
+        for name, value in scope.get("headers", []):
+            if name == b"authorization":
+                token = value.decode("latin-1")
+                if not token.lower().startswith("bearer "):
+                    return None
+                return self._decode_user(token[7:])
+        return None
+
+    def _decode_user(self, token: str) -> Optional[str]:
+        cached = self._token_users.get(token)
+        if cached and (cached[1] is None or cached[1] > time.time()):
+            return cached[0]
+        try:
+            payload = jwt.decode(token, self.jwt_secret, algorithms=[self.jwt_algorithm])
+        except jwt.PyJWTError:
+            return None
+        self._token_users[token] = (payload.get("user_id"), payload.get("exp"))
+        if len(self._token_users) > self._token_cache_size:
+            self._token_users.popitem(last=False)
+        return payload.get("user_id")
+
+    @staticmethod
+    async def _reject(send, retry_after: float):
+        seconds = max(1, math.ceil(retry_after))
+        body = json.dumps({"detail": f"Too many requests. Please try again in {seconds} seconds."}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(seconds).encode()),
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,146 @@
+"""
+Student ID verification review queue.
+
+Admins claim pending verifications in small batches instead of all reading the
+whole pending list. Each claim is an atomic `find_one_and_update` that sets a
+lease (`claimed_by`, `claim_expires_at`), so two admins never get the same
+item; a lease that runs out puts the item back in the queue. Claims return
+lean metadata only, the ID photo is fetched per item through a thumbnail.
+
+Decisions are applied as a set: one read of the verifications and users
+involved, one `bulk_write` for the verification updates (each filtered on the
+item still being pending and not leased to someone else), one read to see
+which updates won, then one `bulk_write` for the users.
+"""
+import base64
+import io
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image, ImageOps
+from pymongo import ReturnDocument, UpdateOne
+
+LEASE_SECONDS = 300
+MAX_CLAIM = 20
+THUMBNAIL_SIZE = 320
+
+QUEUE_PROJECTION = {"_id": 0, "image_data": 0, "extracted_text": 0, "thumbnail_data": 0}
+
+
+@dataclass
+class Decision:
+    verification_id: str
+    action: str  # "approve" or "reject"
+    reason: str = ""
+
+
+def claimable_filter(admin_id: str, now: datetime, exclude_ids: Iterable[str] = ()) -> dict:
+    """Pending items that are unclaimed, lease-expired, or already leased to `admin_id`"""
+    query = {
+        "status": "pending",
+        "$or": [
+            {"claimed_by": None},
+            {"claim_expires_at": {"$lte": now.isoformat()}},
+            {"claimed_by": admin_id},
+        ],
+    }
+    exclude_ids = list(exclude_ids)
+    if exclude_ids:
+        query["id"] = {"$nin": exclude_ids}
+    return query
+
+
+def decidable_filter(verification_id: str, admin_id: str, now: datetime) -> dict:
+    """The item is still pending and nobody else holds a live lease on it"""
+    return {
+        "id": verification_id,
+        "status": "pending",
+        "$or": [
+            {"claimed_by": None},
+            {"claimed_by": admin_id},
+            {"claim_expires_at": {"$lte": now.isoformat()}},
+        ],
+    }
+
+
+async def claim_batch(collection, admin_id: str, count: int, now: datetime,
+                      lease_seconds: int = LEASE_SECONDS) -> List[dict]:
+    """Lease up to `count` pending verifications (oldest first) to `admin_id`"""
+    expires_at = (now + timedelta(seconds=lease_seconds)).isoformat()
+    claimed = []
+    for _ in range(min(count, MAX_CLAIM)):
+        doc = await collection.find_one_and_update(
+            claimable_filter(admin_id, now, [d["id"] for d in claimed]),
+            {"$set": {"claimed_by": admin_id, "claimed_at": now.isoformat(), "claim_expires_at": expires_at}},
+            projection=QUEUE_PROJECTION,
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc is None:
+            break
+        claimed.append(doc)
+    return claimed
+
+
+async def release_claims(collection, admin_id: str, verification_ids: List[str]) -> int:
+    result = await collection.update_many(
+        {"id": {"$in": verification_ids}, "status": "pending", "claimed_by": admin_id},
+        {"$set": {"claimed_by": None, "claimed_at": None, "claim_expires_at": None}},
+    )
+    return result.modified_count
+
+
+def verification_operations(decisions: List[Decision], admin_id: str, batch_id: str,
+                            now: datetime) -> List[UpdateOne]:
+    ops = []
+    for decision in decisions:
+        update = {
+            "status": "approved" if decision.action == "approve" else "rejected",
+            "decided_by": admin_id,
+            "decided_at": now.isoformat(),
+            "decision_batch": batch_id,
+            "claimed_by": None,
+            "claim_expires_at": None,
+        }
+        if decision.action == "reject":
+            update["rejection_reason"] = decision.reason
+        ops.append(UpdateOne(decidable_filter(decision.verification_id, admin_id, now), {"$set": update}))
+    return ops
+
+
+def user_operations(decisions: List[Decision], verifications: Dict[str, dict], users: Dict[str, dict],
+                    is_eligible: Callable[[Optional[str]], bool]) -> Tuple[List[UpdateOne], Dict[str, bool]]:
+    """User updates for applied decisions; also returns loyalty_active per approved verification"""
+    ops = []
+    loyalty = {}
+    for decision in decisions:
+        user_id = verifications[decision.verification_id]["user_id"]
+        if decision.action == "approve":
+            user = users.get(user_id) or {}
+            eligible = is_eligible(user.get("dob")) if user.get("dob") else False
+            loyalty[decision.verification_id] = eligible
+            update = {"verification_status": "approved", "loyalty_active": eligible, "rejection_reason": None}
+        else:
+            update = {
+                "verification_status": "rejected",
+                "rejection_reason": decision.reason or "Student ID verification rejected by admin",
+            }
+        ops.append(UpdateOne({"id": user_id}, {"$set": update}))
+    return ops, loyalty
+
+
+def make_thumbnail(image_bytes: bytes, size: int = THUMBNAIL_SIZE) -> bytes:
+    """JPEG thumbnail no larger than `size` on either side, EXIF rotation applied"""
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((size, size))
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        out = io.BytesIO()
+        img.save(out, format="JPEG", quality=75, optimize=True)
+        return out.getvalue()
+
+
+def thumbnail_from_base64(image_data: str, size: int = THUMBNAIL_SIZE) -> bytes:
+    return make_thumbnail(base64.b64decode(image_data), size)
@@ -0,0 +1,315 @@
+"""
+Cluster-safe background job scheduler.
+
+Every worker process registers the same jobs, but a job occurrence only runs in
+the worker that wins its MongoDB lease. Schedules are cron-style wall-clock
+expressions ("minute hour day-of-month month day-of-week"), so a restart does
+not shift or repeat a run. Each run is recorded in `scheduler_runs` with its
+duration, and pause state lives in `scheduler_jobs` so it applies to all workers.
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+from pymongo import ReturnDocument, DESCENDING
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_TIMEZONE = os.environ.get('SCHEDULER_TIMEZONE', 'UTC')
+
+
+class CronSchedule:
+    """Five-field cron expression: minute hour day-of-month month day-of-week.
+
+    Supports `*`, `*/n`, `a-b`, `a-b/n` and comma lists. Day-of-week uses the
+    cron convention (0 or 7 = Sunday). As in cron, when both day fields are
+    restricted a day matches if either field matches.
+    """
+
+    _RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression: str, tz: str = SCHEDULER_TIMEZONE):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression must have 5 fields: {expression!r}")
+        self.expression = expression
+        self.tz = ZoneInfo(tz)
+        parsed = [self._parse_field(f, lo, hi) for f, (lo, hi) in zip(fields, self._RANGES)]
+        self.minutes, self.hours, self.days, self.months, dows = parsed
+        self.weekdays = {d % 7 for d in dows}
+        self.dom_restricted = fields[2] != '*'
+        self.dow_restricted = fields[4] != '*'
+
+    @staticmethod
+    def _parse_field(spec: str, lo: int, hi: int) -> set:
+        values = set()
+        for part in spec.split(','):
+            step = 1
+            if '/' in part:
+                part, step_str = part.split('/', 1)
+                step = int(step_str)
+                if step <= 0:
+                    raise ValueError(f"Invalid step in cron field {spec!r}")
+            if part == '*':
+                start, end = lo, hi
+            elif '-' in part:
+                start_str, end_str = part.split('-', 1)
+                start, end = int(start_str), int(end_str)
+            else:
+                start = int(part)
+                end = hi if step > 1 else start
+            if start < lo or end > hi or start > end:
+                raise ValueError(f"Cron field {spec!r} out of range {lo}-{hi}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, dt: datetime) -> bool:
+        dom_ok = dt.day in self.days
+        dow_ok = (dt.weekday() + 1) % 7 in self.weekdays
+        if self.dom_restricted and self.dow_restricted:
+            return dom_ok or dow_ok
+        if self.dom_restricted:
+            return dom_ok
+        if self.dow_restricted:
+            return dow_ok
+        return True
+
+    def next_after(self, after: datetime) -> datetime:
+        """Return the first matching minute strictly after `after` (UTC-aware)."""
+        dt = after.astimezone(self.tz).replace(second=0, microsecond=0, tzinfo=None) + timedelta(minutes=1)
+        # Jump field by field instead of scanning minute by minute; five years
+        # is enough to find any valid expression (e.g. "0 0 29 2 *").
+        limit = dt + timedelta(days=366 * 5)
+        while dt <= limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+                continue
+            if not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+                continue
+            if dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+                continue
+            return dt.replace(tzinfo=self.tz).astimezone(timezone.utc)
+        raise ValueError(f"Cron expression {self.expression!r} never matches")
+
+
+@dataclass
+class ScheduledJob:
+    name: str
+    func: Callable[[], Awaitable]
+    schedule: CronSchedule
+    description: str = ""
+    lease_seconds: int = 15 * 60
+    next_run_at: Optional[datetime] = None
+
+
+class JobAlreadyRunning(Exception):
+    """Raised when a manual trigger cannot acquire the job lease"""
+
+
+class JobScheduler:
+    """Runs registered jobs on their cron schedules, one worker per occurrence."""
+
+    def __init__(self, db, worker_id: Optional[str] = None, on_run_finished: Optional[Callable[[dict], None]] = None):
+        self.db = db
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.on_run_finished = on_run_finished  # called with each finished run record (e.g. metrics)
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def register(self, name: str, func: Callable[[], Awaitable], cron: str,
+                 description: str = "", lease_seconds: int = 15 * 60):
+        if name in self.jobs:
+            raise ValueError(f"Job {name!r} is already registered")
+        self.jobs[name] = ScheduledJob(name, func, CronSchedule(cron), description, lease_seconds)
+
+    def job(self, name: str, cron: str, description: str = "", lease_seconds: int = 15 * 60):
+        """Decorator form of `register`"""
+        def decorator(func):
+            self.register(name, func, cron, description, lease_seconds)
+            return func
+        return decorator
+
+    async def ensure_indexes(self):
+        await self.db.scheduler_runs.create_index([("job", 1), ("started_at", DESCENDING)])
+        await self.db.scheduler_jobs.create_index("name", unique=True)
+
+    async def start(self):
+        await self.ensure_indexes()
+        for job in self.jobs.values():
+            await self.db.scheduler_jobs.update_one(
+                {"name": job.name},
+                {
+                    "$set": {"cron": job.schedule.expression, "description": job.description},
+                    "$setOnInsert": {"paused": False}
+                },
+                upsert=True
+            )
+            self._tasks.append(asyncio.create_task(self._run_loop(job)))
+        logger.info(f"Scheduler started on {self.worker_id} with jobs: {', '.join(self.jobs)}")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _run_loop(self, job: ScheduledJob):
+        while True:
+            now = datetime.now(timezone.utc)
+            job.next_run_at = job.schedule.next_after(now)
+            await asyncio.sleep(max(0.0, (job.next_run_at - now).total_seconds()))
+            try:
+                state = await self.db.scheduler_jobs.find_one({"name": job.name}, {"_id": 0, "paused": 1})
+                if state and state.get("paused"):
+                    logger.info(f"Job {job.name} is paused, skipping {job.next_run_at.isoformat()}")
+                    continue
+                await self._execute(job, occurrence=job.next_run_at.isoformat(), trigger="schedule")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Scheduler loop error for {job.name}: {str(e)}")
+
+    async def _acquire_lease(self, job: ScheduledJob, occurrence: str) -> bool:
+        """Claim the job lease for one occurrence.
+
+        The lease document keeps the last occurrence it was granted for, so a
+        worker whose clock lags behind cannot re-run an occurrence that another
+        worker already finished. A held or already-used lease makes the upsert
+        collide on `_id` and is reported as not acquired.
+        """
+        now = datetime.now(timezone.utc)
+        try:
+            await self.db.scheduler_leases.find_one_and_update(
+                {"_id": job.name, "expires_at": {"$lte": now}, "occurrence": {"$ne": occurrence}},
+                {"$set": {
+                    "owner": self.worker_id,
+                    "occurrence": occurrence,
+                    "acquired_at": now,
+                    "expires_at": now + timedelta(seconds=job.lease_seconds)
+                }},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def _renew_lease(self, job: ScheduledJob, occurrence: str):
+        interval = max(1.0, job.lease_seconds / 3)
+        while True:
+            await asyncio.sleep(interval)
+            await self.db.scheduler_leases.update_one(
+                {"_id": job.name, "owner": self.worker_id, "occurrence": occurrence},
+                {"$set": {"expires_at": datetime.now(timezone.utc) + timedelta(seconds=job.lease_seconds)}}
+            )
+
+    async def _release_lease(self, job: ScheduledJob, occurrence: str):
+        # Expire rather than delete so the occurrence marker survives
+        await self.db.scheduler_leases.update_one(
+            {"_id": job.name, "owner": self.worker_id, "occurrence": occurrence},
+            {"$set": {"expires_at": datetime.now(timezone.utc)}}
+        )
+
+    async def _execute(self, job: ScheduledJob, occurrence: str, trigger: str,
+                       triggered_by: Optional[str] = None) -> Optional[dict]:
+        if not await self._acquire_lease(job, occurrence):
+            logger.info(f"Job {job.name} occurrence {occurrence} is owned by another worker")
+            return None
+
+        run = {
+            "id": str(uuid.uuid4()),
+            "job": job.name,
+            "occurrence": occurrence,
+            "trigger": trigger,
+            "triggered_by": triggered_by,
+            "worker": self.worker_id,
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "status": "running"
+        }
+        await self.db.scheduler_runs.insert_one(run)
+        run.pop("_id", None)
+
+        renewer = asyncio.create_task(self._renew_lease(job, occurrence))
+        started = time.perf_counter()
+        try:
+            result = await job.func()
+            run.update(status="success", result=result if isinstance(result, (dict, int, str)) else None)
+        except Exception as e:
+            logger.error(f"Job {job.name} failed: {str(e)}")
+            run.update(status="failed", error=str(e))
+        finally:
+            renewer.cancel()
+            run["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            run["finished_at"] = datetime.now(timezone.utc).isoformat()
+            await self.db.scheduler_runs.update_one({"id": run["id"]}, {"$set": run})
+            await self.db.scheduler_jobs.update_one(
+                {"name": job.name},
+                {"$set": {
+                    "last_run_at": run["started_at"],
+                    "last_status": run["status"],
+                    "last_duration_ms": run["duration_ms"]
+                }}
+            )
+            await self._release_lease(job, occurrence)
+        logger.info(f"Job {job.name} finished with {run['status']} in {run['duration_ms']}ms")
+        if self.on_run_finished:
+            self.on_run_finished(run)
+        return run
+
+    async def trigger(self, name: str, triggered_by: Optional[str] = None) -> dict:
+        """Run a job immediately, outside its schedule"""
+        job = self._get(name)
+        run = await self._execute(job, occurrence=f"manual:{uuid.uuid4()}", trigger="manual",
+                                  triggered_by=triggered_by)
+        if run is None:
+            raise JobAlreadyRunning(name)
+        return run
+
+    async def set_paused(self, name: str, paused: bool):
+        self._get(name)
+        await self.db.scheduler_jobs.update_one({"name": name}, {"$set": {"paused": paused}}, upsert=True)
+
+    async def list_jobs(self) -> List[dict]:
+        states = {
+            doc["name"]: doc
+            async for doc in self.db.scheduler_jobs.find({"name": {"$in": list(self.jobs)}}, {"_id": 0})
+        }
+        now = datetime.now(timezone.utc)
+        jobs = []
+        for job in self.jobs.values():
+            state = states.get(job.name, {})
+            jobs.append({
+                "name": job.name,
+                "description": job.description,
+                "cron": job.schedule.expression,
+                "timezone": str(job.schedule.tz),
+                "paused": state.get("paused", False),
+                "next_run_at": (job.next_run_at or job.schedule.next_after(now)).isoformat(),
+                "last_run_at": state.get("last_run_at"),
+                "last_status": state.get("last_status"),
+                "last_duration_ms": state.get("last_duration_ms")
+            })
+        return jobs
+
+    async def get_runs(self, name: str, limit: int = 50) -> List[dict]:
+        self._get(name)
+        return await self.db.scheduler_runs.find({"job": name}, {"_id": 0}).sort("started_at", -1).limit(limit).to_list(limit)
+
+    def _get(self, name: str) -> ScheduledJob:
+        job = self.jobs.get(name)
+        if not job:
+            raise KeyError(name)
+        return job
@@ -1,25 +1,49 @@
-from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Depends, Header, Form
+from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Depends, Header, Form, BackgroundTasks, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import Response
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import OperationFailure
 import os
 import logging
 import asyncio
+import time
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
 from typing import List, Optional, Dict
 import uuid
 from datetime import datetime, timezone, timedelta
 import jwt
-import bcrypt
 import random
 import math
 import re
 import firebase_admin
-from firebase_admin import credentials, auth as firebase_auth
+from firebase_admin import credentials
 import io
 from PIL import Image
+from scheduler import JobScheduler, JobAlreadyRunning
+from rate_limit import RateLimit, RateLimitMiddleware, MemoryBucketStore, MongoBucketStore
+from passwords import PasswordHasher, PasswordHasherBusy
+from firebase_tokens import FirebaseTokenVerifier, FirebaseTokenError
+from shop_calendar import ShopCalendarService, load_shop_calendar, parse_hhmm
+from delivery_zones import DeliveryZoneService, InvalidZoneGeometry, normalize_polygon
+from geo import haversine_km, bin_points
+from route_planner import plan_routes
+from kitchen import KitchenService, cooking_minutes, to_iso
+from menu_search import MenuSearchService
+from uploads import MaxBodySizeMiddleware, save_upload, UploadTooLarge, InvalidUploadContent, PDF_MAGIC
+from menu_ingest import ingest_menu_pdf
+from file_delivery import file_response, file_stat, sha256_file
+from responses import CompressionMiddleware, OrjsonResponse
+from review_queue import (Decision, claim_batch, release_claims, verification_operations, user_operations,
+                          make_thumbnail, thumbnail_from_base64, QUEUE_PROJECTION)
+from image_hash import image_hash, closest_match
+from image_quality import assess_image
+from user_purge import UserPurger
+from audit import AuditLog
+from metrics import Registry, MetricsMiddleware, MongoCommandMetrics, MONGO_BUCKETS
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -31,11 +55,87 @@ if os.path.exists(firebase_admin_path) and not firebase_admin._apps:
     firebase_admin.initialize_app(cred)
     logging.info("Firebase Admin SDK initialized")
 
+# Firebase ID tokens are verified locally against Google's cached signing certificates
+firebase_verifier = FirebaseTokenVerifier(
+    os.environ.get('FIREBASE_PROJECT_ID') or (firebase_admin.get_app().project_id if firebase_admin._apps else None)
+)
+
+# Prometheus metrics, per worker, served at /metrics
+metrics = Registry()
+http_request_seconds = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ["method", "route", "status"])
+mongo_command_seconds = metrics.histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency", ["command", "collection"], MONGO_BUCKETS)
+mongo_command_failures = metrics.counter(
+    "mongodb_command_failures_total", "Failed MongoDB commands", ["command", "collection"])
+ocr_events_total = metrics.counter("ocr_events_total", "Vision OCR calls made and avoided", ["event"])
+cache_lookups_total = metrics.counter("cache_lookups_total", "In-process cache lookups", ["cache", "result"])
+job_runs_total = metrics.counter("background_job_runs_total", "Scheduled job runs", ["job", "status"])
+job_run_seconds = metrics.histogram(
+    "background_job_duration_seconds", "Scheduled job run time", ["job"], (1, 5, 15, 60, 300, 900, 3600))
+
+def record_job_run(run: dict):
+    job_runs_total.inc(run["job"], run["status"])
+    job_run_seconds.observe(run["duration_ms"] / 1000, run["job"])
+
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client_db = AsyncIOMotorClient(mongo_url)
+client_db = AsyncIOMotorClient(
+    mongo_url, event_listeners=[MongoCommandMetrics(mongo_command_seconds, mongo_command_failures)]
+)
 db = client_db[os.environ['DB_NAME']]
 
+# Background jobs (one worker per occurrence via Mongo lease)
+scheduler = JobScheduler(db, on_run_finished=record_job_run)
+
+# Shop calendar (weekly off, closed days, hours) held in memory per worker
+shop_calendar_service = ShopCalendarService(db)
+
+# Delivery zone polygons held in memory per worker
+delivery_zone_service = DeliveryZoneService(db)
+
+# Kitchen queue for order ETAs (per worker, resynced from orders)
+kitchen_service = KitchenService(db)
+
+# Menu search index (per worker, updated by admin menu routes)
+menu_search_service = MenuSearchService(db)
+
+# Cascading user deletes (transactional on replica sets, resumable jobs otherwise)
+user_purger = UserPurger(client_db, db)
+
+# Admin audit trail, written in batches by a background task
+audit_log = AuditLog(db.admin_logs)
+metrics.callback("audit_log_queued", "Audit log entries waiting to be written",
+                 lambda: {(): audit_log.stats()["queued"] + audit_log.stats()["in_flight"]})
+metrics.callback("audit_log_entries_total", "Audit log entries written or dropped",
+                 lambda: {("written",): audit_log.written, ("lost",): audit_log.lost}, ["outcome"], "counter")
+
+# Admin password hashing runs on a small dedicated thread pool
+password_hasher = PasswordHasher()
+
+# Uploaded files (menu PDFs); keep on persistent storage in production
+UPLOAD_ROOT = Path(os.environ.get('UPLOAD_ROOT', str(ROOT_DIR / 'uploads')))
+MENU_PDF_MAX_BYTES = int(os.environ.get('MENU_PDF_MAX_MB', '20')) * 1024 * 1024
+
+# List views return only what the list UI shows; heavy fields (ID photo base64,
+# OCR text) are served by the per-item detail routes
+USER_LIST_PROJECTION = {
+    "_id": 0, "id": 1, "name": 1, "phone_number": 1, "college": 1, "dob": 1, "age": 1,
+    "is_student": 1, "verification_status": 1, "loyalty_active": 1, "points": 1,
+    "rejection_reason": 1, "last_visit": 1, "created_at": 1
+}
+USER_DETAIL_PROJECTION = {"_id": 0, "firebase_uid": 0}
+VERIFICATION_LIST_PROJECTION = QUEUE_PROJECTION
+VERIFICATION_DETAIL_PROJECTION = {"_id": 0, "thumbnail_data": 0}
+LOYALTY_BILL_LIST_PROJECTION = {"_id": 0, "extracted_text": 0, "image_hash": 0, "image_hash_bands": 0}
+LOYALTY_BILL_DETAIL_PROJECTION = {"_id": 0, "image_hash_bands": 0}
+
+# How long an admin keeps claimed verifications before they return to the queue
+VERIFICATION_LEASE_SECONDS = int(os.environ.get('VERIFICATION_LEASE_SECONDS', '300'))
+
+# A bill photo is only compared with the uploader's own bills from this many days (one bill a day at most)
+BILL_HASH_WINDOW_DAYS = int(os.environ.get('BILL_HASH_WINDOW_DAYS', '30'))
+
 # JWT Secret
 JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key-change-in-production')
 JWT_ALGORITHM = 'HS256'
@@ -52,11 +152,13 @@ except ImportError:
 
 # Google Vision setup - Use dedicated Vision API key
 GOOGLE_VISION_API_KEY = os.environ.get('GOOGLE_VISION_API_KEY')
+# Overridable so load tests can point OCR at a local stub
+GOOGLE_VISION_URL = os.environ.get('GOOGLE_VISION_URL', 'https://vision.googleapis.com/v1/images:annotate')
 if not GOOGLE_VISION_API_KEY:
     logging.warning("GOOGLE_VISION_API_KEY not set - OCR will not work")
 
 # Create the main app
-app = FastAPI()
+app = FastAPI(default_response_class=OrjsonResponse)
 api_router = APIRouter(prefix="/api")
 security = HTTPBearer()
 
@@ -191,11 +293,46 @@ class Settings(BaseModel):
     shop_address: str
     payment_info: str = "Cash on Delivery only"
     weekly_off_day: int = 1  # 0=Monday, 1=Tuesday, etc.
+    open_time: Optional[str] = None  # HH:MM in SHOP_TIMEZONE, None = open all day
+    close_time: Optional[str] = None  # HH:MM, earlier than open_time = closes after midnight
+    cooking_stations: int = 1  # orders the kitchen can cook at the same time
+
+class SpecialHours(BaseModel):
+    date: str  # YYYY-MM-DD
+    open_time: str  # HH:MM
+    close_time: str  # HH:MM
+    note: Optional[str] = None
+
+class DispatchRoute(BaseModel):
+    order_ids: List[str]
+
+class BulkDeleteUsers(BaseModel):
+    user_ids: List[str] = Field(..., min_length=1, max_length=5000)
+
+class VerificationDecisionItem(BaseModel):
+    verification_id: str
+    action: str  # approve or reject
+    reason: str = ""
+
+class VerificationDecisions(BaseModel):
+    decisions: List[VerificationDecisionItem] = Field(..., min_length=1, max_length=100)
+
+class ReleaseVerifications(BaseModel):
+    verification_ids: List[str] = Field(..., max_length=100)
 
 class LocationValidation(BaseModel):
     latitude: float
     longitude: float
 
+class BatchLocationValidation(BaseModel):
+    locations: List[LocationValidation] = Field(..., max_length=500)
+
+class DeliveryZone(BaseModel):
+    name: str
+    polygon: Dict  # GeoJSON Polygon, coordinates as [longitude, latitude]
+    delivery_fee: float
+    active: bool = True
+
 class AdminLogin(BaseModel):
     username: str
     password: str
@@ -268,17 +405,55 @@ def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     
     return R * c
 
+def check_delivery(settings: dict, latitude: float, longitude: float, distance: Optional[float] = None) -> dict:
+    """Match a location to a delivery zone; falls back to the radius check when no zones exist"""
+    if distance is None:
+        distance = calculate_distance(settings['shop_latitude'], settings['shop_longitude'], latitude, longitude)
+    result = {"distance_km": round(distance, 2), "zone_id": None, "zone_name": None}
+    if delivery_zone_service.has_zones:
+        zone = delivery_zone_service.find(latitude, longitude)
+        result.update({
+            "delivery_available": zone is not None,
+            "delivery_fee": zone.delivery_fee if zone else None,
+            "zone_id": zone.id if zone else None,
+            "zone_name": zone.name if zone else None
+        })
+    else:
+        available = distance <= settings.get('delivery_radius_km', 2.0)
+        result.update({
+            "delivery_available": available,
+            "delivery_fee": settings.get('delivery_charge', 50) if available else None
+        })
+    return result
+
 def is_shop_open() -> tuple[bool, str]:
-    """Check if shop is open. Tuesday is weekly closed."""
-    now = datetime.now(timezone.utc)
-    day_of_week = now.weekday()  # 0=Monday, 1=Tuesday, etc.
-    
-    if day_of_week == 1:  # Tuesday
-        return False, "Closed (Weekly Off - Tuesday)"
-    
-    # Check admin closed days from settings
-    # For MVP, assuming shop is open other days
-    return True, "Open Now"
+    """Check if shop is open (weekly off day, admin closed days and hours; served from memory)"""
+    status = shop_calendar_service.status()
+    return status["is_open"], status["message"]
+
+def validate_calendar_date(date_str: str):
+    try:
+        datetime.strptime(date_str, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+def validate_shop_hours(open_time: Optional[str], close_time: Optional[str]):
+    try:
+        parse_hhmm(open_time)
+        parse_hhmm(close_time)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Opening hours must both be set in HH:MM format")
+
+def parse_coupon_expiry(expiry_str: str) -> datetime:
+    """Coupon expiry as an aware datetime; a date-only value (YYYY-MM-DD) lasts until the end of that day (UTC)"""
+    try:
+        return datetime.strptime(expiry_str, "%Y-%m-%d").replace(hour=23, minute=59, second=59, tzinfo=timezone.utc)
+    except ValueError:
+        # ISO datetime, with or without an offset
+        expiry_date = datetime.fromisoformat(expiry_str)
+        if expiry_date.tzinfo is None:
+            expiry_date = expiry_date.replace(tzinfo=timezone.utc)
+        return expiry_date
 
 def calculate_age_from_dob(dob_str: str) -> int:
     """Calculate current age from date of birth"""
@@ -309,6 +484,29 @@ async def check_and_update_loyalty_status(user_id: str):
         )
         logging.info(f"User {user_id} loyalty disabled - aged out")
 
+async def record_ocr_event(event: str):
+    """Count OCR calls made / avoided per day (ocr_stats collection)"""
+    ocr_events_total.inc(event)
+    try:
+        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        await db.ocr_stats.update_one({"date": today}, {"$inc": {event: 1}}, upsert=True)
+    except Exception as e:
+        logging.warning(f"OCR stats update failed: {str(e)}")
+
+async def check_photo_quality(contents: bytes) -> Optional[str]:
+    """Run the local quality gate; returns a user-facing error message if the photo is unusable"""
+    try:
+        report = await asyncio.to_thread(assess_image, contents)
+    except Exception as e:
+        # Undecodable input is left to the callers' own image validation
+        logging.warning(f"Photo quality check failed: {str(e)}")
+        return None
+    if report.ok:
+        return None
+    logging.info(f"Photo rejected before OCR: {report.reason} {report.metrics} ({report.elapsed_ms:.1f} ms)")
+    await record_ocr_event(f"avoided.quality_{report.reason}")
+    return report.message
+
 async def extract_text_from_image(image_bytes: bytes) -> str:
     """Extract text from image using Google Cloud Vision API"""
     import base64
@@ -324,7 +522,7 @@ async def extract_text_from_image(image_bytes: bytes) -> str:
             logging.error("GOOGLE_VISION_API_KEY not configured")
             return ""
         
-        url = f"https://vision.googleapis.com/v1/images:annotate?key={api_key}"
+        url = f"{GOOGLE_VISION_URL}?key={api_key}"
         
         payload = {
             "requests": [{
@@ -334,6 +532,7 @@ async def extract_text_from_image(image_bytes: bytes) -> str:
         }
         
         logging.info("Calling Google Vision API for OCR...")
+        await record_ocr_event("calls")
         
         async with httpx.AsyncClient(timeout=60.0) as client:
             response = await client.post(url, json=payload)
@@ -503,34 +702,48 @@ async def calculate_loyalty_points(user_id: str, amount: float, bill_date: str)
         return 2
     return 0
 
-async def check_and_reset_points(user_id: str):
-    """Check if user missed 3 open days and reset points"""
-    user = await db.users.find_one({"id": user_id}, {"_id": 0})
-    if not user or not user.get('last_visit'):
-        return
+def build_login_update(now: datetime, extra_fields: Optional[dict] = None) -> list:
+    """Aggregation-pipeline update that applies every login side effect in one write.
     
-    last_visit = datetime.fromisoformat(user['last_visit'])
-    now = datetime.now(timezone.utc)
-    
-    # Count open days missed
-    missed_days = 0
-    current_date = last_visit + timedelta(days=1)
-    
-    while current_date < now:
-        day_of_week = current_date.weekday()
-        if day_of_week != 1:  # Not Tuesday
-            # Check if shop was not admin-closed (for MVP, assuming open)
-            missed_days += 1
-        
-        if missed_days >= 3:
-            # Reset points
-            await db.users.update_one(
-                {"id": user_id},
-                {"$set": {"points": 0}}
-            )
-            break
-        
-        current_date += timedelta(days=1)
+    - loyalty_active is switched off for students who are no longer 17-23
+    - points are reset if last_visit is before the shop calendar's reset cutoff
+    - last_visit moves to now
+    All expressions in one $set see the document as it was before the login.
+    Age bounds are compared as YYYY-MM-DD strings, so dob needs no date parsing.
+    """
+    today = now.date()
+    # Born on or before these dates means at least that age today
+    born_by_age_24 = f"{today.year - 24:04d}-{today.month:02d}-{today.day:02d}"
+    born_by_age_17 = f"{today.year - 17:04d}-{today.month:02d}-{today.day:02d}"
+    cutoff = shop_calendar_service.calendar.points_reset_cutoff(now).isoformat()
+    
+    loyalty_eligible = {"$and": [
+        {"$gt": ["$dob", born_by_age_24]},
+        {"$lte": ["$dob", born_by_age_17]}
+    ]}
+    return [{"$set": {
+        "loyalty_active": {"$cond": [
+            {"$and": ["$is_student", {"$eq": [{"$type": "$dob"}, "string"]}, {"$not": [loyalty_eligible]}]},
+            False,
+            "$loyalty_active"
+        ]},
+        "points": {"$cond": [
+            {"$and": [{"$eq": [{"$type": "$last_visit"}, "string"]}, {"$lt": ["$last_visit", cutoff]}]},
+            0,
+            "$points"
+        ]},
+        "last_visit": now.isoformat(),
+        **(extra_fields or {})
+    }}]
+
+async def login_existing_user(phone_number: str, extra_fields: Optional[dict] = None) -> Optional[dict]:
+    """Apply login updates atomically and return the updated user, or None if not registered"""
+    return await db.users.find_one_and_update(
+        {"phone_number": phone_number},
+        build_login_update(datetime.now(timezone.utc), extra_fields),
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
 
 # ==================== AUTH ROUTES ====================
 
@@ -538,35 +751,18 @@ async def check_and_reset_points(user_id: str):
 async def firebase_auth_handler(request: FirebaseAuthRequest):
     """Authenticate user with Firebase Phone Auth token"""
     try:
-        # Verify Firebase ID token
-        decoded_token = firebase_auth.verify_id_token(request.firebase_token)
+        # Verify Firebase ID token (off the event loop, cached per token)
+        decoded_token = await firebase_verifier.verify(request.firebase_token)
         phone_number = decoded_token.get('phone_number')
         firebase_uid = decoded_token.get('uid')
         
         if not phone_number:
             raise HTTPException(status_code=400, detail="Phone number not found in token")
         
-        # Check if user exists
-        user = await db.users.find_one({"phone_number": phone_number}, {"_id": 0})
+        # Existing user - login (loyalty expiry, points reset and last_visit in one update)
+        user = await login_existing_user(phone_number, {"firebase_uid": firebase_uid})
         
         if user:
-            # Existing user - login
-            await db.users.update_one(
-                {"id": user['id']},
-                {"$set": {
-                    "last_visit": datetime.now(timezone.utc).isoformat(),
-                    "firebase_uid": firebase_uid
-                }}
-            )
-            
-            # Check and update loyalty eligibility if user is a student
-            if user.get('is_student') and user.get('dob'):
-                await check_and_update_loyalty_status(user['id'])
-                user = await db.users.find_one({"phone_number": phone_number}, {"_id": 0})
-            
-            # Check and reset points if needed
-            await check_and_reset_points(user['id'])
-            
             token = create_jwt_token(user['id'])
             return {"token": token, "user": user, "is_new_user": False}
         
@@ -599,7 +795,7 @@ async def firebase_auth_handler(request: FirebaseAuthRequest):
         # New user without name - need registration
         return {"is_new_user": True, "phone_number": phone_number, "firebase_verified": True}
     
-    except firebase_admin.exceptions.FirebaseError as e:
+    except FirebaseTokenError as e:
         logging.error(f"Firebase auth error: {str(e)}")
         raise HTTPException(status_code=401, detail="Invalid Firebase token")
     except Exception as e:
@@ -657,25 +853,10 @@ async def verify_otp(request: VerifyOTPRequest):
         if not is_valid:
             raise HTTPException(status_code=400, detail="Invalid OTP")
         
-        # Check if user exists
-        user = await db.users.find_one({"phone_number": request.phone_number}, {"_id": 0})
+        # Existing user - login (loyalty expiry, points reset and last_visit in one update)
+        user = await login_existing_user(request.phone_number)
         
         if user:
-            # Existing user - login
-            await db.users.update_one(
-                {"id": user['id']},
-                {"$set": {"last_visit": datetime.now(timezone.utc).isoformat()}}
-            )
-            
-            # Check and update loyalty eligibility if user is a student
-            if user.get('is_student') and user.get('dob'):
-                await check_and_update_loyalty_status(user['id'])
-                # Refetch user to get updated loyalty_active status
-                user = await db.users.find_one({"phone_number": request.phone_number}, {"_id": 0})
-            
-            # Check and reset points if needed
-            await check_and_reset_points(user['id'])
-            
             token = create_jwt_token(user['id'])
             return {"token": token, "user": user, "is_new_user": False}
         
@@ -794,6 +975,11 @@ async def upload_student_id(
                 "message": "Invalid image file. Please upload a valid image (JPG, PNG, etc.)"
             }
         
+        # An unreadable ID photo is useless to the reviewing admin as well
+        quality_error = await check_photo_quality(contents)
+        if quality_error:
+            return {"success": False, "message": quality_error}
+        
         # Try to extract text using OCR (optional - won't fail if OCR fails)
         extracted_text = ""
         ocr_dob = None
@@ -812,6 +998,13 @@ async def upload_student_id(
         import base64
         image_base64 = base64.b64encode(contents).decode('utf-8')
         
+        # Small preview for the review queue (generated on first view if this fails)
+        thumbnail_base64 = None
+        try:
+            thumbnail_base64 = base64.b64encode(await asyncio.to_thread(make_thumbnail, contents)).decode('utf-8')
+        except Exception as thumb_error:
+            logging.warning(f"Thumbnail generation failed: {str(thumb_error)}")
+        
         # Store for admin verification
         verification_doc = {
             "id": str(uuid.uuid4()),
@@ -823,6 +1016,7 @@ async def upload_student_id(
             "ocr_extracted_dob": ocr_dob,
             "dob_match": dob_match,
             "image_data": image_base64,
+            "thumbnail_data": thumbnail_base64,
             "status": "pending",
             "created_at": datetime.now(timezone.utc).isoformat()
         }
@@ -839,7 +1033,7 @@ async def upload_student_id(
         )
         
         # Log the action
-        await db.admin_logs.insert_one({
+        await audit_log.record({
             "id": str(uuid.uuid4()),
             "action": "student_id_uploaded",
             "user_id": current_user['id'],
@@ -906,7 +1100,7 @@ async def apply_student_loyalty(request: ApplyStudentLoyaltyRequest, current_use
     )
     
     # Log action
-    await db.admin_logs.insert_one({
+    await audit_log.record({
         "id": str(uuid.uuid4()),
         "action": "student_loyalty_applied",
         "user_id": current_user['id'],
@@ -926,6 +1120,29 @@ async def get_menu():
     items = await db.menu_items.find({"available": True}, {"_id": 0}).to_list(1000)
     return items
 
+@api_router.get("/menu/search")
+async def search_menu(q: str = "", veg: Optional[bool] = None, category: Optional[str] = None,
+                      min_price: Optional[float] = None, max_price: Optional[float] = None, limit: int = 50):
+    """Search available menu items with veg / category / price facets (last word matches as a prefix)"""
+    return menu_search_service.index.search(
+        q, veg=veg, category=category, min_price=min_price, max_price=max_price, limit=max(1, min(limit, 200))
+    )
+
+@api_router.get("/menu/suggest")
+async def suggest_menu_terms(q: str):
+    """Typeahead completions for the word being typed"""
+    return {"suggestions": menu_search_service.index.suggest(q)}
+
+@api_router.get("/admin/menu/search")
+async def admin_search_menu(q: str = "", veg: Optional[bool] = None, category: Optional[str] = None,
+                            min_price: Optional[float] = None, max_price: Optional[float] = None,
+                            limit: int = 200, admin: dict = Depends(get_admin_user)):
+    """Search all menu items, including unavailable ones"""
+    return menu_search_service.index.search(
+        q, veg=veg, category=category, min_price=min_price, max_price=max_price,
+        include_unavailable=True, limit=max(1, min(limit, 1000))
+    )
+
 @api_router.get("/menu/all")
 async def get_all_menu_items(admin: dict = Depends(get_admin_user)):
     """Get all menu items including unavailable ones (admin only)"""
@@ -937,19 +1154,22 @@ async def get_all_menu_items(admin: dict = Depends(get_admin_user)):
 @api_router.post("/orders")
 async def create_order(order_req: CreateOrder, current_user: dict = Depends(get_current_user)):
     """Create new order - available to ALL logged-in users"""
+    is_open, message = is_shop_open()
+    if not is_open:
+        raise HTTPException(status_code=400, detail=f"Shop is not accepting orders right now: {message}")
+    
     # Get shop location from settings
     settings = await db.settings.find_one({}, {"_id": 0})
     if not settings or 'shop_latitude' not in settings:
         raise HTTPException(status_code=500, detail="Shop location not configured. Please contact admin.")
     
-    shop_lat = settings['shop_latitude']
-    shop_lon = settings['shop_longitude']
-    delivery_radius = settings.get('delivery_radius_km', 2.0)
-    
-    # Validate location
-    distance = calculate_distance(shop_lat, shop_lon, order_req.latitude, order_req.longitude)
+    # Validate location against delivery zones (or the delivery radius)
+    delivery = check_delivery(settings, order_req.latitude, order_req.longitude)
     
-    if distance > delivery_radius:
+    if not delivery['delivery_available']:
+        if delivery_zone_service.has_zones:
+            raise HTTPException(status_code=400, detail="Delivery not available. Location is outside our delivery zones.")
+        delivery_radius = settings.get('delivery_radius_km', 2.0)
         raise HTTPException(status_code=400, detail=f"Delivery not available. Location is beyond {delivery_radius}km radius.")
     
     # Calculate total
@@ -960,16 +1180,7 @@ async def create_order(order_req: CreateOrder, current_user: dict = Depends(get_
     if order_req.coupon_code:
         coupon = await db.coupons.find_one({"code": order_req.coupon_code, "active": True}, {"_id": 0})
         if coupon:
-            # Parse expiry date - handle both date-only and datetime formats
-            expiry_str = coupon['expiry_date']
-            try:
-                expiry_date = datetime.strptime(expiry_str, "%Y-%m-%d").replace(hour=23, minute=59, second=59, tzinfo=timezone.utc)
-            except ValueError:
-                expiry_date = datetime.fromisoformat(expiry_str)
-                if expiry_date.tzinfo is None:
-                    expiry_date = expiry_date.replace(tzinfo=timezone.utc)
-            
-            if datetime.now(timezone.utc) > expiry_date:
+            if datetime.now(timezone.utc) > parse_coupon_expiry(coupon['expiry_date']):
                 raise HTTPException(status_code=400, detail="Coupon expired")
             if coupon['used_count'] >= coupon['usage_limit']:
                 raise HTTPException(status_code=400, detail="Coupon usage limit reached")
@@ -987,11 +1198,19 @@ async def create_order(order_req: CreateOrder, current_user: dict = Depends(get_
                 {"$inc": {"used_count": 1}}
             )
     
-    # Get delivery charge from settings
-    delivery_fee = settings.get('delivery_charge', 50)
+    # Delivery charge from the matched zone (or settings)
+    delivery_fee = delivery['delivery_fee']
     
     final_amount = total_amount + delivery_fee - discount
     
+    # Cooking time from menu prep times, queued behind the kitchen's current load
+    menu_ids = list({item.menu_item_id for item in order_req.items})
+    prep_times = {
+        m['id']: m.get('prep_time')
+        async for m in db.menu_items.find({"id": {"$in": menu_ids}}, {"_id": 0, "id": 1, "prep_time": 1})
+    }
+    cook_minutes = cooking_minutes([item.model_dump() for item in order_req.items], prep_times)
+    
     order_id = str(uuid.uuid4())
     order_data = {
         "id": order_id,
@@ -1002,11 +1221,17 @@ async def create_order(order_req: CreateOrder, current_user: dict = Depends(get_
         "discount": discount,
         "final_amount": final_amount,
         "delivery_address": order_req.delivery_address,
+        "latitude": order_req.latitude,
+        "longitude": order_req.longitude,
+        "delivery_zone_id": delivery['zone_id'],
+        "cook_minutes": cook_minutes,
         "status": "pending",
         "created_at": datetime.now(timezone.utc).isoformat()
     }
+    order_data["estimated_ready_at"] = to_iso(kitchen_service.schedule.quote(cook_minutes))
     
     await db.orders.insert_one(order_data)
+    order_data["estimated_ready_at"] = to_iso(kitchen_service.schedule.enqueue(order_id, cook_minutes))
     # Remove MongoDB _id before returning
     order_data.pop("_id", None)
     return order_data
@@ -1038,6 +1263,32 @@ async def upload_bill(file: UploadFile = File(...), current_user: dict = Depends
         # Read image
         contents = await file.read()
         
+        # Blurry / dark / tiny photos fail locally instead of after a Vision call
+        quality_error = await check_photo_quality(contents)
+        if quality_error:
+            raise HTTPException(status_code=400, detail=quality_error)
+        
+        # Reject re-uploads of the user's own recent photos before paying for OCR. Matching against
+        # every stored bill would falsely reject a growing share of new bills as the collection grows;
+        # other users' bills are caught after OCR by the bill number.
+        bill_hash = None
+        try:
+            bill_hash = await asyncio.to_thread(image_hash, contents)
+        except Exception as hash_error:
+            logging.warning(f"Bill image hash failed: {str(hash_error)}")
+        if bill_hash:
+            window_start = (datetime.now(timezone.utc) - timedelta(days=BILL_HASH_WINDOW_DAYS)).isoformat()
+            candidates = await db.loyalty_bills.find(
+                {"user_id": current_user['id'], "date": {"$gte": window_start},
+                 "image_hash_bands": {"$in": bill_hash.bands()}},
+                {"_id": 0, "id": 1, "image_hash": 1}
+            ).to_list(None)
+            match = closest_match(bill_hash, candidates)
+            if match:
+                logging.info(f"Bill photo matches bill {match[0]['id']} (distance {match[1]}), skipping OCR")
+                await record_ocr_event("avoided.duplicate")
+                raise HTTPException(status_code=400, detail="This bill has already been submitted")
+        
         # Extract text using OCR
         extracted_text = await extract_text_from_image(contents)
         
@@ -1066,7 +1317,9 @@ async def upload_bill(file: UploadFile = File(...), current_user: dict = Depends
             "points_earned": points,
             "date": bill_date,
             "status": "approved",  # Auto-approve if OCR succeeds
-            "extracted_text": extracted_text
+            "extracted_text": extracted_text,
+            "image_hash": bill_hash.to_doc() if bill_hash else None,
+            "image_hash_bands": bill_hash.bands() if bill_hash else []
         }
         
         await db.loyalty_bills.insert_one(bill_data)
@@ -1102,16 +1355,25 @@ async def get_loyalty_points(current_user: dict = Depends(get_current_user)):
 @api_router.get("/loyalty/history")
 async def get_loyalty_history(current_user: dict = Depends(get_current_user)):
     """Get user's loyalty bill history"""
-    bills = await db.loyalty_bills.find({"user_id": current_user['id']}, {"_id": 0}).sort("date", -1).to_list(100)
-    return bills
+    bills = await db.loyalty_bills.find(
+        {"user_id": current_user['id']}, LOYALTY_BILL_LIST_PROJECTION
+    ).sort("date", -1).to_list(100)
+    return OrjsonResponse(bills)
+
+@api_router.get("/loyalty/history/{bill_id}")
+async def get_loyalty_bill(bill_id: str, current_user: dict = Depends(get_current_user)):
+    """Get one of the user's loyalty bills, including the OCR text"""
+    bill = await db.loyalty_bills.find_one({"id": bill_id, "user_id": current_user['id']}, LOYALTY_BILL_DETAIL_PROJECTION)
+    if not bill:
+        raise HTTPException(status_code=404, detail="Bill not found")
+    return bill
 
 # ==================== SHOP INFO ROUTES ====================
 
 @api_router.get("/shop/status")
 async def get_shop_status():
-    """Get shop open/closed status"""
-    is_open, message = is_shop_open()
-    return {"is_open": is_open, "message": message}
+    """Get shop open/closed status with next opening / closing time"""
+    return shop_calendar_service.status()
 
 @api_router.get("/about")
 async def get_about():
@@ -1126,26 +1388,40 @@ async def get_about():
 
 @api_router.post("/validate-location")
 async def validate_location(location: LocationValidation):
-    """Validate if location is within delivery radius"""
+    """Validate if location is within a delivery zone (or the delivery radius)"""
     # Get shop location from settings
     settings = await db.settings.find_one({}, {"_id": 0})
     if not settings or 'shop_latitude' not in settings:
         raise HTTPException(status_code=500, detail="Shop location not configured. Please contact admin.")
     
-    shop_lat = settings['shop_latitude']
-    shop_lon = settings['shop_longitude']
-    delivery_radius = settings.get('delivery_radius_km', 2.0)
-    
-    distance = calculate_distance(shop_lat, shop_lon, location.latitude, location.longitude)
-    
-    within_radius = distance <= delivery_radius
+    delivery = check_delivery(settings, location.latitude, location.longitude)
     return {
-        "within_radius": within_radius,
-        "distance_km": round(distance, 2),
-        "delivery_available": within_radius,
+        "within_radius": delivery['delivery_available'],
+        **delivery,
         "shop_address": settings.get('shop_address', 'Shop location')
     }
 
+@api_router.post("/validate-location/batch")
+async def validate_locations_batch(batch: BatchLocationValidation):
+    """Validate up to 500 locations in one call"""
+    settings = await db.settings.find_one({}, {"_id": 0})
+    if not settings or 'shop_latitude' not in settings:
+        raise HTTPException(status_code=500, detail="Shop location not configured. Please contact admin.")
+    
+    # One vectorized distance pass for the whole batch
+    distances = haversine_km(
+        settings['shop_latitude'], settings['shop_longitude'],
+        [loc.latitude for loc in batch.locations], [loc.longitude for loc in batch.locations]
+    )
+    results = []
+    for location, distance in zip(batch.locations, distances.tolist()):
+        delivery = check_delivery(settings, location.latitude, location.longitude, distance)
+        results.append({"latitude": location.latitude, "longitude": location.longitude, **delivery})
+    return {
+        "results": results,
+        "available_count": sum(1 for r in results if r['delivery_available'])
+    }
+
 @api_router.get("/coupons/validate/{code}")
 async def validate_coupon(code: str):
     """Validate coupon code"""
@@ -1153,18 +1429,7 @@ async def validate_coupon(code: str):
     if not coupon:
         raise HTTPException(status_code=404, detail="Coupon not found")
     
-    # Parse expiry date - handle both date-only and datetime formats
-    expiry_str = coupon['expiry_date']
-    try:
-        # Try parsing as date only (YYYY-MM-DD)
-        expiry_date = datetime.strptime(expiry_str, "%Y-%m-%d").replace(hour=23, minute=59, second=59, tzinfo=timezone.utc)
-    except ValueError:
-        # Try parsing as ISO format with timezone
-        expiry_date = datetime.fromisoformat(expiry_str)
-        if expiry_date.tzinfo is None:
-            expiry_date = expiry_date.replace(tzinfo=timezone.utc)
-    
-    if datetime.now(timezone.utc) > expiry_date:
+    if datetime.now(timezone.utc) > parse_coupon_expiry(coupon['expiry_date']):
         raise HTTPException(status_code=400, detail="Coupon expired")
     
     if coupon['used_count'] >= coupon['usage_limit']:
@@ -1174,6 +1439,18 @@ async def validate_coupon(code: str):
 
 # ==================== ADMIN ROUTES ====================
 
+async def verify_admin_password(password: str, hashed: str) -> bool:
+    try:
+        return await password_hasher.verify(password, hashed)
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Too many login attempts in progress. Please retry shortly.")
+
+async def hash_admin_password(password: str) -> str:
+    try:
+        return await password_hasher.hash(password)
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Server busy. Please retry shortly.")
+
 @api_router.post("/admin/login")
 async def admin_login(request: AdminLogin):
     """Admin login"""
@@ -1184,11 +1461,11 @@ async def admin_login(request: AdminLogin):
         # Fallback to default admin (for first time setup)
         if request.username == "admin" and request.password == "admin@123":
             # Create default admin in database with hashed password
-            hashed_pw = bcrypt.hashpw(request.password.encode('utf-8'), bcrypt.gensalt())
+            hashed_pw = await hash_admin_password(request.password)
             await db.admin_users.insert_one({
                 "id": str(uuid.uuid4()),
                 "username": "admin",
-                "password": hashed_pw.decode('utf-8'),
+                "password": hashed_pw,
                 "created_at": datetime.now(timezone.utc).isoformat()
             })
             token = create_jwt_token("admin", role="admin")
@@ -1196,9 +1473,19 @@ async def admin_login(request: AdminLogin):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     # Verify password
-    if not bcrypt.checkpw(request.password.encode('utf-8'), admin_doc['password'].encode('utf-8')):
+    if not await verify_admin_password(request.password, admin_doc['password']):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
+    # Transparently upgrade hashes made with an older cost factor
+    if password_hasher.needs_rehash(admin_doc['password']):
+        try:
+            await db.admin_users.update_one(
+                {"id": admin_doc['id'], "password": admin_doc['password']},
+                {"$set": {"password": await password_hasher.hash(request.password)}}
+            )
+        except Exception as e:
+            logging.warning(f"Admin password rehash failed: {str(e)}")
+    
     token = create_jwt_token(admin_doc['id'], role="admin")
     return {"token": token}
 
@@ -1224,26 +1511,92 @@ async def get_admin_dashboard(admin: dict = Depends(get_admin_user)):
         "points_issued": points_issued
     }
 
+# (start_date, end_date, cell_m) -> (expires_at, response)
+heatmap_cache: Dict[tuple, tuple] = {}
+HEATMAP_CACHE_SIZE = 128
+
+@api_router.get("/admin/analytics/heatmap")
+async def get_order_heatmap(start_date: str, end_date: str, cell_m: float = 250.0,
+                            admin: dict = Depends(get_admin_user)):
+    """Order locations binned into a grid for a date range (YYYY-MM-DD, inclusive)"""
+    validate_calendar_date(start_date)
+    validate_calendar_date(end_date)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    if not 50 <= cell_m <= 5000:
+        raise HTTPException(status_code=400, detail="cell_m must be between 50 and 5000")
+    
+    key = (start_date, end_date, cell_m)
+    now = datetime.now(timezone.utc)
+    cached = heatmap_cache.get(key)
+    if cached and cached[0] > now:
+        cache_lookups_total.inc("heatmap", "hit")
+        return cached[1]
+    cache_lookups_total.inc("heatmap", "miss")
+    
+    settings = await db.settings.find_one({}, {"_id": 0})
+    if not settings or 'shop_latitude' not in settings:
+        raise HTTPException(status_code=500, detail="Shop location not configured")
+    
+    end_exclusive = (datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+    orders = await db.orders.find(
+        {"created_at": {"$gte": start_date, "$lt": end_exclusive}, "latitude": {"$ne": None}},
+        {"_id": 0, "latitude": 1, "longitude": 1}
+    ).to_list(100000)
+    lats = [o['latitude'] for o in orders if o.get('longitude') is not None]
+    lons = [o['longitude'] for o in orders if o.get('longitude') is not None]
+    
+    shop_lat, shop_lon = settings['shop_latitude'], settings['shop_longitude']
+    distances = haversine_km(shop_lat, shop_lon, lats, lons)
+    response = {
+        "start_date": start_date,
+        "end_date": end_date,
+        "cell_m": cell_m,
+        "shop": {"lat": shop_lat, "lon": shop_lon},
+        "total_orders": len(lats),
+        "avg_distance_km": round(float(distances.mean()), 2) if len(lats) else None,
+        "max_distance_km": round(float(distances.max()), 2) if len(lats) else None,
+        "cells": bin_points(lats, lons, shop_lat, shop_lon, cell_m)
+    }
+    
+    # Past ranges no longer change; ranges that include today refresh every minute
+    ttl = timedelta(hours=6) if end_exclusive <= now.strftime("%Y-%m-%d") else timedelta(minutes=1)
+    if len(heatmap_cache) >= HEATMAP_CACHE_SIZE:
+        heatmap_cache.clear()
+    heatmap_cache[key] = (now + ttl, response)
+    return response
+
 @api_router.get("/admin/users")
 async def get_all_users(admin: dict = Depends(get_admin_user)):
     """Get all users"""
-    users = await db.users.find({}, {"_id": 0}).to_list(1000)
-    return users
+    users = await db.users.find({}, USER_LIST_PROJECTION).to_list(1000)
+    return OrjsonResponse(users)
 
 @api_router.get("/admin/users/students")
 async def get_student_users(admin: dict = Depends(get_admin_user)):
     """Get all student users (opted for loyalty)"""
-    users = await db.users.find({"is_student": True}, {"_id": 0}).to_list(1000)
-    return users
+    users = await db.users.find({"is_student": True}, USER_LIST_PROJECTION).to_list(1000)
+    return OrjsonResponse(users)
 
 @api_router.get("/admin/users/non-students")
 async def get_non_student_users(admin: dict = Depends(get_admin_user)):
     """Get all non-student users (including those with is_student=None for backward compatibility)"""
     users = await db.users.find(
         {"$or": [{"is_student": False}, {"is_student": None}, {"is_student": {"$exists": False}}]}, 
-        {"_id": 0}
+        USER_LIST_PROJECTION
     ).to_list(1000)
-    return users
+    return OrjsonResponse(users)
+
+@api_router.get("/admin/users/{user_id}")
+async def get_user_detail(user_id: str, admin: dict = Depends(get_admin_user)):
+    """Get a single user with their latest student ID verification"""
+    user = await db.users.find_one({"id": user_id}, USER_DETAIL_PROJECTION)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    user['latest_verification'] = await db.student_id_verifications.find_one(
+        {"user_id": user_id}, VERIFICATION_LIST_PROJECTION, sort=[("created_at", -1)]
+    )
+    return user
 
 @api_router.delete("/admin/users/{user_id}")
 async def delete_user(user_id: str, admin: dict = Depends(get_admin_user)):
@@ -1252,25 +1605,66 @@ async def delete_user(user_id: str, admin: dict = Depends(get_admin_user)):
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Delete user
-    await db.users.delete_one({"id": user_id})
-    
-    # Delete related data
-    await db.loyalty_bills.delete_many({"user_id": user_id})
-    await db.orders.delete_many({"user_id": user_id})
-    await db.student_id_verifications.delete_many({"user_id": user_id})
+    # Delete user with bills, orders and verifications
+    job = await run_user_purge([user_id], admin)
     
     # Log action
-    await db.admin_logs.insert_one({
+    await audit_log.record({
         "id": str(uuid.uuid4()),
         "action": "user_deleted",
         "user_id": user_id,
         "performed_by": admin.get("user_id"),
         "timestamp": datetime.now(timezone.utc).isoformat(),
-        "details": {"user_name": user.get('name')}
+        "details": {"user_name": user.get('name'), "deleted": job['counts']}
+    })
+    
+    return {"message": "User deleted successfully", "deleted": job['counts']}
+
+async def run_user_purge(user_ids: List[str], admin: dict) -> dict:
+    """Create and run a purge job; a failure leaves a resumable job behind"""
+    job_id = await user_purger.create(user_ids, admin.get("user_id"))
+    try:
+        return await user_purger.resume(job_id)
+    except Exception:
+        raise HTTPException(
+            status_code=500,
+            detail=f"User deletion stopped part way. Resume purge job {job_id} to finish."
+        )
+
+@api_router.post("/admin/users/bulk-delete")
+async def bulk_delete_users(request: BulkDeleteUsers, admin: dict = Depends(get_admin_user)):
+    """Delete many users and all their data; returns per-collection counts"""
+    job = await run_user_purge(request.user_ids, admin)
+    
+    await audit_log.record({
+        "id": str(uuid.uuid4()),
+        "action": "users_bulk_deleted",
+        "user_id": None,
+        "performed_by": admin.get("user_id"),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "details": {"job_id": job['id'], "requested": len(request.user_ids), "deleted": job['counts']}
     })
     
-    return {"message": "User deleted successfully"}
+    return job
+
+@api_router.get("/admin/users/purge-jobs/{job_id}")
+async def get_user_purge_job(job_id: str, admin: dict = Depends(get_admin_user)):
+    """Progress and counts of a user purge job"""
+    job = await user_purger.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Purge job not found")
+    return job
+
+@api_router.post("/admin/users/purge-jobs/{job_id}/resume")
+async def resume_user_purge_job(job_id: str, admin: dict = Depends(get_admin_user)):
+    """Finish an interrupted user purge job"""
+    try:
+        job = await user_purger.resume(job_id)
+    except Exception:
+        raise HTTPException(status_code=500, detail=f"Purge job {job_id} failed again; see server logs")
+    if not job:
+        raise HTTPException(status_code=404, detail="Purge job not found")
+    return job
 
 @api_router.post("/admin/users/{user_id}/disable-loyalty")
 async def disable_user_loyalty(user_id: str, admin: dict = Depends(get_admin_user)):
@@ -1281,7 +1675,7 @@ async def disable_user_loyalty(user_id: str, admin: dict = Depends(get_admin_use
     )
     
     # Log action
-    await db.admin_logs.insert_one({
+    await audit_log.record({
         "id": str(uuid.uuid4()),
         "action": "loyalty_disabled",
         "user_id": user_id,
@@ -1294,10 +1688,13 @@ async def disable_user_loyalty(user_id: str, admin: dict = Depends(get_admin_use
 @api_router.post("/admin/loyalty/check-expiry")
 async def trigger_loyalty_expiry_check(admin: dict = Depends(get_admin_user)):
     """Manually trigger loyalty expiry check for all users"""
-    await check_all_users_loyalty_expiry()
+    try:
+        await scheduler.trigger("loyalty_expiry", triggered_by=admin.get("user_id"))
+    except JobAlreadyRunning:
+        raise HTTPException(status_code=409, detail="Loyalty expiry check is already running")
     
     # Log admin action
-    await db.admin_logs.insert_one({
+    await audit_log.record({
         "id": str(uuid.uuid4()),
         "action": "loyalty_expiry_manual_check",
         "user_id": None,
@@ -1311,100 +1708,268 @@ async def trigger_loyalty_expiry_check(admin: dict = Depends(get_admin_user)):
 @api_router.get("/admin/loyalty/expiry-logs")
 async def get_loyalty_expiry_logs(limit: int = 50, admin: dict = Depends(get_admin_user)):
     """Get logs of automatic loyalty expirations"""
+    await audit_log.flush()
     logs = await db.admin_logs.find(
         {"action": {"$in": ["loyalty_auto_expired", "loyalty_expiry_manual_check"]}},
         {"_id": 0}
     ).sort("timestamp", -1).limit(limit).to_list(limit)
     return logs
 
+@api_router.get("/admin/jobs")
+async def get_scheduled_jobs(admin: dict = Depends(get_admin_user)):
+    """List background jobs with schedule, pause state and last run"""
+    return await scheduler.list_jobs()
+
+@api_router.get("/admin/jobs/{job_name}/runs")
+async def get_job_runs(job_name: str, limit: int = 50, admin: dict = Depends(get_admin_user)):
+    """Get run history (with durations) for a background job"""
+    try:
+        return await scheduler.get_runs(job_name, limit)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+@api_router.post("/admin/jobs/{job_name}/trigger")
+async def trigger_job(job_name: str, admin: dict = Depends(get_admin_user)):
+    """Run a background job immediately"""
+    try:
+        run = await scheduler.trigger(job_name, triggered_by=admin.get("user_id"))
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Job not found")
+    except JobAlreadyRunning:
+        raise HTTPException(status_code=409, detail="Job is already running on another worker")
+    
+    await audit_log.record({
+        "id": str(uuid.uuid4()),
+        "action": "job_triggered",
+        "user_id": None,
+        "performed_by": admin.get("user_id"),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "details": {"job": job_name, "run_id": run["id"], "status": run["status"]}
+    })
+    
+    return run
+
+@api_router.post("/admin/jobs/{job_name}/pause")
+async def pause_job(job_name: str, paused: bool = True, admin: dict = Depends(get_admin_user)):
+    """Pause (or resume with paused=false) a background job on all workers"""
+    try:
+        await scheduler.set_paused(job_name, paused)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    await audit_log.record({
+        "id": str(uuid.uuid4()),
+        "action": "job_paused" if paused else "job_resumed",
+        "user_id": None,
+        "performed_by": admin.get("user_id"),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "details": {"job": job_name}
+    })
+    
+    return {"message": f"Job {job_name} {'paused' if paused else 'resumed'}"}
+
 @api_router.get("/admin/logs")
 async def get_admin_logs(limit: int = 100, admin: dict = Depends(get_admin_user)):
     """Get admin action logs"""
+    await audit_log.flush()
     logs = await db.admin_logs.find({}, {"_id": 0}).sort("timestamp", -1).limit(limit).to_list(limit)
     return logs
 
+@api_router.get("/admin/ocr/stats")
+async def get_ocr_stats(days: int = 30, admin: dict = Depends(get_admin_user)):
+    """Daily Vision OCR calls and calls avoided by the local quality / duplicate checks"""
+    since = (datetime.now(timezone.utc) - timedelta(days=max(1, min(days, 365)) - 1)).strftime("%Y-%m-%d")
+    daily = await db.ocr_stats.find({"date": {"$gte": since}}, {"_id": 0}).sort("date", -1).to_list(366)
+    
+    avoided = {}
+    for day in daily:
+        for reason, count in day.get("avoided", {}).items():
+            avoided[reason] = avoided.get(reason, 0) + count
+    calls = sum(day.get("calls", 0) for day in daily)
+    avoided_total = sum(avoided.values())
+    return {
+        "days": daily,
+        "calls": calls,
+        "avoided": avoided,
+        "avoided_total": avoided_total,
+        "avoided_share": round(avoided_total / (calls + avoided_total), 4) if calls + avoided_total else 0.0
+    }
+
 @api_router.get("/admin/verifications/pending")
 async def get_pending_verifications(admin: dict = Depends(get_admin_user)):
     """Get pending student ID verifications"""
-    verifications = await db.student_id_verifications.find({"status": "pending"}, {"_id": 0}).to_list(1000)
-    return verifications
+    verifications = await db.student_id_verifications.find(
+        {"status": "pending"}, VERIFICATION_LIST_PROJECTION
+    ).to_list(1000)
+    return OrjsonResponse(verifications)
 
-@api_router.post("/admin/verifications/approve/{verification_id}")
-async def approve_verification(verification_id: str, admin: dict = Depends(get_admin_user)):
-    """Approve student ID verification"""
-    verification = await db.student_id_verifications.find_one({"id": verification_id}, {"_id": 0})
+@api_router.get("/admin/verifications/{verification_id}")
+async def get_verification_detail(verification_id: str, admin: dict = Depends(get_admin_user)):
+    """Get a verification with its ID photo and OCR text"""
+    verification = await db.student_id_verifications.find_one({"id": verification_id}, VERIFICATION_DETAIL_PROJECTION)
     if not verification:
         raise HTTPException(status_code=404, detail="Verification not found")
-    
-    user = await db.users.find_one({"id": verification['user_id']}, {"_id": 0})
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    # Check loyalty eligibility based on DOB
-    is_eligible = is_loyalty_eligible(user['dob']) if user.get('dob') else False
-    
-    await db.student_id_verifications.update_one(
-        {"id": verification_id},
-        {"$set": {"status": "approved"}}
+    return verification
+
+def verification_thumbnail_url(verification_id: str, expires_at: str) -> str:
+    """Signed thumbnail path (usable as an <img> src) valid until the lease ends"""
+    token = jwt.encode({
+        "sub": verification_id,
+        "purpose": "verification_thumbnail",
+        "exp": int(datetime.fromisoformat(expires_at).timestamp())
+    }, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    return f"/api/admin/verifications/{verification_id}/thumbnail?token={token}"
+
+@api_router.post("/admin/verifications/claim")
+async def claim_verifications(count: int = 5, admin: dict = Depends(get_admin_user)):
+    """Lease the next pending verifications to this admin (lean metadata + thumbnail links)"""
+    items = await claim_batch(
+        db.student_id_verifications, admin.get("user_id"), max(1, count),
+        datetime.now(timezone.utc), VERIFICATION_LEASE_SECONDS
     )
+    for item in items:
+        item['thumbnail_url'] = verification_thumbnail_url(item['id'], item['claim_expires_at'])
+    return {"items": items, "lease_seconds": VERIFICATION_LEASE_SECONDS}
+
+@api_router.post("/admin/verifications/release")
+async def release_verifications(request: ReleaseVerifications, admin: dict = Depends(get_admin_user)):
+    """Return claimed verifications to the queue"""
+    released = await release_claims(db.student_id_verifications, admin.get("user_id"), request.verification_ids)
+    return {"released": released}
+
+@api_router.get("/admin/verifications/{verification_id}/thumbnail")
+async def get_verification_thumbnail(verification_id: str, token: str):
+    """Student ID thumbnail via a signed link from the claim response"""
+    try:
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    except jwt.PyJWTError:
+        raise HTTPException(status_code=401, detail="Invalid or expired thumbnail link")
+    if payload.get("purpose") != "verification_thumbnail" or payload.get("sub") != verification_id:
+        raise HTTPException(status_code=401, detail="Invalid or expired thumbnail link")
     
-    await db.users.update_one(
-        {"id": verification['user_id']},
-        {"$set": {
-            "verification_status": "approved",
-            "loyalty_active": is_eligible,
-            "rejection_reason": None
-        }}
+    import base64
+    verification = await db.student_id_verifications.find_one(
+        {"id": verification_id}, {"_id": 0, "thumbnail_data": 1}
     )
-    
-    # Log admin action
-    await db.admin_logs.insert_one({
-        "id": str(uuid.uuid4()),
-        "action": "verification_approved",
-        "user_id": verification['user_id'],
-        "performed_by": admin.get("user_id"),
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "details": {
-            "verification_id": verification_id,
-            "loyalty_eligible": is_eligible
-        }
-    })
-    
-    return {"message": "Verification approved", "loyalty_active": is_eligible}
-
-@api_router.post("/admin/verifications/reject/{verification_id}")
-async def reject_verification(verification_id: str, reason: str = "", admin: dict = Depends(get_admin_user)):
-    """Reject student ID verification"""
-    verification = await db.student_id_verifications.find_one({"id": verification_id}, {"_id": 0})
     if not verification:
         raise HTTPException(status_code=404, detail="Verification not found")
     
-    await db.student_id_verifications.update_one(
-        {"id": verification_id},
-        {"$set": {"status": "rejected", "rejection_reason": reason}}
+    thumbnail_data = verification.get('thumbnail_data')
+    if not thumbnail_data:
+        # Uploaded before thumbnails existed: build one from the full image and keep it
+        full = await db.student_id_verifications.find_one({"id": verification_id}, {"_id": 0, "image_data": 1})
+        if not full or not full.get('image_data'):
+            raise HTTPException(status_code=404, detail="No image for this verification")
+        try:
+            thumbnail = await asyncio.to_thread(thumbnail_from_base64, full['image_data'])
+        except Exception:
+            raise HTTPException(status_code=422, detail="Stored image could not be decoded")
+        thumbnail_data = base64.b64encode(thumbnail).decode('utf-8')
+        await db.student_id_verifications.update_one({"id": verification_id}, {"$set": {"thumbnail_data": thumbnail_data}})
+    
+    return Response(
+        content=base64.b64decode(thumbnail_data),
+        media_type="image/jpeg",
+        headers={"Cache-Control": "private, max-age=300"}
     )
-    
-    await db.users.update_one(
-        {"id": verification['user_id']},
-        {"$set": {
-            "verification_status": "rejected",
-            "rejection_reason": reason or "Student ID verification rejected by admin"
-        }}
+
+async def apply_verification_decisions(admin: dict, decisions: List[Decision]) -> dict:
+    """Apply approve / reject decisions with one bulk write per collection"""
+    admin_id = admin.get("user_id")
+    now = datetime.now(timezone.utc)
+    outcome = {"approved": [], "rejected": [], "conflicts": [], "not_found": [], "user_not_found": []}
+    
+    unique = {}
+    for decision in decisions:
+        unique.setdefault(decision.verification_id, decision)  # first decision per id wins
+    unique = list(unique.values())
+    ids = [d.verification_id for d in unique]
+    verifications = {
+        v['id']: v async for v in db.student_id_verifications.find(
+            {"id": {"$in": ids}}, {"_id": 0, "id": 1, "user_id": 1, "status": 1}
+        )
+    }
+    user_ids = list({v['user_id'] for v in verifications.values()})
+    users = {u['id']: u async for u in db.users.find({"id": {"$in": user_ids}}, {"_id": 0, "id": 1, "dob": 1})}
+    
+    candidates = []
+    for decision in unique:
+        verification = verifications.get(decision.verification_id)
+        if not verification:
+            outcome["not_found"].append(decision.verification_id)
+        elif verification['status'] != "pending":
+            outcome["conflicts"].append(decision.verification_id)
+        elif decision.action == "approve" and verification['user_id'] not in users:
+            outcome["user_not_found"].append(decision.verification_id)
+        else:
+            candidates.append(decision)
+    if not candidates:
+        return outcome
+    
+    # Updates only match items still pending and not leased to another admin
+    batch_id = str(uuid.uuid4())
+    await db.student_id_verifications.bulk_write(
+        verification_operations(candidates, admin_id, batch_id, now), ordered=False
     )
-    
-    # Log admin action
-    await db.admin_logs.insert_one({
-        "id": str(uuid.uuid4()),
-        "action": "verification_rejected",
-        "user_id": verification['user_id'],
-        "performed_by": admin.get("user_id"),
-        "timestamp": datetime.now(timezone.utc).isoformat(),
-        "details": {
-            "verification_id": verification_id,
-            "reason": reason
-        }
-    })
-    
+    won = {v['id'] async for v in db.student_id_verifications.find({"decision_batch": batch_id}, {"_id": 0, "id": 1})}
+    applied = [d for d in candidates if d.verification_id in won]
+    outcome["conflicts"].extend(d.verification_id for d in candidates if d.verification_id not in won)
+    if not applied:
+        return outcome
+    
+    ops, loyalty = user_operations(applied, verifications, users, is_loyalty_eligible)
+    await db.users.bulk_write(ops, ordered=False)
+    
+    logs = []
+    for decision in applied:
+        if decision.action == "approve":
+            outcome["approved"].append({"verification_id": decision.verification_id,
+                                        "loyalty_active": loyalty[decision.verification_id]})
+            action, details = "verification_approved", {"loyalty_eligible": loyalty[decision.verification_id]}
+        else:
+            outcome["rejected"].append(decision.verification_id)
+            action, details = "verification_rejected", {"reason": decision.reason}
+        logs.append({
+            "id": str(uuid.uuid4()),
+            "action": action,
+            "user_id": verifications[decision.verification_id]['user_id'],
+            "performed_by": admin_id,
+            "timestamp": now.isoformat(),
+            "details": {"verification_id": decision.verification_id, **details}
+        })
+    await audit_log.record_many(logs)
+    return outcome
+
+def raise_for_single_decision(outcome: dict):
+    if outcome["not_found"]:
+        raise HTTPException(status_code=404, detail="Verification not found")
+    if outcome["user_not_found"]:
+        raise HTTPException(status_code=404, detail="User not found")
+    if outcome["conflicts"]:
+        raise HTTPException(status_code=409, detail="Verification already decided or claimed by another admin")
+
+@api_router.post("/admin/verifications/decisions")
+async def decide_verifications(request: VerificationDecisions, admin: dict = Depends(get_admin_user)):
+    """Approve / reject a set of verifications in one call"""
+    for item in request.decisions:
+        if item.action not in ("approve", "reject"):
+            raise HTTPException(status_code=400, detail=f"Invalid action '{item.action}'. Must be approve or reject")
+    return await apply_verification_decisions(
+        admin, [Decision(item.verification_id, item.action, item.reason) for item in request.decisions]
+    )
+
+@api_router.post("/admin/verifications/approve/{verification_id}")
+async def approve_verification(verification_id: str, admin: dict = Depends(get_admin_user)):
+    """Approve student ID verification"""
+    outcome = await apply_verification_decisions(admin, [Decision(verification_id, "approve")])
+    raise_for_single_decision(outcome)
+    return {"message": "Verification approved", "loyalty_active": outcome["approved"][0]["loyalty_active"]}
+
+@api_router.post("/admin/verifications/reject/{verification_id}")
+async def reject_verification(verification_id: str, reason: str = "", admin: dict = Depends(get_admin_user)):
+    """Reject student ID verification"""
+    outcome = await apply_verification_decisions(admin, [Decision(verification_id, "reject", reason)])
+    raise_for_single_decision(outcome)
     return {"message": "Verification rejected"}
 
 @api_router.post("/admin/menu")
@@ -1420,25 +1985,30 @@ async def create_menu_item(item: CreateMenuItem, admin: dict = Depends(get_admin
     await db.menu_items.insert_one(item_data)
     # Remove MongoDB _id before returning
     item_data.pop("_id", None)
+    menu_search_service.upsert(item_data)
     return item_data
 
 @api_router.put("/admin/menu/{item_id}")
 async def update_menu_item(item_id: str, item: CreateMenuItem, admin: dict = Depends(get_admin_user)):
     """Update menu item"""
-    await db.menu_items.update_one(
+    updated = await db.menu_items.find_one_and_update(
         {"id": item_id},
-        {"$set": {**item.model_dump(), "is_manual_override": True}}  # Mark as manually edited
+        {"$set": {**item.model_dump(), "is_manual_override": True}},  # Mark as manually edited
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
     )
+    menu_search_service.upsert(updated)
     return {"message": "Menu item updated"}
 
 @api_router.delete("/admin/menu/{item_id}")
 async def delete_menu_item(item_id: str, admin: dict = Depends(get_admin_user)):
     """Delete menu item"""
     await db.menu_items.delete_one({"id": item_id})
+    menu_search_service.remove(item_id)
     return {"message": "Menu item deleted"}
 
 @api_router.post("/admin/menu/{item_id}/reset-override")
-async def reset_menu_item_override(item_id: str, admin: dict = Depends(get_admin_user)):
+async def reset_menu_item_override(item_id: str, background_tasks: BackgroundTasks, admin: dict = Depends(get_admin_user)):
     """Reset manual override and revert to PDF"""
     result = await db.menu_items.update_one(
         {"id": item_id},
@@ -1446,6 +2016,11 @@ async def reset_menu_item_override(item_id: str, admin: dict = Depends(get_admin
     )
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Menu item not found")
+    
+    # Re-apply the active PDF so the item picks up its PDF price / category
+    active_pdf = await db.menu_pdfs.find_one({"active": True}, {"_id": 0}, sort=[("uploaded_at", -1)])
+    if active_pdf:
+        background_tasks.add_task(run_menu_ingestion, active_pdf, True)
     return {"message": "Override reset. Item will now follow PDF if available."}
 
 @api_router.post("/admin/coupons")
@@ -1511,26 +2086,143 @@ async def get_settings():
             "shop_longitude": 77.2090,
             "shop_address": "Connaught Place, New Delhi, India",
             "payment_info": "Cash on Delivery only",
-            "weekly_off_day": 1
+            "weekly_off_day": 1,
+            "open_time": None,
+            "close_time": None,
+            "cooking_stations": 1
         }
     return settings
 
 @api_router.put("/admin/settings")
 async def update_settings(settings: Settings, admin: dict = Depends(get_admin_user)):
     """Update shop settings"""
+    if settings.open_time or settings.close_time:
+        validate_shop_hours(settings.open_time, settings.close_time)
+    if settings.cooking_stations < 1:
+        raise HTTPException(status_code=400, detail="cooking_stations must be at least 1")
     await db.settings.update_one(
         {},
         {"$set": settings.model_dump()},
         upsert=True
     )
+    await shop_calendar_service.refresh()
+    await kitchen_service.refresh()
     return {"message": "Settings updated"}
 
 @api_router.post("/admin/closed-days")
-async def add_closed_day(date: str, admin: dict = Depends(get_admin_user)):
-    """Add admin closed day"""
-    await db.closed_days.insert_one({"date": date})
+async def add_closed_day(date: str, reason: Optional[str] = None, admin: dict = Depends(get_admin_user)):
+    """Add admin closed day (YYYY-MM-DD)"""
+    validate_calendar_date(date)
+    await db.closed_days.update_one(
+        {"date": date},
+        {"$set": {
+            "date": date,
+            "reason": reason,
+            "created_by": admin.get("user_id"),
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }},
+        upsert=True
+    )
+    await shop_calendar_service.refresh()
     return {"message": "Closed day added"}
 
+@api_router.get("/admin/closed-days")
+async def get_closed_days(admin: dict = Depends(get_admin_user)):
+    """Get admin closed days"""
+    days = await db.closed_days.find({}, {"_id": 0}).sort("date", 1).to_list(1000)
+    return days
+
+@api_router.delete("/admin/closed-days/{date}")
+async def delete_closed_day(date: str, admin: dict = Depends(get_admin_user)):
+    """Remove an admin closed day"""
+    result = await db.closed_days.delete_many({"date": date})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Closed day not found")
+    await shop_calendar_service.refresh()
+    return {"message": "Closed day removed"}
+
+@api_router.get("/admin/special-hours")
+async def get_special_hours(admin: dict = Depends(get_admin_user)):
+    """Get special opening hours"""
+    hours = await db.special_hours.find({}, {"_id": 0}).sort("date", 1).to_list(1000)
+    return hours
+
+@api_router.put("/admin/special-hours")
+async def set_special_hours(hours: SpecialHours, admin: dict = Depends(get_admin_user)):
+    """Set special opening hours for one date"""
+    validate_calendar_date(hours.date)
+    validate_shop_hours(hours.open_time, hours.close_time)
+    await db.special_hours.update_one(
+        {"date": hours.date},
+        {"$set": hours.model_dump()},
+        upsert=True
+    )
+    await shop_calendar_service.refresh()
+    return {"message": "Special hours saved"}
+
+@api_router.delete("/admin/special-hours/{date}")
+async def delete_special_hours(date: str, admin: dict = Depends(get_admin_user)):
+    """Remove special opening hours for one date"""
+    result = await db.special_hours.delete_one({"date": date})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Special hours not found")
+    await shop_calendar_service.refresh()
+    return {"message": "Special hours removed"}
+
+@api_router.get("/admin/delivery-zones")
+async def get_delivery_zones(admin: dict = Depends(get_admin_user)):
+    """Get all delivery zones"""
+    zones = await db.delivery_zones.find({}, {"_id": 0}).sort("delivery_fee", 1).to_list(1000)
+    return zones
+
+async def save_delivery_zone(zone_id: str, zone: DeliveryZone, admin: dict, upsert: bool):
+    """Validate and write one zone, then rebuild the in-memory index"""
+    if zone.delivery_fee < 0:
+        raise HTTPException(status_code=400, detail="Delivery fee cannot be negative")
+    try:
+        polygon = normalize_polygon(zone.polygon)
+    except InvalidZoneGeometry as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    zone_data = {
+        **zone.model_dump(),
+        "id": zone_id,
+        "polygon": polygon,
+        "updated_by": admin.get("user_id"),
+        "updated_at": datetime.now(timezone.utc).isoformat()
+    }
+    try:
+        # The 2dsphere index rejects self-intersecting or otherwise invalid rings
+        result = await db.delivery_zones.update_one({"id": zone_id}, {"$set": zone_data}, upsert=upsert)
+    except OperationFailure as e:
+        logger.warning(f"Rejected delivery zone {zone_id}: {str(e)}")
+        raise HTTPException(status_code=400, detail="Invalid zone polygon (edges must not cross)")
+    if not upsert and result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Delivery zone not found")
+    await delivery_zone_service.refresh()
+    return zone_data
+
+@api_router.post("/admin/delivery-zones")
+async def create_delivery_zone(zone: DeliveryZone, admin: dict = Depends(get_admin_user)):
+    """Create a delivery zone"""
+    zone_data = await save_delivery_zone(str(uuid.uuid4()), zone, admin, upsert=True)
+    return {"message": "Delivery zone created", "zone": zone_data}
+
+@api_router.put("/admin/delivery-zones/{zone_id}")
+async def update_delivery_zone(zone_id: str, zone: DeliveryZone, admin: dict = Depends(get_admin_user)):
+    """Update a delivery zone"""
+    zone_data = await save_delivery_zone(zone_id, zone, admin, upsert=False)
+    return {"message": "Delivery zone updated", "zone": zone_data}
+
+@api_router.delete("/admin/delivery-zones/{zone_id}")
+async def delete_delivery_zone(zone_id: str, admin: dict = Depends(get_admin_user)):
+    """Delete a delivery zone"""
+    result = await db.delivery_zones.delete_one({"id": zone_id})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Delivery zone not found")
+    await delivery_zone_service.refresh()
+    return {"message": "Delivery zone deleted"}
+
 @api_router.put("/admin/points/reset/{user_id}")
 async def reset_user_points(user_id: str, admin: dict = Depends(get_admin_user)):
     """Reset user points"""
@@ -1559,16 +2251,16 @@ async def change_admin_password(request: AdminChangePassword, admin: dict = Depe
         raise HTTPException(status_code=404, detail="Admin user not found")
     
     # Verify current password
-    if not bcrypt.checkpw(request.current_password.encode('utf-8'), admin_doc['password'].encode('utf-8')):
+    if not await verify_admin_password(request.current_password, admin_doc['password']):
         raise HTTPException(status_code=401, detail="Current password is incorrect")
     
     # Hash new password
-    hashed_pw = bcrypt.hashpw(request.new_password.encode('utf-8'), bcrypt.gensalt())
+    hashed_pw = await hash_admin_password(request.new_password)
     
     # Update password
     await db.admin_users.update_one(
         {"id": admin_id},
-        {"$set": {"password": hashed_pw.decode('utf-8')}}
+        {"$set": {"password": hashed_pw}}
     )
     
     return {"message": "Password changed successfully"}
@@ -1583,7 +2275,7 @@ async def change_admin_username(request: AdminChangeUsername, admin: dict = Depe
         raise HTTPException(status_code=404, detail="Admin user not found")
     
     # Verify password for security
-    if not bcrypt.checkpw(request.password.encode('utf-8'), admin_doc['password'].encode('utf-8')):
+    if not await verify_admin_password(request.password, admin_doc['password']):
         raise HTTPException(status_code=401, detail="Password is incorrect")
     
     # Check if new username already exists
@@ -1620,7 +2312,7 @@ async def get_all_orders(admin: dict = Depends(get_admin_user)):
         order['user_name'] = user.get('name') if user else 'Unknown'
         order['user_phone'] = user.get('phone_number') if user else 'Unknown'
     
-    return orders
+    return OrjsonResponse(orders)
 
 @api_router.put("/admin/orders/{order_id}/status")
 async def update_order_status(order_id: str, status: str, admin: dict = Depends(get_admin_user)):
@@ -1633,13 +2325,14 @@ async def update_order_status(order_id: str, status: str, admin: dict = Depends(
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     
-    await db.orders.update_one(
-        {"id": order_id},
-        {"$set": {"status": status, "updated_at": datetime.now(timezone.utc).isoformat()}}
-    )
+    update_fields = {"status": status, "updated_at": datetime.now(timezone.utc).isoformat()}
+    if status == "preparing" and order.get('status') != "preparing":
+        update_fields["prep_started_at"] = update_fields["updated_at"]
+    await db.orders.update_one({"id": order_id}, {"$set": update_fields})
+    kitchen_service.order_status_changed(order_id, status, order.get('cook_minutes'))
     
     # Log admin action
-    await db.admin_logs.insert_one({
+    await audit_log.record({
         "id": str(uuid.uuid4()),
         "action": "order_status_updated",
         "user_id": order.get('user_id'),
@@ -1654,6 +2347,61 @@ async def update_order_status(order_id: str, status: str, admin: dict = Depends(
     
     return {"message": f"Order status updated to {status}"}
 
+@api_router.get("/admin/delivery-routes")
+async def get_delivery_routes(max_stops: int = 6, admin: dict = Depends(get_admin_user)):
+    """Plan delivery batches for confirmed / preparing orders, starting at the shop"""
+    if not 1 <= max_stops <= 50:
+        raise HTTPException(status_code=400, detail="max_stops must be between 1 and 50")
+    settings = await db.settings.find_one({}, {"_id": 0})
+    if not settings or 'shop_latitude' not in settings:
+        raise HTTPException(status_code=500, detail="Shop location not configured")
+    
+    orders = await db.orders.find(
+        {"status": {"$in": ["confirmed", "preparing"]}},
+        {"_id": 0, "id": 1, "latitude": 1, "longitude": 1, "delivery_address": 1}
+    ).sort("created_at", 1).to_list(5000)
+    plan = plan_routes((settings['shop_latitude'], settings['shop_longitude']), orders, max_stops)
+    plan["order_count"] = len(orders)
+    return plan
+
+@api_router.post("/admin/delivery-routes/dispatch")
+async def dispatch_delivery_route(route: DispatchRoute, admin: dict = Depends(get_admin_user)):
+    """Mark all orders of a planned batch as out for delivery in one update"""
+    if not route.order_ids:
+        raise HTTPException(status_code=400, detail="No orders to dispatch")
+    # Only orders in a dispatchable status leave the kitchen queue; pending, delivered or
+    # cancelled ids in the request are skipped by the update and must keep their ETA state
+    dispatchable = {"id": {"$in": route.order_ids}, "status": {"$in": ["confirmed", "preparing"]}}
+    matched = await db.orders.find(dispatchable, {"_id": 0, "id": 1}).to_list(len(route.order_ids))
+    dispatched_ids = [order['id'] for order in matched]
+    result = await db.orders.update_many(
+        {**dispatchable, "id": {"$in": dispatched_ids}},
+        {"$set": {"status": "out_for_delivery", "updated_at": datetime.now(timezone.utc).isoformat()}}
+    )
+    for order_id in dispatched_ids:
+        kitchen_service.order_status_changed(order_id, "out_for_delivery")
+    
+    # Log admin action
+    await audit_log.record({
+        "id": str(uuid.uuid4()),
+        "action": "delivery_route_dispatched",
+        "user_id": None,
+        "performed_by": admin.get("user_id"),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "details": {
+            "order_ids": route.order_ids,
+            "dispatched_count": result.modified_count
+        }
+    })
+    
+    return {"message": f"{result.modified_count} orders out for delivery", "dispatched_count": result.modified_count}
+
+@api_router.get("/admin/kitchen/queue")
+async def get_kitchen_queue(admin: dict = Depends(get_admin_user)):
+    """Orders in the kitchen with their estimated ready times"""
+    schedule = kitchen_service.schedule
+    return {"stations": schedule.stations, "orders": schedule.snapshot()}
+
 @api_router.get("/orders/{order_id}")
 async def get_order_details(order_id: str, current_user: dict = Depends(get_current_user)):
     """Get specific order with enriched details"""
@@ -1671,27 +2419,50 @@ async def get_order_details(order_id: str, current_user: dict = Depends(get_curr
         })
     order['items'] = enriched_items
     
+    # Live ETA while the order is still in the kitchen
+    eta = kitchen_service.eta_iso(order_id)
+    if eta:
+        order['estimated_ready_at'] = eta
+    
     return order
 
+async def run_menu_ingestion(pdf: dict, force: bool = False, confirm: bool = False) -> Optional[dict]:
+    """Sync menu_items from a menu PDF and refresh the search index"""
+    try:
+        report = await ingest_menu_pdf(db, pdf, force=force, confirm=confirm)
+    except Exception as e:
+        logger.error(f"Menu ingestion failed for PDF {pdf.get('id')}: {str(e)}")
+        return None
+    if report["status"] == "applied":
+        await menu_search_service.refresh()
+        logger.info(f"Menu PDF {pdf['id']} ingested: {len(report['added'])} added, "
+                    f"{len(report['updated'])} updated, {len(report['removed'])} removed")
+    elif report["status"] == "needs_confirmation":
+        logger.warning(f"Menu PDF {pdf['id']} would remove {len(report['removed'])} items; "
+                       f"not applied until confirmed")
+    elif report["status"] in ("failed", "empty"):
+        logger.warning(f"Menu PDF {pdf['id']} not applied ({report['status']}): {report.get('error')}")
+    return report
+
 @api_router.post("/admin/menu-pdf")
-async def upload_menu_pdf(file: UploadFile = File(...), keep_previous: bool = False, admin: dict = Depends(get_admin_user)):
-    """Upload PDF menu"""
+async def upload_menu_pdf(background_tasks: BackgroundTasks, file: UploadFile = File(...), keep_previous: bool = False,
+                          admin: dict = Depends(get_admin_user)):
+    """Upload PDF menu (streamed to disk in chunks)"""
     # Validate file type
-    if not file.filename.endswith('.pdf'):
+    if not file.filename or not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
     
-    # Create uploads directory if not exists
-    upload_dir = Path("/app/backend/uploads/menus")
-    upload_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Generate unique filename
+    # Generate unique filename (original name is kept in the record only)
     file_id = str(uuid.uuid4())
-    file_path = upload_dir / f"{file_id}_{file.filename}"
+    file_path = UPLOAD_ROOT / "menus" / f"{file_id}.pdf"
     
     # Save file
-    contents = await file.read()
-    with open(file_path, "wb") as f:
-        f.write(contents)
+    try:
+        stored = await save_upload(file, file_path, MENU_PDF_MAX_BYTES, magic=PDF_MAGIC)
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail=f"File too large. Maximum size is {MENU_PDF_MAX_BYTES // (1024 * 1024)} MB.")
+    except InvalidUploadContent:
+        raise HTTPException(status_code=400, detail="File is not a valid PDF")
     
     # Deactivate previous PDFs unless keep_previous is True
     if not keep_previous:
@@ -1706,41 +2477,119 @@ async def upload_menu_pdf(file: UploadFile = File(...), keep_previous: bool = Fa
         "filename": file.filename,
         "uploaded_at": datetime.now(timezone.utc).isoformat(),
         "file_path": str(file_path),
+        "size": stored.size,
+        "content_hash": stored.sha256,
         "active": True
     }
     
     await db.menu_pdfs.insert_one(pdf_doc)
+    pdf_doc.pop("_id", None)
+    invalidate_menu_pdf_cache()
+    
+    # Extract items into menu_items after responding
+    background_tasks.add_task(run_menu_ingestion, pdf_doc)
     
     return {"message": "Menu PDF uploaded successfully", "pdf": pdf_doc}
 
+@api_router.post("/admin/menu-pdf/{pdf_id}/ingest")
+async def ingest_menu_pdf_now(pdf_id: str, force: bool = False, confirm: bool = False,
+                              admin: dict = Depends(get_admin_user)):
+    """Parse a menu PDF into menu_items now and return the change report (confirm=true applies large removals)"""
+    pdf = await db.menu_pdfs.find_one({"id": pdf_id}, {"_id": 0})
+    if not pdf:
+        raise HTTPException(status_code=404, detail="PDF not found")
+    report = await run_menu_ingestion(pdf, force, confirm)
+    if report is None:
+        raise HTTPException(status_code=500, detail="Menu ingestion failed")
+    return report
+
+@api_router.get("/admin/menu-ingestions")
+async def get_menu_ingestions(pdf_id: Optional[str] = None, admin: dict = Depends(get_admin_user)):
+    """Recent menu PDF ingestion reports"""
+    query = {"pdf_id": pdf_id} if pdf_id else {}
+    reports = await db.menu_ingestions.find(query, {"_id": 0}).sort("started_at", -1).to_list(50)
+    return reports
+
 @api_router.get("/admin/menu-pdfs")
 async def get_menu_pdfs(admin: dict = Depends(get_admin_user)):
     """Get all uploaded menu PDFs"""
     pdfs = await db.menu_pdfs.find({}, {"_id": 0}).sort("uploaded_at", -1).to_list(100)
     return pdfs
 
+# Menu PDF records served from memory; invalidated on upload / delete here and
+# re-read after MENU_PDF_CACHE_SECONDS so changes made by other workers show up
+MENU_PDF_CACHE_SECONDS = 30
+active_menu_pdf_cache = {"record": None, "expires_at": 0.0}
+menu_pdf_files: Dict[str, dict] = {}  # pdf_id -> path, size, etag, last_modified, filename, expires_at
+
+def invalidate_menu_pdf_cache(pdf_id: Optional[str] = None):
+    active_menu_pdf_cache["expires_at"] = 0.0
+    if pdf_id:
+        menu_pdf_files.pop(pdf_id, None)
+
 @api_router.get("/menu-pdf/active")
 async def get_active_menu_pdf():
     """Get currently active menu PDF (public endpoint)"""
-    pdf = await db.menu_pdfs.find_one({"active": True}, {"_id": 0})
+    if active_menu_pdf_cache["expires_at"] <= time.monotonic():
+        cache_lookups_total.inc("active_menu_pdf", "miss")
+        pdf = await db.menu_pdfs.find_one({"active": True}, {"_id": 0}, sort=[("uploaded_at", -1)])
+        active_menu_pdf_cache["record"] = pdf
+        active_menu_pdf_cache["expires_at"] = time.monotonic() + MENU_PDF_CACHE_SECONDS
+    else:
+        cache_lookups_total.inc("active_menu_pdf", "hit")
+    pdf = active_menu_pdf_cache["record"]
     if not pdf:
         return {"message": "No active menu PDF"}
     return pdf
 
-@api_router.get("/menu-pdf/download/{pdf_id}")
-async def download_menu_pdf(pdf_id: str):
-    """Download menu PDF file"""
-    from fastapi.responses import FileResponse
+async def get_menu_pdf_file(pdf_id: str) -> dict:
+    """Validators and size for a stored menu PDF, cached per id"""
+    entry = menu_pdf_files.get(pdf_id)
+    if entry and entry["expires_at"] > time.monotonic():
+        cache_lookups_total.inc("menu_pdf_file", "hit")
+        return entry
+    cache_lookups_total.inc("menu_pdf_file", "miss")
     
     pdf = await db.menu_pdfs.find_one({"id": pdf_id}, {"_id": 0})
     if not pdf:
         raise HTTPException(status_code=404, detail="PDF not found")
     
     file_path = Path(pdf['file_path'])
-    if not file_path.exists():
+    try:
+        size, modified = await asyncio.to_thread(file_stat, file_path)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="PDF file not found on server")
     
-    return FileResponse(file_path, media_type="application/pdf", filename=pdf['filename'])
+    content_hash = pdf.get('content_hash')
+    if not content_hash:
+        # Uploaded before hashes were recorded: hash once and store it
+        content_hash = await asyncio.to_thread(sha256_file, file_path)
+        await db.menu_pdfs.update_one({"id": pdf_id}, {"$set": {"content_hash": content_hash, "size": size}})
+    
+    uploaded_at = datetime.fromisoformat(pdf['uploaded_at']) if pdf.get('uploaded_at') else modified
+    entry = {
+        "path": file_path,
+        "size": size,
+        "etag": f'"{content_hash}"',
+        "last_modified": uploaded_at if uploaded_at.tzinfo else uploaded_at.replace(tzinfo=timezone.utc),
+        "filename": pdf['filename'],
+        "expires_at": time.monotonic() + MENU_PDF_CACHE_SECONDS
+    }
+    if len(menu_pdf_files) >= 100:
+        menu_pdf_files.clear()
+    menu_pdf_files[pdf_id] = entry
+    return entry
+
+@api_router.get("/menu-pdf/download/{pdf_id}")
+async def download_menu_pdf(pdf_id: str, request: Request):
+    """Download menu PDF file (ETag / Last-Modified validators, byte ranges)"""
+    entry = await get_menu_pdf_file(pdf_id)
+    return file_response(
+        entry["path"], entry["size"], entry["etag"], entry["last_modified"], request.headers,
+        media_type="application/pdf", filename=entry["filename"],
+        # A PDF id never changes content, so browsers may reuse it for a day
+        cache_control="public, max-age=86400"
+    )
 
 @api_router.delete("/admin/menu-pdf/{pdf_id}")
 async def delete_menu_pdf(pdf_id: str, admin: dict = Depends(get_admin_user)):
@@ -1750,12 +2599,11 @@ async def delete_menu_pdf(pdf_id: str, admin: dict = Depends(get_admin_user)):
         raise HTTPException(status_code=404, detail="PDF not found")
     
     # Delete file from disk
-    file_path = Path(pdf['file_path'])
-    if file_path.exists():
-        file_path.unlink()
+    await asyncio.to_thread(Path(pdf['file_path']).unlink, missing_ok=True)
     
     # Delete from database
     await db.menu_pdfs.delete_one({"id": pdf_id})
+    invalidate_menu_pdf_cache(pdf_id)
     
     return {"message": "Menu PDF deleted"}
 
@@ -1765,9 +2613,58 @@ async def delete_menu_pdf(pdf_id: str, admin: dict = Depends(get_admin_user)):
 async def root():
     return {"message": "Food Ordering API"}
 
+# ==================== METRICS ====================
+
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(authorization: Optional[str] = Header(None)):
+    """Prometheus text exposition for this worker (bearer METRICS_TOKEN when set)"""
+    if METRICS_TOKEN and authorization != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Include router
 app.include_router(api_router)
 
+# Rate limits for endpoints that cost SMS, OCR quota or bcrypt CPU
+RATE_LIMIT_RULES = {
+    ("POST", "/api/auth/send-otp"): [RateLimit(5, 600, "ip"), RateLimit(200, 3600, "route")],
+    ("POST", "/api/auth/verify-otp"): [RateLimit(10, 600, "ip")],
+    ("POST", "/api/auth/firebase"): [RateLimit(20, 60, "ip")],
+    # Burst sized for the live API test suite, which logs in once per test
+    ("POST", "/api/admin/login"): [RateLimit(60, 300, "ip")],
+    ("POST", "/api/loyalty/upload-bill"): [RateLimit(5, 3600, "user"), RateLimit(20, 3600, "ip")],
+    ("POST", "/api/auth/upload-student-id"): [RateLimit(5, 3600, "user"), RateLimit(20, 3600, "ip")],
+}
+rate_limit_store = MongoBucketStore(db) if os.environ.get('RATE_LIMIT_BACKEND') == 'mongo' else MemoryBucketStore()
+
+app.add_middleware(
+    RateLimitMiddleware,
+    rules=RATE_LIMIT_RULES,
+    store=rate_limit_store,
+    jwt_secret=JWT_SECRET,
+    jwt_algorithm=JWT_ALGORITHM,
+    trust_forwarded_for=os.environ.get('RATE_LIMIT_TRUST_PROXY', 'false').lower() == 'true',
+    enabled=os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+)
+
+# Oversized uploads are refused while the body is still arriving
+app.add_middleware(
+    MaxBodySizeMiddleware,
+    limits={("POST", "/api/admin/menu-pdf"): MENU_PDF_MAX_BYTES + 64 * 1024}  # + multipart framing
+)
+
+# Compress JSON bodies over COMPRESSION_MIN_BYTES (brotli when installed, else gzip)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+)
+
+# Per-route latency and status; wraps everything but CORS so 413 / 429 are counted too
+app.add_middleware(MetricsMiddleware, histogram=http_request_seconds)
+
+# Added last so CORS headers are also set on 413 / 429 responses
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -1784,6 +2681,14 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await scheduler.stop()
+    await shop_calendar_service.stop()
+    await delivery_zone_service.stop()
+    await kitchen_service.stop()
+    await menu_search_service.stop()
+    await firebase_verifier.stop()
+    password_hasher.shutdown()
+    await audit_log.stop()
     client_db.close()
 
 # ==================== BACKGROUND TASKS ====================
@@ -1791,7 +2696,7 @@ async def shutdown_db_client():
 async def check_all_users_loyalty_expiry():
     """
     Background task to check all student users and disable loyalty for those who turned 24.
-    This runs once daily at startup and then every 24 hours.
+    Scheduled daily by the job scheduler (see LOYALTY_EXPIRY_CRON).
     """
     try:
         # Find all students with active loyalty
@@ -1810,7 +2715,7 @@ async def check_all_users_loyalty_expiry():
                 )
                 
                 # Log the automatic expiry
-                await db.admin_logs.insert_one({
+                await audit_log.record({
                     "id": str(uuid.uuid4()),
                     "action": "loyalty_auto_expired",
                     "user_id": student['id'],
@@ -1831,23 +2736,70 @@ async def check_all_users_loyalty_expiry():
             logger.info(f"Loyalty expiry check complete: {expired_count} users expired")
         else:
             logger.info("Loyalty expiry check complete: No users expired")
+        
+        return {"checked": len(students), "expired": expired_count}
             
     except Exception as e:
         logger.error(f"Error in loyalty expiry check: {str(e)}")
+        raise
 
-async def loyalty_expiry_scheduler():
+async def reset_stale_points():
     """
-    Scheduler that runs the loyalty expiry check daily.
-    First run happens immediately on startup, then every 24 hours.
+    Nightly batch reset of points for users who missed 3 open days.
+    The shop calendar turns the rule into one last_visit cutoff, so all users are reset in a single update.
     """
-    while True:
-        await check_all_users_loyalty_expiry()
-        # Wait 24 hours before next check
-        await asyncio.sleep(24 * 60 * 60)
+    calendar = await load_shop_calendar(db)
+    cutoff = calendar.points_reset_cutoff(datetime.now(timezone.utc))
+    result = await db.users.update_many(
+        {"points": {"$gt": 0}, "last_visit": {"$lt": cutoff.isoformat()}},
+        {"$set": {"points": 0}}
+    )
+    
+    if result.modified_count:
+        await audit_log.record({
+            "id": str(uuid.uuid4()),
+            "action": "points_auto_reset",
+            "user_id": None,
+            "performed_by": "system",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "details": {"users_reset": result.modified_count, "last_visit_before": cutoff.isoformat()}
+        })
+    logger.info(f"Stale points reset complete: {result.modified_count} users reset")
+    return {"users_reset": result.modified_count, "last_visit_before": cutoff.isoformat()}
+
+scheduler.register(
+    "points_reset",
+    reset_stale_points,
+    cron=os.environ.get('POINTS_RESET_CRON', '15 0 * * *'),
+    description="Reset points of users who missed 3 open days"
+)
+
+scheduler.register(
+    "loyalty_expiry",
+    check_all_users_loyalty_expiry,
+    cron=os.environ.get('LOYALTY_EXPIRY_CRON', '5 0 * * *'),
+    description="Disable student loyalty for users who turned 24"
+)
 
 @app.on_event("startup")
 async def startup_event():
     """Start background tasks on application startup"""
-    # Start the loyalty expiry scheduler as a background task
-    asyncio.create_task(loyalty_expiry_scheduler())
-    logger.info("Background scheduler started: Loyalty expiry check will run daily")
\ No newline at end of file
+    if isinstance(rate_limit_store, MongoBucketStore):
+        await rate_limit_store.ensure_indexes()
+    await db.orders.create_index("created_at")
+    await db.student_id_verifications.create_index([("status", 1), ("created_at", 1)])
+    await db.student_id_verifications.create_index("id")
+    await db.loyalty_bills.create_index([("user_id", 1), ("date", -1)])
+    await db.menu_ingestions.create_index([("status", 1), ("finished_at", -1)])
+    await db.ocr_stats.create_index("date", unique=True)
+    await db.user_purge_jobs.create_index("id", unique=True)
+    for collection in ("loyalty_bills", "orders", "student_id_verifications"):
+        await db[collection].create_index("user_id")
+    await shop_calendar_service.start()
+    await delivery_zone_service.start()
+    await kitchen_service.start()
+    await menu_search_service.start()
+    await firebase_verifier.start()
+    await audit_log.start()
+    await scheduler.start()
+    logger.info("Background scheduler started: Loyalty expiry check will run daily")
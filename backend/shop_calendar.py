@@ -0,0 +1,278 @@
+"""
+Shop calendar: which days and hours the shop is open.
+
+A day is open unless it is the weekly off day (Settings.weekly_off_day) or an
+admin-closed date from the `closed_days` collection. Open days use the regular
+hours from settings unless `special_hours` has an entry for that date.
+
+Counting open days in a range is O(1) for the weekly part plus O(log n)
+bisects over the sorted closed-day index, so no day-by-day walk is needed.
+`ShopCalendarService` keeps the calendar and a precomputed index of upcoming
+open intervals in memory, so open/closed checks never touch the database.
+"""
+import asyncio
+import logging
+import os
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+logger = logging.getLogger(__name__)
+
+SHOP_TIMEZONE = os.environ.get('SHOP_TIMEZONE', 'UTC')
+
+# Points are reset after this many missed open days
+POINTS_RESET_MISSED_DAYS = 3
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+Hours = Tuple[time, time]
+
+
+def parse_hhmm(value: str) -> time:
+    """Parse an "HH:MM" string, raising ValueError on bad input"""
+    return datetime.strptime(value, "%H:%M").time()
+
+
+class ShopCalendar:
+    def __init__(self, weekly_off_day: Optional[int] = 1, closed_dates: Iterable[date] = (),
+                 tz: str = SHOP_TIMEZONE, hours: Optional[Hours] = None,
+                 special_hours: Optional[Dict[date, Hours]] = None,
+                 closed_reasons: Optional[Dict[date, str]] = None):
+        self.weekly_off_day = weekly_off_day
+        self.tz = ZoneInfo(tz)
+        # None means open all day
+        self.hours = hours
+        self.special_hours = special_hours or {}
+        self.closed_reasons = closed_reasons or {}
+        # Closed dates that fall on the weekly off day are already excluded by
+        # the weekly arithmetic, so keep them out of the index to avoid
+        # subtracting them twice.
+        self._closed = sorted({
+            d.toordinal() for d in closed_dates
+            if weekly_off_day is None or d.weekday() != weekly_off_day
+        })
+
+    @property
+    def closed_dates(self) -> list:
+        return [date.fromordinal(o) for o in self._closed]
+
+    def local_date(self, instant: datetime) -> date:
+        if instant.tzinfo is None:
+            instant = instant.replace(tzinfo=timezone.utc)
+        return instant.astimezone(self.tz).date()
+
+    def is_weekly_off(self, day: date) -> bool:
+        return self.weekly_off_day is not None and day.weekday() == self.weekly_off_day
+
+    def is_open_day(self, day: date) -> bool:
+        if self.is_weekly_off(day):
+            return False
+        o = day.toordinal()
+        i = bisect_left(self._closed, o)
+        return not (i < len(self._closed) and self._closed[i] == o)
+
+    def closure_reason(self, day: date) -> Optional[str]:
+        """Why the shop is closed on `day`, or None if it is an open day"""
+        if self.is_weekly_off(day):
+            return f"Weekly Off - {DAY_NAMES[day.weekday()]}"
+        if not self.is_open_day(day):
+            return self.closed_reasons.get(day) or "Holiday"
+        return None
+
+    def hours_for(self, day: date) -> Optional[Hours]:
+        """Opening hours for `day`; special hours only apply to open days"""
+        if not self.is_open_day(day):
+            return None
+        return self.special_hours.get(day) or self.hours or (time.min, time.min)
+
+    def open_intervals(self, start: date, n_days: int) -> List[Tuple[datetime, datetime]]:
+        """Merged UTC open intervals for days [start, start + n_days)"""
+        intervals: List[Tuple[datetime, datetime]] = []
+        for offset in range(n_days):
+            day = start + timedelta(days=offset)
+            hours = self.hours_for(day)
+            if hours is None:
+                continue
+            opens, closes = hours
+            begin = datetime.combine(day, opens, tzinfo=self.tz)
+            # Closing at or before opening means the shop closes after midnight
+            end_day = day if closes > opens else day + timedelta(days=1)
+            end = datetime.combine(end_day, closes, tzinfo=self.tz)
+            begin, end = begin.astimezone(timezone.utc), end.astimezone(timezone.utc)
+            if intervals and begin <= intervals[-1][1]:
+                intervals[-1] = (intervals[-1][0], max(end, intervals[-1][1]))
+            else:
+                intervals.append((begin, end))
+        return intervals
+
+    def _weekly_off_count(self, start: date, n_days: int) -> int:
+        if self.weekly_off_day is None:
+            return 0
+        full_weeks, remainder = divmod(n_days, 7)
+        # The remainder days start on the same weekday as `start`
+        return full_weeks + (1 if (self.weekly_off_day - start.weekday()) % 7 < remainder else 0)
+
+    def count_open_days(self, start: date, end: date) -> int:
+        """Number of open days in the inclusive range [start, end]"""
+        n_days = end.toordinal() - start.toordinal() + 1
+        if n_days <= 0:
+            return 0
+        closed = bisect_right(self._closed, end.toordinal()) - bisect_left(self._closed, start.toordinal())
+        return n_days - self._weekly_off_count(start, n_days) - closed
+
+    def missed_open_days(self, last_visit: datetime, now: datetime) -> int:
+        """Open days strictly between the visit date and today (today is not missed yet)"""
+        return self.count_open_days(
+            self.local_date(last_visit) + timedelta(days=1),
+            self.local_date(now) - timedelta(days=1)
+        )
+
+    def points_reset_cutoff(self, now: datetime, missed_days: int = POINTS_RESET_MISSED_DAYS) -> datetime:
+        """Earliest instant a visit must be at or after to keep points.
+
+        Any `last_visit` before the returned instant has missed at least
+        `missed_days` open days. This turns the reset check for every user into
+        a single range comparison, so a batch job can do it in one query.
+        """
+        today = self.local_date(now)
+        # Latest visit date D with count_open_days(D + 1, today - 1) >= missed_days.
+        # The count only grows as D moves back, so binary search over it; the
+        # upper bound covers a year of closures on top of the weekly off days.
+        lo = 1
+        hi = missed_days * 7 // 6 + 2 + len(self._closed) + 366
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.count_open_days(today - timedelta(days=mid - 1), today - timedelta(days=1)) >= missed_days:
+                hi = mid
+            else:
+                lo = mid + 1
+        if self.count_open_days(today - timedelta(days=lo - 1), today - timedelta(days=1)) < missed_days:
+            # Not enough open days in the search window: nobody is stale
+            return datetime.min.replace(tzinfo=timezone.utc)
+        latest_stale_date = today - timedelta(days=lo)
+        next_day = datetime.combine(latest_stale_date + timedelta(days=1), time.min, tzinfo=self.tz)
+        return next_day.astimezone(timezone.utc)
+
+    def should_reset_points(self, last_visit: datetime, now: datetime,
+                            missed_days: int = POINTS_RESET_MISSED_DAYS) -> bool:
+        return self.missed_open_days(last_visit, now) >= missed_days
+
+
+class ShopStatusIndex:
+    """Sorted open intervals over a fixed horizon, queried with bisect"""
+
+    def __init__(self, calendar: ShopCalendar, now: datetime, horizon_days: int = 14):
+        self.calendar = calendar
+        # Start a day early so an overnight interval from yesterday is included
+        first_day = calendar.local_date(now) - timedelta(days=1)
+        intervals = calendar.open_intervals(first_day, horizon_days + 1)
+        self.starts = [start for start, _ in intervals]
+        self.ends = [end for _, end in intervals]
+        self.valid_until = datetime.combine(first_day + timedelta(days=horizon_days), time.min,
+                                            tzinfo=calendar.tz).astimezone(timezone.utc)
+
+    def status(self, now: datetime) -> dict:
+        i = bisect_right(self.starts, now) - 1
+        if i >= 0 and now < self.ends[i]:
+            return {
+                "is_open": True,
+                "message": "Open Now",
+                "closes_at": self.ends[i].isoformat(),
+                "next_open_at": None
+            }
+
+        next_open = self.starts[i + 1] if i + 1 < len(self.starts) else None
+        reason = self.calendar.closure_reason(self.calendar.local_date(now))
+        message = f"Closed ({reason})" if reason else "Closed Now"
+        return {
+            "is_open": False,
+            "message": message,
+            "closes_at": None,
+            "next_open_at": next_open.isoformat() if next_open else None
+        }
+
+
+class ShopCalendarService:
+    """In-memory shop calendar and open/closed status, refreshed from MongoDB.
+
+    Admin routes call `refresh()` after changing settings, closed days or
+    special hours; a background loop also refreshes periodically so changes
+    made through other workers are picked up.
+    """
+
+    def __init__(self, db, refresh_seconds: int = 60, horizon_days: int = 14):
+        self.db = db
+        self.refresh_seconds = refresh_seconds
+        self.horizon_days = horizon_days
+        self.calendar = ShopCalendar()
+        self._index = ShopStatusIndex(self.calendar, datetime.now(timezone.utc), horizon_days)
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self):
+        self.calendar = await load_shop_calendar(self.db)
+        self._index = ShopStatusIndex(self.calendar, datetime.now(timezone.utc), self.horizon_days)
+
+    def status(self, now: Optional[datetime] = None) -> dict:
+        now = now or datetime.now(timezone.utc)
+        if now >= self._index.valid_until:
+            # Roll the horizon forward from the in-memory calendar
+            self._index = ShopStatusIndex(self.calendar, now, self.horizon_days)
+        return self._index.status(now)
+
+    def is_open(self, now: Optional[datetime] = None) -> bool:
+        return self.status(now)["is_open"]
+
+    async def start(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"Shop calendar load failed, using defaults: {str(e)}")
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Shop calendar refresh failed: {str(e)}")
+
+
+async def load_shop_calendar(db) -> ShopCalendar:
+    """Build a calendar from settings, closed_days and special_hours"""
+    settings = await db.settings.find_one(
+        {}, {"_id": 0, "weekly_off_day": 1, "open_time": 1, "close_time": 1}
+    ) or {}
+
+    closed_dates = []
+    closed_reasons = {}
+    async for doc in db.closed_days.find({}, {"_id": 0, "date": 1, "reason": 1}):
+        try:
+            day = date.fromisoformat(doc["date"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        closed_dates.append(day)
+        if doc.get("reason"):
+            closed_reasons[day] = doc["reason"]
+
+    special_hours = {}
+    async for doc in db.special_hours.find({}, {"_id": 0}):
+        try:
+            special_hours[date.fromisoformat(doc["date"])] = (parse_hhmm(doc["open_time"]), parse_hhmm(doc["close_time"]))
+        except (KeyError, TypeError, ValueError):
+            continue
+
+    hours = None
+    if settings.get("open_time") and settings.get("close_time"):
+        hours = (parse_hhmm(settings["open_time"]), parse_hhmm(settings["close_time"]))
+
+    return ShopCalendar(settings.get("weekly_off_day", 1), closed_dates, hours=hours,
+                        special_hours=special_hours, closed_reasons=closed_reasons)
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Make backend modules (e.g. scheduler) importable from unit tests
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,175 @@
+"""
+Audit Log Writer Tests
+Tests: Size- and time-triggered batching, flush before reads, flush on stop, backpressure, retries without duplicates, sync mode
+"""
+import asyncio
+
+from pymongo.errors import BulkWriteError
+
+from audit import AuditLog
+
+
+class FakeLogs:
+    """insert_many that records batches, can stall, and can fail part of a batch"""
+
+    def __init__(self):
+        self.docs = []
+        self.batches = []
+        self.gate = None
+        self.failures = []  # per call: None, "all", or indexes to fail
+
+    async def insert_many(self, docs, ordered=True):
+        if self.gate:
+            await self.gate.wait()
+        failure = self.failures.pop(0) if self.failures else None
+        if failure == "all":
+            raise ConnectionError("connection reset")
+        errors = []
+        for i, doc in enumerate(docs):
+            doc.setdefault("_id", id(doc))
+            if failure and i in failure:
+                errors.append({"index": i, "code": 91})
+            elif any(d["_id"] == doc["_id"] for d in self.docs):
+                errors.append({"index": i, "code": 11000})
+            else:
+                self.docs.append(doc)
+        self.batches.append(len(docs))
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+
+def entries(n, start=0):
+    return [{"id": f"log-{i}", "action": "test"} for i in range(start, start + n)]
+
+
+class TestAuditLog:
+    """AuditLog"""
+
+    def test_size_triggered_batches(self):
+        """A full batch is written at once without waiting for the flush interval"""
+        logs = FakeLogs()
+
+        async def run():
+            audit = AuditLog(logs, batch_size=10, flush_seconds=60, synchronous=False)
+            await audit.start()
+            await audit.record_many(entries(25))
+            await asyncio.sleep(0.05)
+            written = list(logs.batches)
+            await audit.stop()
+            return written
+
+        assert asyncio.run(run()) == [10, 10]
+        assert logs.batches == [10, 10, 5]
+        assert [d["id"] for d in logs.docs] == [f"log-{i}" for i in range(25)]
+
+    def test_time_triggered_flush(self):
+        """A partial batch is written after flush_seconds and record returns before the write"""
+        logs = FakeLogs()
+
+        async def run():
+            audit = AuditLog(logs, batch_size=100, flush_seconds=0.05, synchronous=False)
+            await audit.start()
+            for entry in entries(3):
+                await audit.record(entry)
+            assert logs.docs == []
+            await asyncio.sleep(0.15)
+            await audit.stop()
+
+        asyncio.run(run())
+        assert logs.batches == [3]
+
+    def test_flush_writes_in_flight_entry(self):
+        """record -> flush -> read sees the entry the writer was holding for the flush interval"""
+        logs = FakeLogs()
+
+        async def run():
+            audit = AuditLog(logs, batch_size=100, flush_seconds=60, synchronous=False)
+            await audit.start()
+            await audit.record(entries(1)[0])
+            await asyncio.sleep(0.01)  # the writer takes it and waits for more
+            assert audit.stats()["in_flight"] == 1
+            await audit.record_many(entries(2, start=1))
+            await asyncio.wait_for(audit.flush(), 1)
+            seen = sorted(d["id"] for d in logs.docs)
+            stats = audit.stats()
+            await audit.stop()
+            return seen, stats
+
+        seen, stats = asyncio.run(run())
+        assert seen == ["log-0", "log-1", "log-2"]
+        assert stats["in_flight"] == 0 and stats["queued"] == 0 and stats["written"] == 3
+
+    def test_stop_writes_in_flight_and_queued(self):
+        """Entries queued or mid-write when the worker stops are still written"""
+        logs = FakeLogs()
+
+        async def run():
+            audit = AuditLog(logs, batch_size=2, flush_seconds=60, synchronous=False)
+            logs.gate = asyncio.Event()
+            await audit.start()
+            await audit.record_many(entries(5))
+            await asyncio.sleep(0.01)
+            assert audit.stats()["in_flight"] == 2
+            logs.gate.set()
+            logs.gate = None
+            await audit.stop()
+            return audit.stats()
+
+        stats = asyncio.run(run())
+        assert sorted(d["id"] for d in logs.docs) == [f"log-{i}" for i in range(5)]
+        assert stats["written"] == 5 and stats["lost"] == 0 and stats["queued"] == 0
+
+    def test_backpressure_when_queue_full(self):
+        """record waits for room instead of growing the queue past max_queue"""
+        logs = FakeLogs()
+
+        async def run():
+            audit = AuditLog(logs, batch_size=2, flush_seconds=60, max_queue=2, synchronous=False)
+            logs.gate = asyncio.Event()
+            await audit.start()
+            await audit.record_many(entries(2))
+            await asyncio.sleep(0.01)  # the writer takes them and stalls
+            await audit.record_many(entries(2, start=2))
+            blocked = asyncio.create_task(audit.record(entries(1, start=4)[0]))
+            await asyncio.sleep(0.05)
+            assert not blocked.done()
+            assert audit.stats()["queued"] == 2
+            logs.gate.set()
+            await blocked
+            await audit.stop()
+            return audit.stats()
+
+        stats = asyncio.run(run())
+        assert stats["backpressure_waits"] == 1
+        assert len(logs.docs) == 5
+
+    def test_retry_skips_entries_already_written(self):
+        """A partly failed batch is retried for the failed entries only, without duplicates"""
+        logs = FakeLogs()
+        logs.failures = [[1], "all"]
+
+        async def run():
+            audit = AuditLog(logs, batch_size=3, flush_seconds=60, retry_seconds=0.01, synchronous=False)
+            await audit.start()
+            await audit.record_many(entries(3))
+            await asyncio.sleep(0.1)
+            await audit.stop()
+            return audit.stats()
+
+        stats = asyncio.run(run())
+        assert sorted(d["id"] for d in logs.docs) == ["log-0", "log-1", "log-2"]
+        assert stats["written"] == 3 and stats["lost"] == 0
+
+    def test_synchronous_mode_writes_before_returning(self):
+        """In sync mode (and when not started) each record is written immediately"""
+        logs = FakeLogs()
+
+        async def run():
+            audit = AuditLog(logs, synchronous=True)
+            await audit.start()
+            await audit.record(entries(1)[0])
+            assert len(logs.docs) == 1
+            await AuditLog(logs, synchronous=False).record(entries(1, start=1)[0])
+            assert len(logs.docs) == 2
+
+        asyncio.run(run())
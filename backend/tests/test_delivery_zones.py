@@ -0,0 +1,102 @@
+"""
+Delivery Zone Tests
+Tests: GeoJSON validation, point-in-polygon with holes, bbox prefilter, tiered fee selection
+"""
+import random
+import pytest
+
+from delivery_zones import InvalidZoneGeometry, Zone, ZoneIndex, normalize_polygon, point_in_ring
+
+
+def square(center_lon, center_lat, half):
+    return [
+        [center_lon - half, center_lat - half],
+        [center_lon + half, center_lat - half],
+        [center_lon + half, center_lat + half],
+        [center_lon - half, center_lat + half],
+        [center_lon - half, center_lat - half],
+    ]
+
+
+def zone(zone_id, fee, *rings):
+    return Zone.from_doc({
+        "id": zone_id,
+        "name": zone_id,
+        "delivery_fee": fee,
+        "polygon": {"type": "Polygon", "coordinates": list(rings)}
+    })
+
+
+class TestPolygonValidation:
+    """normalize_polygon input checks"""
+
+    def test_open_ring_is_closed(self):
+        """A ring whose last point differs from the first is closed automatically"""
+        polygon = normalize_polygon({"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1]]]})
+        ring = polygon["coordinates"][0]
+        assert ring[0] == ring[-1]
+        assert len(ring) == 4
+
+    def test_rejects_non_polygon(self):
+        """Only GeoJSON Polygons are accepted"""
+        with pytest.raises(InvalidZoneGeometry):
+            normalize_polygon({"type": "Point", "coordinates": [77.2, 28.6]})
+
+    def test_rejects_degenerate_ring(self):
+        """A ring needs three distinct points"""
+        with pytest.raises(InvalidZoneGeometry):
+            normalize_polygon({"type": "Polygon", "coordinates": [[[0, 0], [1, 1]]]})
+
+    def test_rejects_lat_lon_swapped_out_of_range(self):
+        """Latitude beyond 90 (usually swapped coordinates) is rejected"""
+        with pytest.raises(InvalidZoneGeometry):
+            normalize_polygon({"type": "Polygon", "coordinates": [[[28.6, 95.0], [28.7, 95.0], [28.7, 95.1]]]})
+
+
+class TestPointInPolygon:
+    """Ray casting and holes"""
+
+    def test_square(self):
+        """Points inside and outside a simple square"""
+        ring = square(77.2, 28.6, 0.01)
+        assert point_in_ring(77.2, 28.6, ring)
+        assert not point_in_ring(77.22, 28.6, ring)
+
+    def test_concave_polygon(self):
+        """The notch of an L-shaped zone is outside"""
+        ring = [[0, 0], [2, 0], [2, 1], [1, 1], [1, 2], [0, 2], [0, 0]]
+        assert point_in_ring(0.5, 1.5, ring)
+        assert not point_in_ring(1.5, 1.5, ring)
+
+    def test_hole_excluded(self):
+        """Inner rings are holes"""
+        z = zone("donut", 30, square(77.2, 28.6, 0.02), square(77.2, 28.6, 0.005))
+        assert z.contains(28.615, 77.2)
+        assert not z.contains(28.6, 77.2)
+
+    def test_bbox_prefilter_matches_full_test(self):
+        """The bbox shortcut never changes the answer"""
+        ring = [[77.18, 28.59], [77.23, 28.60], [77.21, 28.64], [77.19, 28.62], [77.18, 28.59]]
+        z = zone("poly", 20, ring)
+        rng = random.Random(7)
+        for _ in range(2000):
+            lat, lon = rng.uniform(28.55, 28.68), rng.uniform(77.14, 77.27)
+            assert z.contains(lat, lon) == point_in_ring(lon, lat, ring)
+
+
+class TestZoneIndex:
+    """Tiered zone selection"""
+
+    def test_nested_zones_pick_cheapest(self):
+        """Inner ring charges its own fee, outer ring its higher fee"""
+        index = ZoneIndex([
+            zone("outer", 60, square(77.2, 28.6, 0.03)),
+            zone("inner", 20, square(77.2, 28.6, 0.01)),
+        ])
+        assert index.find(28.6, 77.2).id == "inner"
+        assert index.find(28.625, 77.2).id == "outer"
+        assert index.find(28.7, 77.2) is None
+
+    def test_empty_index(self):
+        """No zones means no match"""
+        assert ZoneIndex([]).find(28.6, 77.2) is None
@@ -0,0 +1,104 @@
+"""
+File Delivery Tests
+Tests: Range parsing, ETag / Last-Modified revalidation, 206 / 416 responses, If-Range
+"""
+import asyncio
+import hashlib
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+
+from file_delivery import RangeNotSatisfiable, file_response, parse_range
+
+DATA = bytes(range(256)) * 4
+MODIFIED = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+ETAG = f'"{hashlib.sha256(DATA).hexdigest()}"'
+
+
+class TestParseRange:
+    """parse_range"""
+
+    def test_forms(self):
+        """Closed, open-ended, suffix and clamped ranges"""
+        assert parse_range("bytes=0-99", 1024) == (0, 99)
+        assert parse_range("bytes=1000-", 1024) == (1000, 1023)
+        assert parse_range("bytes=-24", 1024) == (1000, 1023)
+        assert parse_range("bytes=1000-5000", 1024) == (1000, 1023)
+        assert parse_range("bytes=-5000", 1024) == (0, 1023)
+
+    def test_ignored_headers(self):
+        """Missing, malformed and multi-range headers fall back to the whole file"""
+        assert parse_range(None, 1024) is None
+        assert parse_range("items=0-1", 1024) is None
+        assert parse_range("bytes=0-1,5-9", 1024) is None
+
+    def test_unsatisfiable(self):
+        """Ranges past the end or reversed are rejected"""
+        for header in ("bytes=1024-", "bytes=50-10", "bytes=-0"):
+            with pytest.raises(RangeNotSatisfiable):
+                parse_range(header, 1024)
+
+
+class TestFileResponse:
+    """file_response through a real ASGI app"""
+
+    def get(self, tmp_path, **headers):
+        path = tmp_path / "menu.pdf"
+        path.write_bytes(DATA)
+        app = FastAPI()
+
+        @app.get("/file")
+        async def serve(request: Request):
+            return file_response(path, len(DATA), ETAG, MODIFIED, request.headers,
+                                 media_type="application/pdf", filename="Menu Card.pdf")
+
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.get("/file", headers={k.replace("_", "-"): v for k, v in headers.items()})
+        return asyncio.run(run())
+
+    def test_full_response_headers(self, tmp_path):
+        """200 carries the body, validators and caching headers"""
+        response = self.get(tmp_path)
+        assert response.status_code == 200
+        assert response.content == DATA
+        assert response.headers["etag"] == ETAG
+        assert response.headers["accept-ranges"] == "bytes"
+        assert response.headers["last-modified"] == "Sun, 01 Mar 2026 12:00:00 GMT"
+        assert response.headers["content-disposition"] == "attachment; filename*=utf-8''Menu%20Card.pdf"
+
+    def test_revalidation(self, tmp_path):
+        """Matching If-None-Match or a current If-Modified-Since give 304 with no body"""
+        assert self.get(tmp_path, if_none_match=ETAG).status_code == 304
+        assert self.get(tmp_path, if_none_match=f'"other", W/{ETAG}').status_code == 304
+        assert self.get(tmp_path, if_modified_since=format_datetime(MODIFIED, usegmt=True)).status_code == 304
+        stale = format_datetime(MODIFIED - timedelta(days=1), usegmt=True)
+        assert self.get(tmp_path, if_modified_since=stale).status_code == 200
+        # If-None-Match wins over If-Modified-Since
+        response = self.get(tmp_path, if_none_match='"other"', if_modified_since=format_datetime(MODIFIED, usegmt=True))
+        assert response.status_code == 200
+
+    def test_partial_content(self, tmp_path):
+        """A byte range returns 206 with only the requested bytes"""
+        response = self.get(tmp_path, range="bytes=100-199")
+        assert response.status_code == 206
+        assert response.content == DATA[100:200]
+        assert response.headers["content-range"] == f"bytes 100-199/{len(DATA)}"
+        assert response.headers["content-length"] == "100"
+
+    def test_unsatisfiable_range(self, tmp_path):
+        """Ranges past the end get 416 with the file size"""
+        response = self.get(tmp_path, range=f"bytes={len(DATA)}-")
+        assert response.status_code == 416
+        assert response.headers["content-range"] == f"bytes */{len(DATA)}"
+
+    def test_if_range(self, tmp_path):
+        """A stale If-Range validator sends the whole file instead of the range"""
+        assert self.get(tmp_path, range="bytes=0-9", if_range=ETAG).status_code == 206
+        response = self.get(tmp_path, range="bytes=0-9", if_range='"stale"')
+        assert response.status_code == 200
+        assert response.content == DATA
@@ -0,0 +1,166 @@
+"""
+Firebase Token Verification Tests
+Tests: Signature and claim checks against locally generated keys, certificate cache, verified-token cache
+"""
+import asyncio
+import time
+import pytest
+import jwt
+from datetime import datetime, timedelta, timezone
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+from firebase_tokens import FirebaseTokenVerifier, FirebaseTokenError
+
+PROJECT_ID = "thugozi-test"
+
+
+def make_key_and_cert():
+    """Generate an RSA key and a self-signed certificate like Google's"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "securetoken.system.gserviceaccount.com")])
+    now = datetime.now(timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    return key, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+@pytest.fixture(scope="module")
+def signing():
+    key, pem = make_key_and_cert()
+    return {"kid": "test-kid", "key": key, "pem": pem}
+
+
+def make_token(signing, **overrides):
+    now = int(time.time())
+    claims = {
+        "iss": f"https://securetoken.google.com/{PROJECT_ID}",
+        "aud": PROJECT_ID,
+        "sub": "firebase-uid-123",
+        "auth_time": now - 10,
+        "iat": now - 10,
+        "exp": now + 3600,
+        "phone_number": "+919876543210",
+    }
+    claims.update(overrides)
+    kid = claims.pop("kid", signing["kid"])
+    return jwt.encode(claims, signing["key"], algorithm="RS256", headers={"kid": kid})
+
+
+def make_verifier(signing, **kwargs):
+    verifier = FirebaseTokenVerifier(PROJECT_ID, **kwargs)
+    verifier.load_certificates({signing["kid"]: signing["pem"]}, max_age=3600)
+    return verifier
+
+
+class TestFirebaseTokenVerification:
+    """Token signature and claim validation"""
+
+    def test_valid_token(self, signing):
+        """A correctly signed token returns its claims with uid"""
+        claims = asyncio.run(make_verifier(signing).verify(make_token(signing)))
+        assert claims["uid"] == "firebase-uid-123"
+        assert claims["phone_number"] == "+919876543210"
+
+    @pytest.mark.parametrize("overrides", [
+        {"aud": "other-project"},
+        {"iss": "https://securetoken.google.com/other-project"},
+        {"exp": int(time.time()) - 5},
+        {"sub": ""},
+        {"kid": "unknown-kid"},
+    ])
+    def test_rejected_claims(self, signing, overrides):
+        """Wrong audience, issuer, expiry, subject or key id are rejected"""
+        with pytest.raises(FirebaseTokenError):
+            asyncio.run(make_verifier(signing).verify(make_token(signing, **overrides)))
+
+    def test_wrong_signing_key(self, signing):
+        """A token signed by another key under a known kid is rejected"""
+        other_key, _ = make_key_and_cert()
+        token = make_token({"kid": signing["kid"], "key": other_key})
+        with pytest.raises(FirebaseTokenError):
+            asyncio.run(make_verifier(signing).verify(token))
+
+    def test_malformed_token(self, signing):
+        """Garbage input raises FirebaseTokenError, not a generic exception"""
+        with pytest.raises(FirebaseTokenError):
+            asyncio.run(make_verifier(signing).verify("not-a-jwt"))
+
+    def test_unconfigured_project(self, signing):
+        """Without a project id tokens cannot be verified"""
+        verifier = FirebaseTokenVerifier(None)
+        with pytest.raises(FirebaseTokenError):
+            asyncio.run(verifier.verify(make_token(signing)))
+
+
+class TestFirebaseTokenCaching:
+    """Certificate and verified-token caches"""
+
+    def test_retry_served_from_cache(self, signing, monkeypatch):
+        """A retried token is not verified twice"""
+        verifier = make_verifier(signing)
+        token = make_token(signing)
+        calls = []
+        original = verifier._verify_sync
+        monkeypatch.setattr(verifier, "_verify_sync", lambda *a: calls.append(1) or original(*a))
+
+        async def run():
+            first = await verifier.verify(token)
+            second = await verifier.verify(token)
+            return first, second
+
+        first, second = asyncio.run(run())
+        assert first == second
+        assert len(calls) == 1
+
+    def test_cache_entry_expires_with_token(self, signing):
+        """Cached results never outlive the token's exp"""
+        verifier = make_verifier(signing)
+        token = make_token(signing, exp=int(time.time()) + 1)
+        asyncio.run(verifier.verify(token))
+        fingerprint = verifier.fingerprint(token)
+        assert verifier._results[fingerprint][1] <= time.time() + 1
+        time.sleep(1.1)
+        assert verifier._cached(fingerprint) is None
+
+    def test_cache_is_bounded(self, signing):
+        """Oldest verified tokens are evicted beyond the size limit"""
+        verifier = make_verifier(signing, result_cache_size=2)
+
+        async def run():
+            for i in range(3):
+                await verifier.verify(make_token(signing, sub=f"uid-{i}"))
+
+        asyncio.run(run())
+        assert len(verifier._results) == 2
+
+    def test_expired_certificates_are_refetched(self, signing, monkeypatch):
+        """Certificates past max-age trigger a single refetch"""
+        verifier = FirebaseTokenVerifier(PROJECT_ID)
+        fetches = []
+
+        async def fake_refresh():
+            fetches.append(1)
+            verifier.load_certificates({signing["kid"]: signing["pem"]}, max_age=3600)
+
+        monkeypatch.setattr(verifier, "refresh_certificates", fake_refresh)
+
+        async def run():
+            await asyncio.gather(*(verifier.verify(make_token(signing, sub=f"uid-{i}")) for i in range(5)))
+
+        asyncio.run(run())
+        assert len(fetches) == 1
+
+    def test_max_age_parsing(self):
+        """max-age is read from Google's Cache-Control header"""
+        assert FirebaseTokenVerifier._max_age("public, max-age=22814, must-revalidate, no-transform") == 22814
+        assert FirebaseTokenVerifier._max_age("") == 3600
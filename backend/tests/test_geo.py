@@ -0,0 +1,61 @@
+"""
+Geo Helper Tests
+Tests: Vectorized haversine against the scalar formula, heatmap grid binning
+"""
+import math
+import random
+
+from geo import bin_points, haversine_km
+
+
+def scalar_distance(lat1, lon1, lat2, lon2):
+    """Same formula as server.calculate_distance"""
+    R = 6371
+    delta_lat = math.radians(lat2 - lat1)
+    delta_lon = math.radians(lon2 - lon1)
+    a = math.sin(delta_lat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(delta_lon / 2) ** 2
+    return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+class TestHaversine:
+    """Vectorized distance"""
+
+    def test_matches_scalar(self):
+        """Every element agrees with the scalar formula"""
+        rng = random.Random(3)
+        lats = [rng.uniform(28.4, 28.8) for _ in range(1000)]
+        lons = [rng.uniform(77.0, 77.4) for _ in range(1000)]
+        distances = haversine_km(28.6139, 77.2090, lats, lons)
+        for lat, lon, d in zip(lats, lons, distances):
+            assert abs(d - scalar_distance(28.6139, 77.2090, lat, lon)) < 1e-9
+
+    def test_same_point_is_zero(self):
+        """Distance to the origin itself is zero"""
+        assert haversine_km(28.6, 77.2, [28.6], [77.2])[0] == 0
+
+    def test_empty_input(self):
+        """No points gives an empty array"""
+        assert haversine_km(28.6, 77.2, [], []).size == 0
+
+
+class TestBinPoints:
+    """Heatmap grid"""
+
+    def test_counts_sum_to_points(self):
+        """Every point lands in exactly one cell"""
+        rng = random.Random(5)
+        lats = [rng.gauss(28.61, 0.01) for _ in range(5000)]
+        lons = [rng.gauss(77.21, 0.01) for _ in range(5000)]
+        cells = bin_points(lats, lons, 28.6139, 77.2090, cell_m=250)
+        assert sum(c["count"] for c in cells) == 5000
+        assert [c["count"] for c in cells] == sorted((c["count"] for c in cells), reverse=True)
+
+    def test_nearby_points_share_a_cell(self):
+        """Points a few metres apart fall in the same 250 m cell"""
+        cells = bin_points([28.61401, 28.61402, 28.62500], [77.20901, 77.20903, 77.20901], 28.6139, 77.2090, cell_m=250)
+        assert [c["count"] for c in cells] == [2, 1]
+        assert cells[0]["distance_km"] < 0.25
+
+    def test_empty(self):
+        """No orders, no cells"""
+        assert bin_points([], [], 28.6, 77.2) == []
@@ -0,0 +1,105 @@
+"""
+Bill Image Hash Tests
+Tests: dHash/pHash stability, band lookup guarantee, near-duplicate matching, fixture false-positive rate
+"""
+import io
+import random
+
+from PIL import Image, ImageDraw, ImageEnhance, ImageFilter, ImageFont
+
+from image_hash import ImageHash, band_keys, closest_match, hamming, image_hash
+
+ITEMS = ["Paneer Tikka", "Cold Coffee", "Veg Biryani", "Masala Dosa", "Butter Naan", "Dal Makhani", "Masala Chai"]
+
+
+def make_bill_photo(seed: int) -> bytes:
+    """Same-template receipt with its own number / items, photographed with its own framing"""
+    rng = random.Random(seed)
+    receipt = Image.new("L", (400, 700), 245)
+    draw = ImageDraw.Draw(receipt)
+    font = ImageFont.load_default()
+    lines = ["THU GO ZI CAFE", "Connaught Place, New Delhi", f"Bill No: {rng.randrange(10000, 99999)}",
+             f"Date: 2026-0{rng.randint(1, 9)}-{rng.randint(10, 28)}", "-" * 40]
+    total = 0
+    for _ in range(rng.randint(2, 7)):
+        qty, price = rng.randint(1, 3), rng.randrange(40, 300, 10)
+        total += qty * price
+        lines.append(f"{rng.choice(ITEMS):<24}{qty} x {price}.00")
+    lines += ["-" * 40, f"Grand Total   {total}.00", "Thank you! Visit again"]
+    for i, line in enumerate(lines):
+        draw.text((30, 20 + i * 22), line, fill=20, font=font)
+
+    width, height = rng.randint(520, 700), rng.randint(780, 1000)
+    photo = Image.new("L", (width, height), rng.randint(40, 150))
+    photo.paste(receipt, (rng.randint(0, width - 400), rng.randint(0, height - 700)))
+    photo = photo.rotate(rng.uniform(-2, 2), resample=Image.BICUBIC, fillcolor=photo.getpixel((0, 0)))
+    photo = photo.filter(ImageFilter.GaussianBlur(rng.uniform(0, 1.2)))
+    out = io.BytesIO()
+    photo.convert("RGB").save(out, "JPEG", quality=rng.randint(60, 90))
+    return out.getvalue()
+
+
+def reupload(photo: bytes, seed: int) -> bytes:
+    """The same photo resized, brightened and recompressed (e.g. forwarded or screenshotted)"""
+    rng = random.Random(seed)
+    img = Image.open(io.BytesIO(photo))
+    scale = rng.uniform(0.5, 1.0)
+    img = img.resize((int(img.width * scale), int(img.height * scale)))
+    img = ImageEnhance.Brightness(img).enhance(rng.uniform(0.9, 1.1))
+    out = io.BytesIO()
+    img.convert("RGB").save(out, "JPEG", quality=rng.randint(50, 85))
+    return out.getvalue()
+
+
+class TestHashing:
+    """Hash basics"""
+
+    def test_doc_round_trip(self):
+        """Hashes survive storage as hex strings"""
+        h = image_hash(make_bill_photo(1))
+        assert ImageHash.from_doc(h.to_doc()) == h
+        assert h.distances(h) == (0, 0)
+
+    def test_bands_find_all_close_hashes(self):
+        """Hashes within 7 bits always share at least one band key"""
+        rng = random.Random(7)
+        for _ in range(500):
+            a = rng.getrandbits(64)
+            b = a
+            for bit in rng.sample(range(64), 7):
+                b ^= 1 << bit
+            assert hamming(a, b) == 7
+            assert set(band_keys(a)) & set(band_keys(b))
+
+    def test_closest_match(self):
+        """The nearest stored bill within range is returned; far ones are ignored"""
+        target = ImageHash(0b1111, 0b1111)
+        docs = [{"id": "far", "image_hash": ImageHash(0b1111, 0b1111 ^ 0xF000).to_doc()},
+                {"id": "closer", "image_hash": ImageHash(0b1110, 0b1111).to_doc()},
+                {"id": "close", "image_hash": ImageHash(0b1100, 0b1110).to_doc()},
+                {"id": "legacy", "image_hash": None}]
+        match, distance = closest_match(target, docs)
+        assert (match["id"], distance) == ("closer", 1)
+        assert closest_match(target, docs[:1]) is None
+
+
+class TestFixtureRates:
+    """Detection and false-positive rates on synthetic same-template bills"""
+
+    photos = [make_bill_photo(seed) for seed in range(40)]
+
+    def test_false_positive_rate(self):
+        """Distinct bills of the same shop template are (almost) never flagged"""
+        hashes = [image_hash(p) for p in self.photos]
+        pairs = [(i, j) for i in range(len(hashes)) for j in range(i + 1, len(hashes))]
+        flagged = sum(hashes[i].matches(hashes[j]) for i, j in pairs)
+        rate = flagged / len(pairs)
+        print(f"false positives: {flagged}/{len(pairs)} pairs ({rate:.2%})")
+        assert rate <= 0.005
+
+    def test_reupload_detection_rate(self):
+        """Most resized / recompressed re-uploads of a submitted photo are caught"""
+        caught = sum(image_hash(p).matches(image_hash(reupload(p, seed))) for seed, p in enumerate(self.photos))
+        rate = caught / len(self.photos)
+        print(f"re-uploads caught: {caught}/{len(self.photos)} ({rate:.0%})")
+        assert rate >= 0.9
@@ -0,0 +1,97 @@
+"""
+Photo Quality Gate Tests
+Tests: Resolution, exposure, blank, blur detection, actionable messages, speed on large photos
+"""
+import io
+
+import pytest
+from PIL import Image, ImageDraw, ImageEnhance, ImageFilter, ImageFont
+
+from image_quality import QualityThresholds, assess_image
+
+
+def document_photo(width=640, height=900, scale=1) -> Image.Image:
+    """A receipt-like page of text on a darker table"""
+    page = Image.new("L", (400, 700), 245)
+    draw = ImageDraw.Draw(page)
+    font = ImageFont.load_default()
+    for i in range(28):
+        draw.text((30, 20 + i * 24), f"Item {i:02d}  Paneer Tikka  2 x {90 + i}.00", fill=20, font=font)
+    photo = Image.new("L", (width, height), 90)
+    photo.paste(page, ((width - 400) // 2, (height - 700) // 2))
+    if scale != 1:
+        photo = photo.resize((width * scale, height * scale), Image.BICUBIC)
+    return photo
+
+
+def white_receipt(width=1080, height=1920) -> Image.Image:
+    """A flatbed-style scan: black text on pure white paper filling the frame"""
+    page = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(page)
+    font = ImageFont.load_default(size=14)
+    for i in range(40):
+        draw.text((60, 60 + i * 45), f"Item {i:02d}  Paneer Tikka  2 x {90 + i}.00", fill=0, font=font)
+    return page
+
+
+def encode(img: Image.Image, fmt: str = "JPEG") -> bytes:
+    out = io.BytesIO()
+    img.convert("RGB").save(out, fmt, **({"quality": 85} if fmt == "JPEG" else {}))
+    return out.getvalue()
+
+
+class TestQualityGate:
+    """assess_image"""
+
+    def test_good_photo_passes(self):
+        """A sharp, well-lit document passes with metrics attached"""
+        report = assess_image(encode(document_photo()))
+        assert report.ok and report.reason is None and report.message is None
+        assert report.metrics["width"] == 640
+
+    @pytest.mark.parametrize("fmt", ["PNG", "JPEG"])
+    def test_clean_white_document_passes(self, fmt):
+        """Mostly clipped white paper is not overexposure while the text keeps its contrast"""
+        report = assess_image(encode(white_receipt(), fmt))
+        assert report.metrics["mean"] > QualityThresholds().max_mean
+        assert report.metrics["clipped_fraction"] > QualityThresholds().max_clipped_fraction
+        assert report.ok, report.reason
+
+    @pytest.mark.parametrize("transform, reason", [
+        (lambda img: img.filter(ImageFilter.GaussianBlur(2.5)), "blurry"),
+        (lambda img: ImageEnhance.Brightness(img).enhance(0.15), "too_dark"),
+        (lambda img: ImageEnhance.Brightness(img).enhance(4), "too_bright"),
+        (lambda img: Image.new("L", img.size, 128), "blank"),
+        (lambda img: img.resize((300, 420)), "too_small"),
+    ])
+    def test_rejections(self, transform, reason):
+        """Each failure mode is recognised and comes with a message"""
+        report = assess_image(encode(transform(document_photo())))
+        assert not report.ok
+        assert report.reason == reason
+        assert report.message
+
+    def test_too_small_message_is_actionable(self):
+        """The resolution message states the actual and required size"""
+        report = assess_image(encode(document_photo().resize((300, 420))), QualityThresholds(min_short_side=480))
+        assert "300x420" in report.message and "480" in report.message
+
+    def test_dim_but_sharp_is_not_blurry(self):
+        """Sharpness is normalised by contrast, so a dim photo is not called blurry"""
+        dim = ImageEnhance.Contrast(document_photo()).enhance(0.4)
+        report = assess_image(encode(dim))
+        assert report.reason != "blurry"
+        assert report.metrics["sharpness"] > QualityThresholds().min_sharpness
+
+    def test_large_photo_is_fast(self):
+        """A ~12 MP phone photo is assessed from a downscaled decode in well under 100 ms"""
+        data = encode(document_photo(width=1000, height=750, scale=4))
+        assess_image(data)  # warm up
+        report = assess_image(data)
+        assert report.metrics["width"] == 4000
+        assert report.elapsed_ms < 100
+
+    def test_rejects_non_images(self):
+        """Undecodable bytes raise instead of passing the gate"""
+        with pytest.raises(Exception):
+            assess_image(b"not an image")
@@ -0,0 +1,92 @@
+"""
+Kitchen ETA Tests
+Tests: Cooking time from prep_time, multi-station queueing, incremental status updates
+"""
+import random
+
+from kitchen import KitchenSchedule, cooking_minutes
+
+NOW = 1_800_000_000.0
+
+
+def minutes_after(ts, minutes):
+    return ts + minutes * 60
+
+
+class TestCookingMinutes:
+    """Per-order cooking time"""
+
+    def test_longest_item_plus_extra_units(self):
+        """Items cook side by side; extra units add a little time"""
+        items = [{"menu_item_id": "dosa", "quantity": 2}, {"menu_item_id": "tea", "quantity": 1}]
+        assert cooking_minutes(items, {"dosa": 12, "tea": 3}, extra_unit_minutes=1) == 14
+
+    def test_unknown_item_uses_default(self):
+        """Items missing from the menu fall back to the default prep time"""
+        assert cooking_minutes([{"menu_item_id": "gone", "quantity": 1}], {}) == 10
+
+
+class TestKitchenSchedule:
+    """Queue model"""
+
+    def test_single_station_is_fifo(self):
+        """With one station, ETAs add up"""
+        schedule = KitchenSchedule(stations=1)
+        assert schedule.enqueue("a", 10, now=NOW) == minutes_after(NOW, 10)
+        assert schedule.enqueue("b", 5, now=NOW) == minutes_after(NOW, 15)
+
+    def test_stations_run_in_parallel(self):
+        """Two stations take two orders at once; the third waits for the first free one"""
+        schedule = KitchenSchedule(stations=2)
+        schedule.enqueue("a", 10, now=NOW)
+        schedule.enqueue("b", 20, now=NOW)
+        assert schedule.enqueue("c", 5, now=NOW) == minutes_after(NOW, 15)
+
+    def test_cancel_moves_queue_up(self):
+        """Removing an order pulls the ones behind it forward"""
+        schedule = KitchenSchedule(stations=1)
+        schedule.enqueue("a", 10, now=NOW)
+        schedule.enqueue("b", 10, now=NOW)
+        schedule.remove("a")
+        assert schedule.eta("b", now=NOW) == minutes_after(NOW, 10)
+
+    def test_is_queued_until_started(self):
+        """An order is queued until it starts, then only counted as in the schedule"""
+        schedule = KitchenSchedule(stations=1)
+        schedule.enqueue("a", 10, now=NOW)
+        assert schedule.is_queued("a")
+        schedule.start("a", started_at=NOW)
+        assert "a" in schedule and not schedule.is_queued("a")
+        assert not schedule.is_queued("missing")
+
+    def test_preparing_counts_from_start_time(self):
+        """An order started five minutes ago has five minutes left"""
+        schedule = KitchenSchedule(stations=1)
+        schedule.enqueue("a", 10, now=NOW - 300)
+        schedule.start("a", started_at=NOW - 300)
+        schedule.enqueue("b", 10, now=NOW)
+        assert schedule.eta("a", now=NOW) == minutes_after(NOW, 5)
+        assert schedule.eta("b", now=NOW) == minutes_after(NOW, 15)
+
+    def test_overdue_order_is_ready_now(self):
+        """Orders past their cooking time are due immediately, not in the past"""
+        schedule = KitchenSchedule(stations=1)
+        schedule.add("a", 10, started_at=NOW - 3600)
+        assert schedule.eta("a", now=NOW) == NOW
+
+    def test_quote_does_not_enqueue(self):
+        """Quoting a new order leaves the schedule unchanged"""
+        schedule = KitchenSchedule(stations=1)
+        schedule.enqueue("a", 10, now=NOW)
+        assert schedule.quote(5, now=NOW) == minutes_after(NOW, 15)
+        assert len(schedule) == 1
+
+    def test_incremental_matches_replay(self):
+        """ETAs from incremental appends equal a full recompute"""
+        rng = random.Random(11)
+        schedule = KitchenSchedule(stations=3)
+        for i in range(200):
+            schedule.enqueue(f"o{i}", rng.randint(3, 25), now=NOW)
+        incremental = dict(schedule._eta)
+        schedule._recompute(NOW)
+        assert schedule._eta == incremental
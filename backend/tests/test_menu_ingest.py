@@ -0,0 +1,255 @@
+"""
+Menu PDF Ingestion Tests
+Tests: PDF text extraction, menu line parsing, diff against menu_items, override-safe bulk operations,
+ingestion guards (empty parse, large removals, latest-hash short-circuit, malformed PDFs)
+"""
+import asyncio
+import zlib
+
+import pytest
+
+from menu_ingest import (MenuPDFError, ParsedItem, build_operations, diff_menu, extract_pdf_lines,
+                         guess_veg, ingest_menu_pdf, parse_menu_lines, parse_menu_pdf)
+
+
+def make_pdf(*pages: bytes, compress: bool = True) -> bytes:
+    """Minimal PDF with one content stream per page"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + i * 2} 0 R" for i in range(len(pages)))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    for i, content in enumerate(pages):
+        objects.append(f"<< /Type /Page /Parent 2 0 R /Contents {4 + i * 2} 0 R >>".encode())
+        data = zlib.compress(content) if compress else content
+        header = b"<< /Length %d%s >>" % (len(data), b" /Filter /FlateDecode" if compress else b"")
+        objects.append(header + b"\nstream\n" + data + b"\nendstream")
+    out = b"%PDF-1.4\n"
+    for num, body in enumerate(objects, start=1):
+        out += b"%d 0 obj\n" % num + body + b"\nendobj\n"
+    return out + b"trailer\n<< /Root 1 0 R >>\n%%EOF\n"
+
+
+class TestExtraction:
+    """Text lines from content streams"""
+
+    def test_columns_are_joined_by_baseline(self):
+        """Names and prices drawn in separate passes end up on the same line"""
+        content = (b"BT /F1 16 Tf 50 800 Td (STARTERS) Tj ET\n"
+                   b"BT /F1 12 Tf 50 775 Td (Paneer Tikka) Tj 0 -20 Td (Chicken 65) Tj ET\n"
+                   b"BT /F1 12 Tf 1 0 0 1 460 775 Tm (Rs. 180) Tj 1 0 0 1 460 755 Tm (Rs. 220) Tj ET")
+        assert extract_pdf_lines(make_pdf(content)) == ["STARTERS", "Paneer Tikka Rs. 180", "Chicken 65 Rs. 220"]
+
+    def test_uncompressed_and_multi_page(self):
+        """Pages are read in page-tree order; unfiltered streams work too"""
+        pdf = make_pdf(b"BT 50 800 Td (Page one 10) Tj ET", b"BT 50 800 Td (Page two 20) Tj ET", compress=False)
+        assert extract_pdf_lines(pdf) == ["Page one 10", "Page two 20"]
+
+    def test_tj_arrays_escapes_and_leading(self):
+        """TJ kerning gaps become spaces; escaped parens and T* line breaks are handled"""
+        content = (b"BT 14 TL 50 800 Td [(Dal) -300 (Makhani)] TJ T* (Masala \\(Spl\\) 90) Tj "
+                   b"(Caf\\351 Latte 110) ' ET")
+        assert extract_pdf_lines(make_pdf(content)) == ["Dal Makhani", "Masala (Spl) 90", "Café Latte 110"]
+
+    def test_rejects_non_pdf(self):
+        """Files without a PDF header are refused"""
+        with pytest.raises(MenuPDFError):
+            extract_pdf_lines(b"\x89PNG\r\n")
+
+
+class TestLineParsing:
+    """Items and categories"""
+
+    def test_prices_and_categories(self):
+        """Common price formats, headings and prices on their own line"""
+        lines = ["STARTERS", "Paneer Tikka Rs. 180", "Chicken 65 ₹220", "Beverages", "Masala Chai ........ 30",
+                 "Cold Coffee", "90", "Butter Naan 40/-", "Burgers 120"]
+        items, unparsed = parse_menu_lines(lines)
+        assert [(i.name, i.price, i.category) for i in items] == [
+            ("Paneer Tikka", 180.0, "Starters"),
+            ("Chicken 65", 220.0, "Starters"),
+            ("Masala Chai", 30.0, "Beverages"),
+            ("Cold Coffee", 90.0, "Beverages"),
+            ("Butter Naan", 40.0, "Beverages"),
+            ("Burgers", 120.0, "Beverages"),
+        ]
+        assert unparsed == []
+
+    def test_veg_guess(self):
+        """New items are marked non-veg by keyword"""
+        assert guess_veg("Paneer Tikka")
+        assert not guess_veg("Chicken 65")
+
+
+class TestDiff:
+    """Sync against menu_items"""
+
+    existing = [
+        {"id": "a", "name": "Paneer Tikka", "price": 170, "category": "Starters", "source": "pdf"},
+        {"id": "b", "name": "Masala Chai", "price": 30, "category": "Beverages", "source": "pdf"},
+        {"id": "c", "name": "Cold Coffee", "price": 80, "category": "Beverages", "is_manual_override": True},
+        {"id": "d", "name": "Old Special", "price": 99, "category": "Mains", "source": "pdf"},
+        {"id": "e", "name": "Admin Combo", "price": 199, "category": "Combos", "is_manual_override": True},
+    ]
+    parsed = [
+        ParsedItem("Paneer  tikka", 180, "Starters"),
+        ParsedItem("Masala Chai", 30, "Beverages"),
+        ParsedItem("Cold Coffee", 90, "Beverages"),
+        ParsedItem("Veg Roll", 60, "Rolls"),
+    ]
+
+    def test_diff(self):
+        """Added / updated / removed / unchanged, with overrides untouched"""
+        diff = diff_menu(self.parsed, self.existing)
+        assert [i.name for i in diff.added] == ["Veg Roll"]
+        assert [(c["id"], i.price) for c, i in diff.updated] == [("a", 180)]
+        assert [c["id"] for c in diff.removed] == ["d"]
+        assert diff.unchanged == 1
+        assert diff.skipped_overrides == ["c"]
+
+    def test_same_input_twice_has_no_changes(self):
+        """Once applied, the same menu produces an empty diff"""
+        applied = [{"id": str(n), "name": i.name, "price": i.price, "category": i.category, "source": "pdf"}
+                   for n, i in enumerate(self.parsed)]
+        diff = diff_menu(self.parsed, applied)
+        assert not diff.added and not diff.updated and not diff.removed
+
+    def test_operations_never_touch_overrides(self):
+        """Every update filter excludes manually overridden items"""
+        ops = build_operations(diff_menu(self.parsed, self.existing), "pdf-1", "2026-01-01T00:00:00+00:00")
+        updates = [op for op in ops if type(op).__name__ == "UpdateOne"]
+        assert len(ops) == 3 and len(updates) == 2
+        assert all(op._filter["is_manual_override"] == {"$ne": True} for op in updates)
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return [dict(d) for d in self.docs[:length]]
+
+
+class FakeMenuItems:
+    def __init__(self, docs):
+        self.docs = docs
+        self.writes = []
+
+    def find(self, query, projection=None):
+        return FakeCursor(self.docs)
+
+    async def bulk_write(self, ops, ordered=True):
+        self.writes.append(ops)
+
+
+class FakeIngestions:
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+
+    async def find_one(self, query, projection=None, sort=None):
+        matching = [d for d in self.docs if all(d.get(k) == v for k, v in query.items())]
+        for key, direction in reversed(sort or []):
+            matching.sort(key=lambda d: d.get(key, ""), reverse=direction < 0)
+        return dict(matching[0]) if matching else None
+
+    async def insert_one(self, doc):
+        self.docs.append(doc)
+        doc["_id"] = len(self.docs)
+
+
+class FakePDFs:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection=None):
+        return FakeCursor([d for d in self.docs if all(d.get(k) == v for k, v in query.items())])
+
+
+class FakeDB:
+    def __init__(self, items=(), ingestions=(), pdfs=({"id": "pdf-1", "active": True},)):
+        self.menu_items = FakeMenuItems(list(items))
+        self.menu_ingestions = FakeIngestions(ingestions)
+        self.menu_pdfs = FakePDFs(list(pdfs))
+
+
+def menu_pdf(tmp_path, content: bytes, content_hash: str = "h-new", pdf_id: str = "pdf-1") -> dict:
+    path = tmp_path / f"{pdf_id}.pdf"
+    path.write_bytes(make_pdf(content))
+    return {"id": pdf_id, "file_path": str(path), "content_hash": content_hash}
+
+
+PDF_ITEMS = [{"id": str(n), "name": f"Dish {n}", "price": 100, "category": "Menu", "source": "pdf"}
+             for n in range(4)]
+
+
+class TestIngest:
+    """ingest_menu_pdf guards"""
+
+    def test_empty_parse_leaves_menu_alone(self, tmp_path):
+        """A PDF with no items is recorded as empty and nothing is marked unavailable"""
+        db = FakeDB(PDF_ITEMS)
+        report = asyncio.run(ingest_menu_pdf(db, menu_pdf(tmp_path, b"BT 50 800 Td (Scan me) Tj ET")))
+        assert report["status"] == "empty"
+        assert db.menu_items.writes == []
+        assert db.menu_ingestions.docs[-1]["status"] == "empty"
+
+    def test_large_removal_needs_confirmation(self, tmp_path):
+        """Dropping most PDF dishes is held back until confirmed"""
+        db = FakeDB(PDF_ITEMS)
+        pdf = menu_pdf(tmp_path, b"BT 50 800 Td (Dish 0 100) Tj ET")
+        report = asyncio.run(ingest_menu_pdf(db, pdf))
+        assert report["status"] == "needs_confirmation"
+        assert len(report["removed"]) == 3
+        assert db.menu_items.writes == []
+
+        report = asyncio.run(ingest_menu_pdf(db, pdf, confirm=True))
+        assert report["status"] == "applied"
+        assert len(db.menu_items.writes[0]) == 3
+
+    def test_small_removal_applies(self, tmp_path):
+        """Removing a minority of dishes needs no confirmation"""
+        db = FakeDB(PDF_ITEMS)
+        content = b"BT 14 TL 50 800 Td (Dish 0 100) Tj T* (Dish 1 100) Tj T* (Dish 2 100) Tj ET"
+        report = asyncio.run(ingest_menu_pdf(db, menu_pdf(tmp_path, content)))
+        assert report["status"] == "applied"
+        assert report["removed"] == [{"id": "3", "name": "Dish 3"}]
+
+    def test_second_active_pdf_keeps_the_first_pdfs_dishes(self, tmp_path):
+        """A drinks PDF active next to the food PDF removes only its own and orphaned dishes"""
+        food = [{**item, "source_pdf_id": "pdf-food"} for item in PDF_ITEMS]
+        old = {"id": "x", "name": "Old Shake", "price": 80, "category": "Drinks", "source": "pdf",
+               "source_pdf_id": "pdf-retired"}
+        own = [{"id": f"y{n}", "name": name, "price": 60, "category": "Drinks", "source": "pdf",
+                "source_pdf_id": "pdf-drinks"} for n, name in enumerate(["Iced Tea", "Lassi", "Lemonade"])]
+        pdfs = [{"id": "pdf-food", "active": True}, {"id": "pdf-drinks", "active": True},
+                {"id": "pdf-retired", "active": False}]
+        db = FakeDB(food + [old] + own, pdfs=pdfs)
+        content = b"BT 14 TL 50 800 Td (Iced Tea 60) Tj T* (Lassi 60) Tj T* (Cold Coffee 90) Tj ET"
+        report = asyncio.run(ingest_menu_pdf(db, menu_pdf(tmp_path, content, pdf_id="pdf-drinks")))
+        assert report["status"] == "applied"
+        assert report["added"] == ["Cold Coffee"]
+        assert sorted(r["id"] for r in report["removed"]) == ["x", "y2"]
+
+    def test_short_circuit_only_on_latest_applied_hash(self, tmp_path):
+        """Re-uploading an older menu is applied again; the current one is a no-op"""
+        history = [
+            {"id": "old", "content_hash": "h-old", "status": "applied", "finished_at": "2026-01-01T00:00:00+00:00"},
+            {"id": "new", "content_hash": "h-new", "status": "applied", "finished_at": "2026-02-01T00:00:00+00:00"},
+        ]
+        content = b"BT 50 800 Td (Dish 0 120) Tj ET"
+        db = FakeDB(PDF_ITEMS[:1], history)
+        assert asyncio.run(ingest_menu_pdf(db, menu_pdf(tmp_path, content, "h-new")))["status"] == "unchanged"
+        report = asyncio.run(ingest_menu_pdf(db, menu_pdf(tmp_path, content, "h-old")))
+        assert report["status"] == "applied"
+        assert len(db.menu_items.writes) == 1
+
+    def test_malformed_pdf_records_failure(self, tmp_path):
+        """Parser errors (bad object stream header) become a failed report, not an exception"""
+        bad = (b"%PDF-1.5\n1 0 obj\n<< /Type /ObjStm /N 1 /First 4 /Length 8 >>\nstream\nxx yy zz\nendstream\n"
+               b"endobj\n")
+        with pytest.raises(MenuPDFError):
+            parse_menu_pdf(bad)
+        path = tmp_path / "bad.pdf"
+        path.write_bytes(bad)
+        db = FakeDB(PDF_ITEMS)
+        report = asyncio.run(ingest_menu_pdf(db, {"id": "pdf-2", "file_path": str(path), "content_hash": "h"}))
+        assert report["status"] == "failed" and report["error"]
+        assert db.menu_items.writes == []
@@ -0,0 +1,96 @@
+"""
+Menu Search Tests
+Tests: Inverted index matching, prefix typeahead, facets, incremental updates
+"""
+from menu_search import MenuSearchIndex, tokenize
+
+MENU = [
+    {"id": "1", "name": "Paneer Tikka", "category": "Starters", "veg": True, "price": 180, "description": "Grilled cottage cheese", "available": True},
+    {"id": "2", "name": "Chicken Tikka", "category": "Starters", "veg": False, "price": 220, "description": "Smoky grilled chicken", "available": True},
+    {"id": "3", "name": "Paneer Butter Masala", "category": "Mains", "veg": True, "price": 240, "description": "Creamy tomato gravy", "available": True},
+    {"id": "4", "name": "Masala Chai", "category": "Beverages", "veg": True, "price": 30, "description": "Spiced tea", "available": True},
+    {"id": "5", "name": "Chicken Biryani", "category": "Mains", "veg": False, "price": 260, "description": "Dum cooked rice", "available": False},
+]
+
+
+def names(result):
+    return [item["name"] for item in result["items"]]
+
+
+class TestMatching:
+    """Query terms"""
+
+    def test_tokenize_folds_case_and_accents(self):
+        """Tokens are lowercase ASCII words"""
+        assert tokenize("Crème Brûlée, 2-pc") == ["creme", "brulee", "2", "pc"]
+
+    def test_all_terms_must_match(self):
+        """Multi-word queries are AND"""
+        assert names(MenuSearchIndex(MENU).search("paneer tikka")) == ["Paneer Tikka"]
+
+    def test_last_term_is_prefix(self):
+        """Typeahead: partial last word matches"""
+        assert set(names(MenuSearchIndex(MENU).search("pan"))) == {"Paneer Tikka", "Paneer Butter Masala"}
+
+    def test_name_outranks_description(self):
+        """A hit in the name ranks above a hit in the description"""
+        index = MenuSearchIndex(MENU)
+        index.upsert({"id": "6", "name": "Tandoori Platter", "category": "Starters", "veg": False, "price": 350, "description": "Assorted tikka"})
+        assert names(index.search("tikka")) == ["Chicken Tikka", "Paneer Tikka", "Tandoori Platter"]
+
+    def test_unavailable_hidden_unless_requested(self):
+        """Public search skips unavailable items; admin search includes them"""
+        index = MenuSearchIndex(MENU)
+        assert "Chicken Biryani" not in names(index.search("biryani"))
+        assert names(index.search("biryani", include_unavailable=True)) == ["Chicken Biryani"]
+
+    def test_suggest(self):
+        """Vocabulary completions for the word being typed"""
+        assert MenuSearchIndex(MENU).suggest("chicken ma") == ["mains", "masala"]
+
+
+class TestFacets:
+    """veg / category / price"""
+
+    def test_filters(self):
+        """Veg, category and price range combine"""
+        index = MenuSearchIndex(MENU)
+        assert names(index.search(veg=True, category="starters")) == ["Paneer Tikka"]
+        assert set(names(index.search(min_price=100, max_price=220))) == {"Paneer Tikka", "Chicken Tikka"}
+
+    def test_facet_counts_ignore_own_filter(self):
+        """Selecting a category still shows counts for the other categories"""
+        result = MenuSearchIndex(MENU).search(category="Starters")
+        assert result["facets"]["category"] == {"Beverages": 1, "Mains": 1, "Starters": 2}
+        assert result["facets"]["veg"] == {"veg": 1, "non_veg": 1}
+        assert result["facets"]["price"] == {"min": 180.0, "max": 220.0}
+
+
+class TestIncrementalUpdates:
+    """upsert / remove without rebuild"""
+
+    def test_update_replaces_tokens_and_price(self):
+        """Renamed items stop matching their old name"""
+        index = MenuSearchIndex(MENU)
+        index.upsert({**MENU[3], "name": "Ginger Tea", "price": 40})
+        assert names(index.search("chai")) == []
+        assert names(index.search("ginger")) == ["Ginger Tea"]
+        assert names(index.search(min_price=35, max_price=45)) == ["Ginger Tea"]
+
+    def test_remove_prunes_vocabulary(self):
+        """Tokens used only by a deleted item disappear from typeahead"""
+        index = MenuSearchIndex(MENU)
+        index.remove("4")
+        assert index.suggest("cha") == []
+        assert len(index) == 4
+
+    def test_incremental_equals_rebuild(self):
+        """A sequence of edits leaves the same index as building from scratch"""
+        index = MenuSearchIndex(MENU)
+        index.remove("2")
+        index.upsert({**MENU[0], "description": "Smoked cottage cheese"})
+        final = [MENU[0] | {"description": "Smoked cottage cheese"}, MENU[2], MENU[3], MENU[4]]
+        rebuilt = MenuSearchIndex(final)
+        assert index._vocabulary == rebuilt._vocabulary
+        assert dict(index._postings) == dict(rebuilt._postings)
+        assert index._prices == rebuilt._prices
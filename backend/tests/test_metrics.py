@@ -0,0 +1,117 @@
+"""
+Metrics Tests
+Tests: Prometheus text format, histogram buckets, route-template labels, Mongo command listener, update cost
+"""
+import time
+from types import SimpleNamespace
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from metrics import MetricsMiddleware, MongoCommandMetrics, Registry, MONGO_BUCKETS
+
+
+def sample(text: str, line_start: str) -> str:
+    return next(line for line in text.splitlines() if line.startswith(line_start)).rsplit(" ", 1)[1]
+
+
+class TestRegistry:
+    """Counters, histograms and rendering"""
+
+    def test_counter_and_callback_render(self):
+        """HELP/TYPE headers, labels, escaping; metrics without samples are left out"""
+        registry = Registry()
+        counter = registry.counter("ocr_events_total", "OCR events", ["event"])
+        registry.counter("unused_total", "Never incremented")
+        registry.callback("queue_depth", "Queued", lambda: {(): 3})
+        counter.inc("calls")
+        counter.inc("calls")
+        counter.inc('avoided "dup"\n')
+        text = registry.render()
+        assert "# TYPE ocr_events_total counter" in text
+        assert 'ocr_events_total{event="calls"} 2' in text
+        assert 'ocr_events_total{event="avoided \\"dup\\"\\n"} 1' in text
+        assert "unused_total" not in text
+        assert "queue_depth 3" in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Bucket bounds are inclusive and cumulative; sum and count match the observations"""
+        registry = Registry()
+        hist = registry.histogram("latency_seconds", "Latency", ["route"], buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            hist.observe(value, "/a")
+        text = registry.render()
+        assert sample(text, 'latency_seconds_bucket{route="/a",le="0.1"}') == "2"
+        assert sample(text, 'latency_seconds_bucket{route="/a",le="1"}') == "3"
+        assert sample(text, 'latency_seconds_bucket{route="/a",le="+Inf"}') == "4"
+        assert sample(text, 'latency_seconds_count{route="/a"}') == "4"
+        assert float(sample(text, 'latency_seconds_sum{route="/a"}')) == 3.65
+
+    def test_update_cost_is_negligible(self):
+        """A histogram observation costs a few microseconds at most"""
+        hist = Registry().histogram("h", "h", ["method", "route", "status"])
+        n = 20000
+        started = time.perf_counter()
+        for i in range(n):
+            hist.observe(0.003, "GET", "/api/orders", "200")
+        per_call_us = (time.perf_counter() - started) / n * 1e6
+        print(f"observe: {per_call_us:.2f} us")
+        assert per_call_us < 20
+
+
+class TestMiddleware:
+    """MetricsMiddleware"""
+
+    def test_labels_use_route_template_and_status(self):
+        """Requests are labelled by route template, not raw path; unknown paths share one label"""
+        registry = Registry()
+        hist = registry.histogram("http_request_duration_seconds", "HTTP", ["method", "route", "status"])
+        app = FastAPI()
+
+        @app.get("/api/orders/{order_id}")
+        async def get_order(order_id: str):
+            if order_id == "missing":
+                raise HTTPException(status_code=404)
+            return {"id": order_id}
+
+        app.add_middleware(MetricsMiddleware, histogram=hist)
+        client = TestClient(app)
+        client.get("/api/orders/1")
+        client.get("/api/orders/2")
+        client.get("/api/orders/missing")
+        client.get("/random/path")
+        assert hist.count("GET", "/api/orders/{order_id}", "200") == 2
+        assert hist.count("GET", "/api/orders/{order_id}", "404") == 1
+        assert hist.count("GET", "unmatched", "404") == 1
+
+
+def command_event(kind, request_id, name, command=None, micros=1500):
+    return SimpleNamespace(kind=kind, connection_id=("localhost", 27017), request_id=request_id,
+                           command_name=name, command=command or {}, duration_micros=micros)
+
+
+class TestMongoCommandMetrics:
+    """MongoCommandMetrics"""
+
+    def test_records_per_command_and_collection(self):
+        """Timings are keyed by command and collection; failures are counted; handshakes ignored"""
+        registry = Registry()
+        hist = registry.histogram("mongo_seconds", "Mongo", ["command", "collection"], MONGO_BUCKETS)
+        failures = registry.counter("mongo_failures_total", "Mongo failures", ["command", "collection"])
+        listener = MongoCommandMetrics(hist, failures)
+
+        listener.started(command_event("started", 1, "find", {"find": "orders", "filter": {}}))
+        listener.started(command_event("started", 2, "getMore", {"getMore": 123, "collection": "orders"}))
+        listener.started(command_event("started", 3, "update", {"update": "users"}))
+        listener.started(command_event("started", 4, "hello", {"hello": 1}))
+        listener.succeeded(command_event("succeeded", 1, "find"))
+        listener.succeeded(command_event("succeeded", 2, "getMore"))
+        listener.failed(command_event("failed", 3, "update"))
+        listener.succeeded(command_event("succeeded", 4, "hello"))
+
+        assert hist.count("find", "orders") == 1
+        assert hist.count("getMore", "orders") == 1
+        assert hist.count("update", "users") == 1
+        assert failures.value("update", "users") == 1
+        assert "hello" not in registry.render()
+        assert listener._collections == {}
@@ -0,0 +1,50 @@
+"""
+Password Hashing Tests
+Tests: Off-loop bcrypt hash/verify, cost-factor rehash detection, bounded queue
+"""
+import asyncio
+import bcrypt
+
+from passwords import PasswordHasher, PasswordHasherBusy
+
+
+class TestPasswordHasher:
+    """bcrypt on a dedicated thread pool"""
+
+    def test_hash_and_verify(self):
+        """Hashes verify with the right password only"""
+        hasher = PasswordHasher(rounds=4)
+
+        async def run():
+            hashed = await hasher.hash("admin@123")
+            return hashed, await hasher.verify("admin@123", hashed), await hasher.verify("wrong", hashed)
+
+        hashed, ok, wrong = asyncio.run(run())
+        assert hashed.startswith("$2b$04$")
+        assert ok is True
+        assert wrong is False
+
+    def test_malformed_hash_fails_closed(self):
+        """A corrupt stored hash is treated as a mismatch"""
+        hasher = PasswordHasher(rounds=4)
+        assert asyncio.run(hasher.verify("admin@123", "not-a-bcrypt-hash")) is False
+        assert asyncio.run(hasher.verify("admin@123", None)) is False
+
+    def test_needs_rehash_on_cost_change(self):
+        """Hashes with another cost factor are flagged for rehash on login"""
+        old_hash = bcrypt.hashpw(b"admin@123", bcrypt.gensalt(rounds=4)).decode()
+        assert PasswordHasher(rounds=4).needs_rehash(old_hash) is False
+        assert PasswordHasher(rounds=5).needs_rehash(old_hash) is True
+        assert PasswordHasher(rounds=4).needs_rehash("garbage") is True
+
+    def test_busy_when_queue_full(self):
+        """Callers beyond the pending limit are rejected instead of queueing forever"""
+        hasher = PasswordHasher(rounds=12, max_workers=1, max_pending=0, acquire_timeout=0.01)
+
+        async def run():
+            return await asyncio.gather(*(hasher.hash("x") for _ in range(3)), return_exceptions=True)
+
+        results = asyncio.run(run())
+        hasher.shutdown()
+        assert any(isinstance(r, PasswordHasherBusy) for r in results)
+        assert any(isinstance(r, str) for r in results)
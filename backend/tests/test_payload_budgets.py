@@ -0,0 +1,111 @@
+"""
+Backend API Tests for List Payload Budgets
+Tests: Lean list projections (no ID photos / OCR text), per-item size budgets, detail endpoints
+"""
+import pytest
+import requests
+import os
+import uuid
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+# Average bytes per list item; a base64 ID photo alone is hundreds of KB
+USER_ITEM_BUDGET = 600
+VERIFICATION_ITEM_BUDGET = 1000
+LOYALTY_BILL_ITEM_BUDGET = 400
+
+
+def assert_within_budget(response, budget, heavy_fields):
+    """List items stay under the average size budget and carry no heavy fields"""
+    assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+    data = response.json()
+    assert isinstance(data, list), "Response should be a list"
+    for item in data:
+        for field in heavy_fields:
+            assert field not in item, f"Heavy field '{field}' returned in list view"
+    if data:
+        per_item = len(response.content) / len(data)
+        assert per_item <= budget, f"{per_item:.0f} bytes per item exceeds budget of {budget}"
+    return data
+
+
+class TestAdminListBudgets:
+    """Admin list views stay lean"""
+
+    @pytest.fixture
+    def admin_headers(self):
+        """Get admin auth headers"""
+        response = requests.post(f"{BASE_URL}/api/admin/login", json={
+            "username": "admin",
+            "password": "admin@123"
+        })
+        if response.status_code != 200:
+            pytest.skip("Admin login failed")
+        return {"Authorization": f"Bearer {response.json()['token']}"}
+
+    def test_user_lists(self, admin_headers):
+        """GET /api/admin/users (and student / non-student splits) within budget"""
+        for path in ("/api/admin/users", "/api/admin/users/students", "/api/admin/users/non-students"):
+            response = requests.get(f"{BASE_URL}{path}", headers=admin_headers)
+            assert_within_budget(response, USER_ITEM_BUDGET, ["firebase_uid"])
+        print(f"✓ User lists within {USER_ITEM_BUDGET} bytes per user")
+
+    def test_pending_verifications(self, admin_headers):
+        """GET /api/admin/verifications/pending omits the ID photo and OCR text"""
+        response = requests.get(f"{BASE_URL}/api/admin/verifications/pending", headers=admin_headers)
+        data = assert_within_budget(response, VERIFICATION_ITEM_BUDGET, ["image_data", "extracted_text"])
+
+        if data:
+            detail = requests.get(f"{BASE_URL}/api/admin/verifications/{data[0]['id']}", headers=admin_headers)
+            assert detail.status_code == 200
+            assert "image_data" in detail.json(), "Detail view should include the ID photo"
+        print(f"✓ Pending verifications within {VERIFICATION_ITEM_BUDGET} bytes per item")
+
+    def test_detail_not_found(self, admin_headers):
+        """Detail endpoints return 404 for unknown ids"""
+        fake_id = str(uuid.uuid4())
+        assert requests.get(f"{BASE_URL}/api/admin/users/{fake_id}", headers=admin_headers).status_code == 404
+        assert requests.get(f"{BASE_URL}/api/admin/verifications/{fake_id}", headers=admin_headers).status_code == 404
+        print("✓ Unknown user / verification ids return 404")
+
+
+class TestLoyaltyHistoryBudget:
+    """User loyalty history stays lean"""
+
+    @pytest.fixture
+    def user_headers(self):
+        """Create a test user and get auth headers"""
+        test_phone = f"+1555{str(uuid.uuid4())[:7].replace('-', '')}"
+        otp_response = requests.post(f"{BASE_URL}/api/auth/send-otp", json={"phone_number": test_phone})
+        if otp_response.status_code != 200:
+            pytest.skip(f"OTP send failed: {otp_response.text}")
+        message = otp_response.json().get("message", "")
+        if "Mock OTP:" not in message:
+            pytest.skip("Could not get mock OTP")
+
+        verify_response = requests.post(f"{BASE_URL}/api/auth/verify-otp", json={
+            "phone_number": test_phone,
+            "otp_code": message.split("Mock OTP:")[1].strip()
+        })
+        if verify_response.status_code != 200:
+            pytest.skip(f"OTP verify failed: {verify_response.text}")
+        data = verify_response.json()
+        if data.get("is_new_user"):
+            register_response = requests.post(f"{BASE_URL}/api/auth/register", json={
+                "phone_number": test_phone,
+                "name": "TEST_PayloadBudgetUser"
+            })
+            if register_response.status_code != 200:
+                pytest.skip(f"Registration failed: {register_response.text}")
+            data = register_response.json()
+        return {"Authorization": f"Bearer {data['token']}"}
+
+    def test_history_list_and_detail(self, user_headers):
+        """GET /api/loyalty/history omits OCR text; unknown bills return 404"""
+        response = requests.get(f"{BASE_URL}/api/loyalty/history", headers=user_headers)
+        assert_within_budget(response, LOYALTY_BILL_ITEM_BUDGET, ["extracted_text"])
+
+        fake_id = str(uuid.uuid4())
+        detail = requests.get(f"{BASE_URL}/api/loyalty/history/{fake_id}", headers=user_headers)
+        assert detail.status_code == 404, f"Expected 404, got {detail.status_code}"
+        print(f"✓ Loyalty history within {LOYALTY_BILL_ITEM_BUDGET} bytes per bill")
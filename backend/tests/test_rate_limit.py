@@ -0,0 +1,146 @@
+"""
+Rate Limiting Tests
+Tests: Token bucket refill, per-IP / per-user / per-route buckets, 429 with Retry-After,
+rejected clients not draining shared buckets
+"""
+import asyncio
+import pytest
+import httpx
+import jwt
+from fastapi import FastAPI
+
+from rate_limit import RateLimit, RateLimitMiddleware, MemoryBucketStore
+
+SECRET = "rate-limit-test-secret-32-bytes-long!"
+
+
+def build_client(rules, **kwargs):
+    app = FastAPI()
+
+    @app.post("/api/limited")
+    async def limited():
+        return {"ok": True}
+
+    @app.get("/api/open")
+    async def open_route():
+        return {"ok": True}
+
+    wrapped = RateLimitMiddleware(app, rules, jwt_secret=SECRET, **kwargs)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=wrapped, client=("10.0.0.1", 1234)), base_url="http://test")
+
+
+async def statuses(client, n, **kwargs):
+    return [(await client.post("/api/limited", **kwargs)).status_code for _ in range(n)]
+
+
+class TestTokenBucket:
+    """In-memory bucket arithmetic"""
+
+    def test_burst_then_refill(self):
+        """Capacity allows a burst; tokens come back at the refill rate"""
+        store = MemoryBucketStore()
+        limit = RateLimit(2, 10)  # 0.2 tokens per second
+
+        async def run():
+            results = [await store.take("k", limit, 100.0) for _ in range(3)]
+            results.append(await store.take("k", limit, 105.0))
+            return results
+
+        (a, _), (b, _), (c, wait), (d, _) = asyncio.run(run())
+        assert (a, b, c, d) == (True, True, False, True)
+        assert wait == pytest.approx(5.0)
+
+
+class TestRateLimitMiddleware:
+    """Middleware behaviour on limited and unlimited routes"""
+
+    def test_429_with_retry_after(self):
+        """Requests over the limit get 429 and a Retry-After header"""
+        async def run():
+            async with build_client({("POST", "/api/limited"): [RateLimit(2, 60)]}) as client:
+                codes = await statuses(client, 2)
+                rejected = await client.post("/api/limited")
+                return codes, rejected
+
+        codes, rejected = asyncio.run(run())
+        assert codes == [200, 200]
+        assert rejected.status_code == 429
+        assert int(rejected.headers["retry-after"]) == 30
+
+    def test_unlimited_routes_pass(self):
+        """Routes without rules are never throttled"""
+        async def run():
+            async with build_client({("POST", "/api/limited"): [RateLimit(1, 60)]}) as client:
+                return [(await client.get("/api/open")).status_code for _ in range(20)]
+
+        assert set(asyncio.run(run())) == {200}
+
+    def test_per_user_buckets(self):
+        """User-scoped limits are tracked per JWT user, not per IP"""
+        def auth(user_id):
+            token = jwt.encode({"user_id": user_id}, SECRET, algorithm="HS256")
+            return {"headers": {"Authorization": f"Bearer {token}"}}
+
+        async def run():
+            async with build_client({("POST", "/api/limited"): [RateLimit(1, 60, "user")]}) as client:
+                return await statuses(client, 2, **auth("a")) + await statuses(client, 1, **auth("b"))
+
+        assert asyncio.run(run()) == [200, 429, 200]
+
+    def test_forged_token_falls_back_to_ip(self):
+        """A token with a bad signature cannot mint fresh user buckets"""
+        async def run():
+            async with build_client({("POST", "/api/limited"): [RateLimit(1, 60, "user")]}) as client:
+                codes = []
+                for i in range(2):
+                    token = jwt.encode({"user_id": f"fake-{i}"}, "wrong-secret-that-is-also-32-bytes-long", algorithm="HS256")
+                    codes += await statuses(client, 1, headers={"Authorization": f"Bearer {token}"})
+                return codes
+
+        assert asyncio.run(run()) == [200, 429]
+
+    def test_route_scope_is_shared(self):
+        """Route-scoped limits are shared by every client"""
+        async def run():
+            async with build_client({("POST", "/api/limited"): [RateLimit(1, 60, "route")]}, trust_forwarded_for=True) as client:
+                first = await statuses(client, 1, headers={"X-Forwarded-For": "1.1.1.1"})
+                second = await statuses(client, 1, headers={"X-Forwarded-For": "2.2.2.2"})
+                return first + second
+
+        assert asyncio.run(run()) == [200, 429]
+
+    def test_rejected_ip_does_not_drain_route_bucket(self):
+        """Requests refused by a client's own bucket cost nothing from the shared route bucket"""
+        rules = {("POST", "/api/limited"): [RateLimit(10, 600, "route"), RateLimit(2, 600, "ip")]}
+
+        async def run():
+            async with build_client(rules, trust_forwarded_for=True) as client:
+                flood = await statuses(client, 30, headers={"X-Forwarded-For": "1.1.1.1"})
+                other = await statuses(client, 8, headers={"X-Forwarded-For": "2.2.2.2"})
+                return flood, other
+
+        flood, other = asyncio.run(run())
+        assert flood == [200, 200] + [429] * 28
+        assert other == [200, 200] + [429] * 6  # its own ip limit, not an empty route bucket
+
+    def test_refund_when_a_later_bucket_rejects(self):
+        """A token taken from the ip bucket is refunded when the route bucket rejects"""
+        store = MemoryBucketStore()
+        rules = {("POST", "/api/limited"): [RateLimit(1, 600, "route"), RateLimit(2, 600, "ip")]}
+
+        async def run():
+            async with build_client(rules, store=store, trust_forwarded_for=True) as client:
+                codes = await statuses(client, 1, headers={"X-Forwarded-For": "2.2.2.2"})
+                codes += await statuses(client, 2, headers={"X-Forwarded-For": "1.1.1.1"})
+                return codes
+
+        assert asyncio.run(run()) == [200, 429, 429]
+        assert store._buckets["POST:/api/limited:ip:ip:1.1.1.1"][0] == pytest.approx(2, abs=0.01)
+
+    def test_disabled(self):
+        """RATE_LIMIT_ENABLED=false turns the middleware into a pass-through"""
+        async def run():
+            async with build_client({("POST", "/api/limited"): [RateLimit(1, 60)]}, enabled=False) as client:
+                return await statuses(client, 3)
+
+        assert asyncio.run(run()) == [200, 200, 200]
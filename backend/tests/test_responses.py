@@ -0,0 +1,103 @@
+"""
+Response Encoding Tests
+Tests: orjson rendering, Accept-Encoding negotiation, compression thresholds and pass-through cases
+"""
+import asyncio
+import gzip
+from datetime import datetime, timezone
+
+import httpx
+from fastapi import FastAPI
+from starlette.responses import Response, StreamingResponse
+
+from responses import CompressionMiddleware, OrjsonResponse, choose_encoding
+
+ROWS = [{"id": str(i), "name": f"Student {i}", "points": i * 10, "extracted_text": "TOTAL 250.00 " * 20}
+        for i in range(50)]
+
+
+def make_app():
+    app = FastAPI(default_response_class=OrjsonResponse)
+
+    @app.get("/big")
+    async def big():
+        return OrjsonResponse(ROWS)
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/pdf")
+    async def pdf():
+        return Response(b"%PDF-" + b"x" * 5000, media_type="application/pdf")
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for _ in range(3):
+                yield b"a" * 4000
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    return CompressionMiddleware(app, minimum_size=1024)
+
+
+def get(path, accept_encoding="gzip"):
+    async def run():
+        transport = httpx.ASGITransport(app=make_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            # Raw bytes: httpx would otherwise decode gzip transparently
+            request = client.build_request("GET", path, headers={"Accept-Encoding": accept_encoding})
+            response = await client.send(request, stream=True)
+            raw = b"".join([chunk async for chunk in response.aiter_raw()])
+            return response, raw
+    return asyncio.run(run())
+
+
+class TestOrjsonResponse:
+    """OrjsonResponse rendering"""
+
+    def test_renders_native_and_fallback_types(self):
+        """Datetimes, non-string keys and unknown types all serialize"""
+        body = OrjsonResponse({"at": datetime(2026, 1, 2, tzinfo=timezone.utc), 1: {"a"}, "n": None}).body
+        assert body == b'{"at":"2026-01-02T00:00:00+00:00","1":["a"],"n":null}'
+
+
+class TestChooseEncoding:
+    """Accept-Encoding negotiation"""
+
+    def test_preferences(self):
+        """Brotli wins when available; q=0 and unknown codings are respected"""
+        assert choose_encoding("gzip, deflate, br", brotli_available=True) == "br"
+        assert choose_encoding("gzip, deflate, br", brotli_available=False) == "gzip"
+        assert choose_encoding("br;q=0, gzip;q=0.5", brotli_available=True) == "gzip"
+        assert choose_encoding("*", brotli_available=False) == "gzip"
+        assert choose_encoding("gzip;q=0, identity") is None
+        assert choose_encoding("") is None
+
+
+class TestCompressionMiddleware:
+    """CompressionMiddleware"""
+
+    def test_large_json_is_gzipped(self):
+        """Bodies over the threshold are compressed with matching headers"""
+        response, raw = get("/big")
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["content-length"] == str(len(raw))
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert gzip.decompress(raw) == OrjsonResponse(ROWS).body
+
+    def test_small_and_unaccepted_pass_through(self):
+        """Small bodies and clients without gzip get the identity encoding"""
+        response, raw = get("/small")
+        assert "content-encoding" not in response.headers
+        assert raw == b'{"ok":true}'
+        response, raw = get("/big", accept_encoding="identity")
+        assert "content-encoding" not in response.headers
+        assert raw == OrjsonResponse(ROWS).body
+
+    def test_binary_and_streamed_pass_through(self):
+        """PDFs and streamed bodies are never compressed"""
+        for path, size in (("/pdf", 5005), ("/stream", 12000)):
+            response, raw = get(path)
+            assert "content-encoding" not in response.headers
+            assert len(raw) == size
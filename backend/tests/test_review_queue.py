@@ -0,0 +1,95 @@
+"""
+Verification Review Queue Tests
+Tests: Claim filters and leases, batched decision operations, thumbnails
+"""
+import asyncio
+import io
+from datetime import datetime, timezone
+
+from PIL import Image
+
+from review_queue import (MAX_CLAIM, Decision, claim_batch, claimable_filter, make_thumbnail, user_operations,
+                          verification_operations)
+
+NOW = datetime(2026, 5, 1, 10, 0, tzinfo=timezone.utc)
+
+
+class FakeQueue:
+    """Hands out queued docs in order and records each claim call"""
+
+    def __init__(self, docs):
+        self.docs = list(docs)
+        self.calls = []
+
+    async def find_one_and_update(self, query, update, **kwargs):
+        self.calls.append((query, update, kwargs))
+        return {**self.docs.pop(0), **update["$set"]} if self.docs else None
+
+
+class TestClaims:
+    """Leases"""
+
+    def test_claimable_filter(self):
+        """Unclaimed, expired and own items are claimable; already-claimed ids are skipped"""
+        query = claimable_filter("admin-1", NOW, ["v1"])
+        assert query["status"] == "pending"
+        assert {"claimed_by": None} in query["$or"]
+        assert {"claimed_by": "admin-1"} in query["$or"]
+        assert {"claim_expires_at": {"$lte": NOW.isoformat()}} in query["$or"]
+        assert query["id"] == {"$nin": ["v1"]}
+
+    def test_claim_batch_sets_lease(self):
+        """Each claim excludes earlier ones, sets the lease and stops when the queue is empty"""
+        queue = FakeQueue([{"id": "v1"}, {"id": "v2"}])
+        claimed = asyncio.run(claim_batch(queue, "admin-1", 5, NOW, lease_seconds=60))
+        assert [c["id"] for c in claimed] == ["v1", "v2"]
+        assert claimed[0]["claim_expires_at"] == "2026-05-01T10:01:00+00:00"
+        assert "id" not in queue.calls[0][0]
+        assert queue.calls[2][0]["id"] == {"$nin": ["v1", "v2"]}
+        assert queue.calls[0][2]["sort"] == [("created_at", 1)]
+        assert queue.calls[0][2]["projection"]["image_data"] == 0
+
+    def test_claim_batch_is_capped(self):
+        """No admin can claim more than MAX_CLAIM at once"""
+        queue = FakeQueue([{"id": f"v{i}"} for i in range(50)])
+        assert len(asyncio.run(claim_batch(queue, "admin-1", 500, NOW))) == MAX_CLAIM
+
+
+class TestDecisions:
+    """Bulk decision operations"""
+
+    decisions = [Decision("v1", "approve"), Decision("v2", "reject", "Blurry photo"), Decision("v3", "reject")]
+    verifications = {"v1": {"user_id": "u1"}, "v2": {"user_id": "u2"}, "v3": {"user_id": "u3"}}
+
+    def test_verification_updates_guard_leases(self):
+        """Updates only match pending items not leased to another admin, tagged with the batch id"""
+        ops = verification_operations(self.decisions, "admin-1", "batch-1", NOW)
+        query, update = ops[1]._filter, ops[1]._doc["$set"]
+        assert query["id"] == "v2" and query["status"] == "pending"
+        assert {"claimed_by": "admin-1"} in query["$or"]
+        assert update["status"] == "rejected" and update["rejection_reason"] == "Blurry photo"
+        assert update["decision_batch"] == "batch-1" and update["claimed_by"] is None
+        assert "rejection_reason" not in ops[0]._doc["$set"]
+
+    def test_user_updates(self):
+        """Approvals set loyalty from DOB eligibility; rejections get a default reason"""
+        users = {"u1": {"id": "u1", "dob": "2005-01-01"}}
+        ops, loyalty = user_operations(self.decisions, self.verifications, users, lambda dob: dob == "2005-01-01")
+        assert loyalty == {"v1": True}
+        assert ops[0]._filter == {"id": "u1"}
+        assert ops[0]._doc["$set"] == {"verification_status": "approved", "loyalty_active": True,
+                                       "rejection_reason": None}
+        assert ops[1]._doc["$set"]["rejection_reason"] == "Blurry photo"
+        assert ops[2]._doc["$set"]["rejection_reason"] == "Student ID verification rejected by admin"
+
+
+class TestThumbnail:
+    """Queue thumbnails"""
+
+    def test_thumbnail_is_small_jpeg(self):
+        """Large photos shrink to fit the thumbnail box, keeping aspect ratio"""
+        source = io.BytesIO()
+        Image.new("RGBA", (2000, 1000), (200, 30, 30, 255)).save(source, format="PNG")
+        thumb = Image.open(io.BytesIO(make_thumbnail(source.getvalue(), size=320)))
+        assert thumb.format == "JPEG"
+        assert thumb.size == (320, 160)
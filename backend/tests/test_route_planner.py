@@ -0,0 +1,77 @@
+"""
+Route Planner Tests
+Tests: Sweep batching, nearest-neighbour + 2-opt tours, plan output shape
+"""
+import itertools
+import random
+
+import numpy as np
+
+from route_planner import distance_matrix, nearest_neighbour_tour, plan_routes, project_km, sweep_batches, tour_length, two_opt
+
+SHOP = (28.6139, 77.2090)
+
+
+def random_orders(n, seed=1, radius_deg=0.015):
+    rng = random.Random(seed)
+    return [
+        {"id": f"o{i}", "latitude": SHOP[0] + rng.uniform(-radius_deg, radius_deg),
+         "longitude": SHOP[1] + rng.uniform(-radius_deg, radius_deg), "delivery_address": f"Addr {i}"}
+        for i in range(n)
+    ]
+
+
+class TestTours:
+    """TSP heuristics"""
+
+    def test_two_opt_never_worse(self):
+        """2-opt only ever shortens the nearest-neighbour tour"""
+        for seed in range(20):
+            rng = np.random.default_rng(seed)
+            points = np.vstack([np.zeros((1, 2)), rng.uniform(-2, 2, size=(12, 2))])
+            dist = distance_matrix(points)
+            nn = nearest_neighbour_tour(dist)
+            improved = two_opt(nn, dist)
+            assert tour_length(improved, dist) <= tour_length(nn, dist) + 1e-9
+            assert improved[0] == improved[-1] == 0
+            assert sorted(improved[1:-1]) == list(range(1, 13))
+
+    def test_two_opt_close_to_optimal_on_small_batches(self):
+        """Within 10% of the brute-force optimum for six stops"""
+        for seed in range(10):
+            rng = np.random.default_rng(seed)
+            points = np.vstack([np.zeros((1, 2)), rng.uniform(-2, 2, size=(6, 2))])
+            dist = distance_matrix(points)
+            best = min(tour_length([0, *perm, 0], dist) for perm in itertools.permutations(range(1, 7)))
+            planned = tour_length(two_opt(nearest_neighbour_tour(dist), dist), dist)
+            assert planned <= best * 1.10
+
+
+class TestPlanRoutes:
+    """Batching and output"""
+
+    def test_every_order_routed_once(self):
+        """Each order appears in exactly one batch, batches respect max_stops"""
+        orders = random_orders(47)
+        plan = plan_routes(SHOP, orders, max_stops=6)
+        routed = [s["order_id"] for r in plan["routes"] for s in r["stops"]]
+        assert sorted(routed) == sorted(o["id"] for o in orders)
+        assert all(len(r["stops"]) <= 6 for r in plan["routes"])
+        assert len(plan["routes"]) == 8
+
+    def test_orders_without_coordinates_are_unrouted(self):
+        """Legacy orders with no saved location are reported separately"""
+        orders = random_orders(3) + [{"id": "legacy", "delivery_address": "Old order"}]
+        plan = plan_routes(SHOP, orders)
+        assert plan["unrouted_order_ids"] == ["legacy"]
+
+    def test_sweep_groups_by_direction(self):
+        """Orders north and south of the shop end up in different batches"""
+        points = project_km(SHOP, [SHOP[0] + 0.01] * 3 + [SHOP[0] - 0.01] * 3,
+                            [SHOP[1] + d for d in (-0.001, 0, 0.001)] * 2)
+        batches = sweep_batches(points, max_stops=3)
+        assert sorted(sorted(b) for b in batches) == [[0, 1, 2], [3, 4, 5]]
+
+    def test_empty(self):
+        """No pending orders, no routes"""
+        assert plan_routes(SHOP, []) == {"routes": [], "unrouted_order_ids": []}
@@ -0,0 +1,220 @@
+"""
+Background Scheduler Tests
+Tests: Cron schedule parsing and next-run computation, job leases and occurrence markers, admin job endpoints
+"""
+import asyncio
+import pytest
+import requests
+import os
+from datetime import datetime, timezone
+
+from pymongo.errors import DuplicateKeyError
+
+from scheduler import CronSchedule, JobScheduler
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+
+class TestCronSchedule:
+    """Wall-clock cron schedule tests (no server required)"""
+
+    def test_daily_schedule_is_fixed_wall_clock(self):
+        """Daily job runs at the configured time, not relative to boot"""
+        schedule = CronSchedule("5 0 * * *", tz="UTC")
+        after = datetime(2026, 3, 10, 13, 47, 12, tzinfo=timezone.utc)
+        assert schedule.next_after(after) == datetime(2026, 3, 11, 0, 5, tzinfo=timezone.utc)
+
+    def test_next_run_is_strictly_after(self):
+        """An occurrence exactly at `after` is not returned again"""
+        schedule = CronSchedule("5 0 * * *", tz="UTC")
+        after = datetime(2026, 3, 11, 0, 5, tzinfo=timezone.utc)
+        assert schedule.next_after(after) == datetime(2026, 3, 12, 0, 5, tzinfo=timezone.utc)
+
+    def test_steps_ranges_and_lists(self):
+        """*/n, a-b and comma lists are supported"""
+        schedule = CronSchedule("*/15 9-10,18 * * *", tz="UTC")
+        assert schedule.minutes == {0, 15, 30, 45}
+        assert schedule.hours == {9, 10, 18}
+        after = datetime(2026, 3, 10, 10, 50, tzinfo=timezone.utc)
+        assert schedule.next_after(after) == datetime(2026, 3, 10, 18, 0, tzinfo=timezone.utc)
+
+    def test_day_of_week_sunday_aliases(self):
+        """Day-of-week 0 and 7 both mean Sunday"""
+        after = datetime(2026, 3, 10, 0, 0, tzinfo=timezone.utc)  # Tuesday
+        expected = datetime(2026, 3, 15, 6, 0, tzinfo=timezone.utc)  # Sunday
+        assert CronSchedule("0 6 * * 0", tz="UTC").next_after(after) == expected
+        assert CronSchedule("0 6 * * 7", tz="UTC").next_after(after) == expected
+
+    def test_day_of_month_or_day_of_week(self):
+        """When both day fields are restricted either one matching is enough"""
+        schedule = CronSchedule("0 0 1 * 1", tz="UTC")
+        after = datetime(2026, 3, 10, 0, 0, tzinfo=timezone.utc)  # Tuesday
+        assert schedule.next_after(after) == datetime(2026, 3, 16, 0, 0, tzinfo=timezone.utc)  # Monday
+
+    def test_leap_day(self):
+        """Rare schedules are found without scanning minute by minute"""
+        schedule = CronSchedule("0 0 29 2 *", tz="UTC")
+        after = datetime(2026, 3, 1, tzinfo=timezone.utc)
+        assert schedule.next_after(after) == datetime(2028, 2, 29, tzinfo=timezone.utc)
+
+    def test_schedule_timezone(self):
+        """Schedules are evaluated in their own timezone and returned in UTC"""
+        schedule = CronSchedule("0 0 * * *", tz="Asia/Kolkata")
+        after = datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc)
+        assert schedule.next_after(after) == datetime(2026, 3, 10, 18, 30, tzinfo=timezone.utc)
+
+    @pytest.mark.parametrize("expression", ["* * * *", "60 * * * *", "* * 0 * *", "*/0 * * * *", "5-1 * * * *"])
+    def test_invalid_expressions(self, expression):
+        """Malformed or out-of-range expressions are rejected at registration"""
+        with pytest.raises(ValueError):
+            CronSchedule(expression, tz="UTC")
+
+
+def matches(doc, query):
+    for key, cond in query.items():
+        value = doc.get(key)
+        if isinstance(cond, dict) and "$lte" in cond:
+            if value is None or value > cond["$lte"]:
+                return False
+        elif isinstance(cond, dict) and "$ne" in cond:
+            if value == cond["$ne"]:
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+class FakeLeases:
+    """scheduler_leases in memory, with upserts colliding on _id like a real collection"""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def find_one_and_update(self, query, update, upsert=False, return_document=None):
+        doc = self.docs.get(query["_id"])
+        if doc is not None and matches(doc, query):
+            doc.update(update["$set"])
+            return dict(doc)
+        if not upsert:
+            return None
+        if doc is not None:
+            raise DuplicateKeyError("E11000 duplicate key error")
+        self.docs[query["_id"]] = {"_id": query["_id"], **update["$set"]}
+        return dict(self.docs[query["_id"]])
+
+    async def update_one(self, query, update):
+        doc = self.docs.get(query["_id"])
+        if doc is not None and matches(doc, query):
+            doc.update(update["$set"])
+
+
+class FakeDB:
+    def __init__(self):
+        self.scheduler_leases = FakeLeases()
+
+
+class TestJobLease:
+    """Lease acquire / release against a fake scheduler_leases collection (no server required)"""
+
+    def make(self, db, worker_id):
+        scheduler = JobScheduler(db, worker_id=worker_id)
+        scheduler.register("nightly", lambda: None, cron="5 0 * * *", lease_seconds=60)
+        return scheduler, scheduler.jobs["nightly"]
+
+    def test_one_worker_per_occurrence(self):
+        """A held lease blocks other workers; a released one still blocks re-running the same occurrence"""
+        db = FakeDB()
+        a, job = self.make(db, "worker-a")
+        b, _ = self.make(db, "worker-b")
+
+        async def run():
+            assert await a._acquire_lease(job, "2026-03-11T00:05:00+00:00")
+            assert not await b._acquire_lease(job, "2026-03-11T00:05:00+00:00")
+            assert not await b._acquire_lease(job, "2026-03-12T00:05:00+00:00")  # still held
+            await a._release_lease(job, "2026-03-11T00:05:00+00:00")
+            assert not await b._acquire_lease(job, "2026-03-11T00:05:00+00:00")  # occurrence already ran
+            assert await b._acquire_lease(job, "2026-03-12T00:05:00+00:00")
+
+        asyncio.run(run())
+        lease = db.scheduler_leases.docs["nightly"]
+        assert lease["owner"] == "worker-b" and lease["occurrence"] == "2026-03-12T00:05:00+00:00"
+
+    def test_release_only_by_owner(self):
+        """Releasing someone else's lease (or an older occurrence) leaves it held"""
+        db = FakeDB()
+        a, job = self.make(db, "worker-a")
+        b, _ = self.make(db, "worker-b")
+
+        async def run():
+            assert await a._acquire_lease(job, "2026-03-11T00:05:00+00:00")
+            await b._release_lease(job, "2026-03-11T00:05:00+00:00")
+            await a._release_lease(job, "2026-03-10T00:05:00+00:00")
+            return await b._acquire_lease(job, "2026-03-12T00:05:00+00:00")
+
+        assert not asyncio.run(run())
+        assert db.scheduler_leases.docs["nightly"]["expires_at"] > datetime.now(timezone.utc)
+
+
+class TestAdminJobs:
+    """Admin background job endpoints"""
+
+    @pytest.fixture
+    def admin_token(self):
+        """Get admin token for authenticated requests"""
+        response = requests.post(f"{BASE_URL}/api/admin/login", json={
+            "username": "admin",
+            "password": "admin@123"
+        })
+        if response.status_code != 200:
+            pytest.skip("Admin login failed")
+        return response.json()["token"]
+
+    def test_list_jobs(self, admin_token):
+        """Test GET /api/admin/jobs lists the loyalty expiry job"""
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        response = requests.get(f"{BASE_URL}/api/admin/jobs", headers=headers)
+
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        jobs = {job["name"]: job for job in response.json()}
+        assert "loyalty_expiry" in jobs, "loyalty_expiry job not registered"
+        assert "next_run_at" in jobs["loyalty_expiry"], "next_run_at missing"
+        print(f"✓ GET /api/admin/jobs returned {len(jobs)} jobs")
+
+    def test_trigger_records_run(self, admin_token):
+        """Test manual trigger records a run with duration"""
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        response = requests.post(f"{BASE_URL}/api/admin/jobs/loyalty_expiry/trigger", headers=headers)
+
+        assert response.status_code in [200, 409], f"Expected 200/409, got {response.status_code}: {response.text}"
+        if response.status_code == 200:
+            run = response.json()
+            assert run["trigger"] == "manual"
+            assert "duration_ms" in run, "duration_ms missing from run"
+
+            runs = requests.get(f"{BASE_URL}/api/admin/jobs/loyalty_expiry/runs?limit=5", headers=headers).json()
+            assert any(r["id"] == run["id"] for r in runs), "Run not found in history"
+        print(f"✓ Manual job trigger recorded")
+
+    def test_pause_and_resume(self, admin_token):
+        """Test pausing and resuming a job"""
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        response = requests.post(f"{BASE_URL}/api/admin/jobs/loyalty_expiry/pause?paused=true", headers=headers)
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+
+        jobs = {job["name"]: job for job in requests.get(f"{BASE_URL}/api/admin/jobs", headers=headers).json()}
+        assert jobs["loyalty_expiry"]["paused"] is True
+
+        response = requests.post(f"{BASE_URL}/api/admin/jobs/loyalty_expiry/pause?paused=false", headers=headers)
+        assert response.status_code == 200
+        print(f"✓ Job pause/resume works")
+
+    def test_unknown_job(self, admin_token):
+        """Test unknown job returns 404"""
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        response = requests.post(f"{BASE_URL}/api/admin/jobs/does_not_exist/trigger", headers=headers)
+        assert response.status_code == 404, f"Expected 404, got {response.status_code}"
+
+    def test_jobs_require_auth(self):
+        """Test job endpoints require authentication"""
+        response = requests.get(f"{BASE_URL}/api/admin/jobs")
+        assert response.status_code in [401, 403], f"Expected 401/403, got {response.status_code}"
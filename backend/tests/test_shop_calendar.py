@@ -0,0 +1,144 @@
+"""
+Shop Calendar Tests
+Tests: Open-day counting, missed-day points reset rule, batch reset cutoff, open/closed status
+"""
+import random
+import pytest
+from datetime import date, datetime, time, timedelta, timezone
+
+from shop_calendar import ShopCalendar, ShopStatusIndex
+
+
+def naive_open_days(calendar, start, end):
+    """Reference day-by-day count"""
+    count = 0
+    day = start
+    while day <= end:
+        if calendar.is_open_day(day):
+            count += 1
+        day += timedelta(days=1)
+    return count
+
+
+class TestOpenDayCount:
+    """Closed-form open-day counting"""
+
+    def test_week_without_closures(self):
+        """A full week has six open days with one weekly off"""
+        calendar = ShopCalendar(weekly_off_day=1, tz="UTC")
+        assert calendar.count_open_days(date(2026, 3, 9), date(2026, 3, 15)) == 6
+
+    def test_weekly_off_uses_setting(self):
+        """Weekly off day follows Settings.weekly_off_day, not a hard-coded Tuesday"""
+        calendar = ShopCalendar(weekly_off_day=6, tz="UTC")  # Sunday
+        assert calendar.is_open_day(date(2026, 3, 10))  # Tuesday
+        assert not calendar.is_open_day(date(2026, 3, 15))  # Sunday
+
+    def test_closed_days_excluded_once(self):
+        """A closed date on the weekly off day is not subtracted twice"""
+        calendar = ShopCalendar(weekly_off_day=1, closed_dates=[date(2026, 3, 10), date(2026, 3, 12)], tz="UTC")
+        assert calendar.count_open_days(date(2026, 3, 9), date(2026, 3, 15)) == 5
+
+    def test_empty_range(self):
+        """Reversed ranges contain no days"""
+        calendar = ShopCalendar(tz="UTC")
+        assert calendar.count_open_days(date(2026, 3, 15), date(2026, 3, 9)) == 0
+
+    @pytest.mark.parametrize("weekly_off_day", [None, 0, 1, 6])
+    def test_matches_day_by_day_count(self, weekly_off_day):
+        """Closed-form count agrees with a day-by-day walk"""
+        rng = random.Random(weekly_off_day)
+        base = date(2026, 1, 1)
+        closed = [base + timedelta(days=rng.randrange(400)) for _ in range(40)]
+        calendar = ShopCalendar(weekly_off_day=weekly_off_day, closed_dates=closed, tz="UTC")
+        for _ in range(300):
+            start = base + timedelta(days=rng.randrange(400))
+            end = start + timedelta(days=rng.randrange(-3, 60))
+            assert calendar.count_open_days(start, end) == naive_open_days(calendar, start, end)
+
+
+class TestPointsReset:
+    """Missed open days rule and batch cutoff"""
+
+    def test_today_is_not_missed(self):
+        """Only full days between the visit and today count"""
+        calendar = ShopCalendar(weekly_off_day=1, tz="UTC")
+        last_visit = datetime(2026, 3, 9, 20, 0, tzinfo=timezone.utc)  # Monday
+        now = datetime(2026, 3, 13, 9, 0, tzinfo=timezone.utc)  # Friday
+        # Tuesday off, Wednesday and Thursday missed
+        assert calendar.missed_open_days(last_visit, now) == 2
+        assert not calendar.should_reset_points(last_visit, now)
+        assert calendar.should_reset_points(last_visit, now + timedelta(days=1))
+
+    def test_closed_days_do_not_count(self):
+        """Admin-closed days don't count toward reset"""
+        calendar = ShopCalendar(weekly_off_day=1, closed_dates=[date(2026, 3, 12)], tz="UTC")
+        last_visit = datetime(2026, 3, 9, 20, 0, tzinfo=timezone.utc)
+        assert not calendar.should_reset_points(last_visit, datetime(2026, 3, 14, 9, 0, tzinfo=timezone.utc))
+
+    def test_cutoff_matches_per_user_rule(self):
+        """last_visit < cutoff exactly when the per-user rule resets points"""
+        rng = random.Random(7)
+        closed = [date(2026, 3, 1) + timedelta(days=rng.randrange(60)) for _ in range(10)]
+        calendar = ShopCalendar(weekly_off_day=1, closed_dates=closed, tz="Asia/Kolkata")
+        now = datetime(2026, 4, 20, 7, 30, tzinfo=timezone.utc)
+        cutoff = calendar.points_reset_cutoff(now)
+        for hours_back in range(0, 24 * 40, 5):
+            last_visit = now - timedelta(hours=hours_back)
+            assert (last_visit < cutoff) == calendar.should_reset_points(last_visit, now), last_visit
+
+    def test_cutoff_spans_long_closure(self):
+        """A long closure pushes the cutoff back before it started"""
+        closure = [date(2026, 1, 1) + timedelta(days=i) for i in range(120)]
+        calendar = ShopCalendar(weekly_off_day=None, closed_dates=closure, tz="UTC")
+        cutoff = calendar.points_reset_cutoff(datetime(2026, 5, 2, 12, 0, tzinfo=timezone.utc))
+        # Open days missed: May 1 plus Dec 31 and Dec 30 before the closure
+        assert cutoff == datetime(2025, 12, 30, tzinfo=timezone.utc)
+
+
+class TestShopStatus:
+    """Open/closed status from the in-memory interval index"""
+
+    def test_weekly_off_status_and_next_open(self):
+        """Weekly off day is closed and reports when the shop reopens"""
+        calendar = ShopCalendar(weekly_off_day=1, tz="UTC", hours=(time(10, 0), time(22, 0)))
+        now = datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc)  # Tuesday
+        status = ShopStatusIndex(calendar, now).status(now)
+        assert status["is_open"] is False
+        assert status["message"] == "Closed (Weekly Off - Tuesday)"
+        assert status["next_open_at"] == datetime(2026, 3, 11, 10, 0, tzinfo=timezone.utc).isoformat()
+
+    def test_open_within_hours(self):
+        """Inside regular hours the shop is open until closing time"""
+        calendar = ShopCalendar(weekly_off_day=1, tz="UTC", hours=(time(10, 0), time(22, 0)))
+        now = datetime(2026, 3, 11, 21, 59, tzinfo=timezone.utc)
+        status = ShopStatusIndex(calendar, now).status(now)
+        assert status["is_open"] is True
+        assert status["closes_at"] == datetime(2026, 3, 11, 22, 0, tzinfo=timezone.utc).isoformat()
+
+    def test_closed_day_reason_and_special_hours(self):
+        """Closed days carry their reason; special hours replace regular hours"""
+        calendar = ShopCalendar(
+            weekly_off_day=1, tz="UTC", hours=(time(10, 0), time(22, 0)),
+            closed_dates=[date(2026, 3, 12)], closed_reasons={date(2026, 3, 12): "Diwali"},
+            special_hours={date(2026, 3, 13): (time(14, 0), time(18, 0))}
+        )
+        now = datetime(2026, 3, 12, 11, 0, tzinfo=timezone.utc)
+        index = ShopStatusIndex(calendar, now)
+        status = index.status(now)
+        assert status["message"] == "Closed (Diwali)"
+        assert status["next_open_at"] == datetime(2026, 3, 13, 14, 0, tzinfo=timezone.utc).isoformat()
+        assert index.status(datetime(2026, 3, 13, 19, 0, tzinfo=timezone.utc))["is_open"] is False
+
+    def test_overnight_hours(self):
+        """Closing time before opening time runs past midnight"""
+        calendar = ShopCalendar(weekly_off_day=None, tz="UTC", hours=(time(18, 0), time(2, 0)))
+        now = datetime(2026, 3, 11, 1, 30, tzinfo=timezone.utc)
+        assert ShopStatusIndex(calendar, now).status(now)["is_open"] is True
+
+    def test_all_day_intervals_merge(self):
+        """Without hours consecutive open days merge into one interval"""
+        calendar = ShopCalendar(weekly_off_day=1, tz="Asia/Kolkata")
+        intervals = calendar.open_intervals(date(2026, 3, 11), 6)  # Wednesday to Monday
+        assert len(intervals) == 1
+        assert intervals[0][1] - intervals[0][0] == timedelta(days=6)
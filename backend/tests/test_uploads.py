@@ -0,0 +1,126 @@
+"""
+Upload Streaming Tests
+Tests: Chunked save with hash, magic-byte check, size guard, temp cleanup, 413 middleware
+"""
+import asyncio
+import hashlib
+import io
+
+import httpx
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from starlette.datastructures import UploadFile as StarletteUploadFile
+
+from uploads import PDF_MAGIC, InvalidUploadContent, MaxBodySizeMiddleware, UploadTooLarge, save_upload
+
+PDF_BYTES = b"%PDF-1.4\n" + b"x" * 700_000 + b"\n%%EOF\n"
+
+
+def upload(data: bytes):
+    return StarletteUploadFile(io.BytesIO(data), filename="menu.pdf")
+
+
+class TestSaveUpload:
+    """save_upload"""
+
+    def test_streams_and_hashes(self, tmp_path):
+        """File lands at the final path with the right size and SHA-256"""
+        target = tmp_path / "menus" / "a.pdf"
+        stored = asyncio.run(save_upload(upload(PDF_BYTES), target, 10_000_000, magic=PDF_MAGIC, chunk_size=64 * 1024))
+        assert target.read_bytes() == PDF_BYTES
+        assert stored.size == len(PDF_BYTES)
+        assert stored.sha256 == hashlib.sha256(PDF_BYTES).hexdigest()
+        assert [p.name for p in target.parent.iterdir()] == ["a.pdf"]
+
+    def test_magic_split_across_chunks(self, tmp_path):
+        """Magic bytes are checked even when the first chunk is shorter than the magic"""
+        data = b"%PDF-1.4\n" + b"x" * 100
+        stored = asyncio.run(save_upload(upload(data), tmp_path / "b.pdf", 10_000, magic=PDF_MAGIC, chunk_size=2))
+        assert stored.size == len(data)
+
+    def test_rejects_wrong_magic(self, tmp_path):
+        """A renamed non-PDF is refused and no file is left behind"""
+        with pytest.raises(InvalidUploadContent):
+            asyncio.run(save_upload(upload(b"\x89PNG\r\n" + b"0" * 100), tmp_path / "c.pdf", 10_000, magic=PDF_MAGIC))
+        assert list(tmp_path.iterdir()) == []
+
+    def test_rejects_oversized_and_cleans_up(self, tmp_path):
+        """Exceeding max_bytes stops the copy and removes the temp file"""
+        with pytest.raises(UploadTooLarge):
+            asyncio.run(save_upload(upload(PDF_BYTES), tmp_path / "d.pdf", 100_000, magic=PDF_MAGIC))
+        assert list(tmp_path.iterdir()) == []
+
+
+class TestMaxBodySizeMiddleware:
+    """413 before the route runs"""
+
+    def make_client(self, limit):
+        app = FastAPI()
+        calls = []
+
+        @app.post("/upload")
+        async def receive_file(file: UploadFile = File(...)):
+            calls.append(file.filename)
+            return {"ok": True}
+
+        guarded = MaxBodySizeMiddleware(app, {("POST", "/upload"): limit})
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=guarded), base_url="http://test"), calls
+
+    def post(self, limit, data):
+        async def run():
+            client, calls = self.make_client(limit)
+            async with client:
+                response = await client.post("/upload", files={"file": ("menu.pdf", data, "application/pdf")})
+            return response, calls
+        return asyncio.run(run())
+
+    def test_small_body_passes(self):
+        """Bodies under the limit reach the route"""
+        response, calls = self.post(10_000, b"%PDF-1.4 small")
+        assert response.status_code == 200
+        assert calls == ["menu.pdf"]
+
+    def test_large_body_rejected_without_calling_route(self):
+        """Bodies over the limit get 413 and never reach the route"""
+        response, calls = self.post(10_000, PDF_BYTES)
+        assert response.status_code == 413
+        assert calls == []
+
+    def test_streamed_body_without_content_length(self):
+        """Chunked bodies are cut off once they pass the limit"""
+        boundary = "xyz"
+        body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"menu.pdf\"\r\n"
+                f"Content-Type: application/pdf\r\n\r\n").encode() + PDF_BYTES + f"\r\n--{boundary}--\r\n".encode()
+        chunks = [body[i:i + 65536] for i in range(0, len(body), 65536)]
+        sent = []
+
+        async def run():
+            app = FastAPI()
+
+            @app.post("/upload")
+            async def receive_file(file: UploadFile = File(...)):
+                return {"ok": True}
+
+            guarded = MaxBodySizeMiddleware(app, {("POST", "/upload"): 100_000})
+            consumed = []
+
+            async def receive():
+                chunk = chunks[len(consumed)]
+                consumed.append(chunk)
+                return {"type": "http.request", "body": chunk, "more_body": len(consumed) < len(chunks)}
+
+            async def send(message):
+                sent.append(message)
+
+            scope = {
+                "type": "http", "method": "POST", "path": "/upload", "raw_path": b"/upload",
+                "query_string": b"", "root_path": "", "scheme": "http", "http_version": "1.1",
+                "server": ("test", 80), "client": ("127.0.0.1", 1),
+                "headers": [(b"content-type", f"multipart/form-data; boundary={boundary}".encode())]
+            }
+            await guarded(scope, receive, send)
+            return consumed
+
+        consumed = asyncio.run(run())
+        assert sent[0]["status"] == 413
+        assert len(consumed) < len(chunks)
@@ -0,0 +1,225 @@
+"""
+User Purge Tests
+Tests: Cascading chunked deletes, per-collection counts, resume after failure, transactions, job lease,
+lease takeover
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from user_purge import UserPurger, supports_transactions
+
+
+def matches(doc, query):
+    for key, cond in query.items():
+        if key == "$or":
+            if not any(matches(doc, q) for q in cond):
+                return False
+        elif isinstance(cond, dict) and "$in" in cond:
+            if doc.get(key) not in cond["$in"]:
+                return False
+        elif isinstance(cond, dict) and "$lte" in cond:
+            if doc.get(key) is None or doc[key] > cond["$lte"]:
+                return False
+        elif doc.get(key) != cond:
+            return False
+    return True
+
+
+class FakeCollection:
+    """The handful of Motor collection calls the purger makes, in memory"""
+
+    def __init__(self, docs=()):
+        self.docs = [dict(d) for d in docs]
+        self.sessions = []
+
+    async def delete_many(self, query, session=None):
+        self.sessions.append(session)
+        keep = [d for d in self.docs if not matches(d, query)]
+        deleted = len(self.docs) - len(keep)
+        self.docs = keep
+        return SimpleNamespace(deleted_count=deleted)
+
+    async def insert_one(self, doc):
+        self.docs.append(dict(doc))
+
+    def _apply(self, doc, update):
+        doc.update(update.get("$set", {}))
+        for path, amount in update.get("$inc", {}).items():
+            parent, _, key = path.rpartition(".")
+            target = doc[parent] if parent else doc
+            target[key] = target.get(key, 0) + amount
+
+    async def update_one(self, query, update, session=None):
+        for doc in self.docs:
+            if matches(doc, query):
+                self._apply(doc, update)
+                return SimpleNamespace(matched_count=1)
+        return SimpleNamespace(matched_count=0)
+
+    async def find_one(self, query, projection=None):
+        for doc in self.docs:
+            if matches(doc, query):
+                return {k: v for k, v in doc.items() if (projection or {}).get(k, 1)}
+        return None
+
+    async def find_one_and_update(self, query, update, projection=None, return_document=None):
+        for doc in self.docs:
+            if matches(doc, query):
+                self._apply(doc, update)
+                return {**doc, "counts": dict(doc["counts"])}
+        return None
+
+
+class FakeSession:
+    def __init__(self, log):
+        self.log = log
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def with_transaction(self, callback):
+        self.log.append("transaction")
+        return await callback(self)
+
+
+class FakeClient:
+    def __init__(self, hello):
+        self.hello = hello
+        self.transactions = []
+        self.admin = SimpleNamespace(command=self._command)
+
+    async def _command(self, name):
+        return self.hello
+
+    async def start_session(self):
+        return FakeSession(self.transactions)
+
+
+def make_db():
+    users = [{"id": f"u{i}"} for i in range(6)]
+    return {
+        "users": FakeCollection(users),
+        "orders": FakeCollection([{"id": f"o{i}", "user_id": f"u{i % 6}"} for i in range(12)]),
+        "loyalty_bills": FakeCollection([{"id": f"b{i}", "user_id": f"u{i % 3}"} for i in range(6)]),
+        "student_id_verifications": FakeCollection([{"id": "v1", "user_id": "u1", "image_data": "..."}]),
+        "admin_logs": FakeCollection([{"id": "l1", "user_id": "u1"}]),
+        "user_purge_jobs": FakeCollection(),
+    }
+
+
+class FakeDB(dict):
+    def __getattr__(self, name):
+        return self[name]
+
+
+def run_purge(purger, user_ids):
+    async def run():
+        job_id = await purger.create(user_ids, "admin-1")
+        return await purger.resume(job_id)
+    return asyncio.run(run())
+
+
+class TestUserPurge:
+    """UserPurger"""
+
+    def test_cascade_counts_across_chunks(self):
+        """Dependents and users go in chunks; counts add up; other users and logs stay"""
+        db = FakeDB(make_db())
+        purger = UserPurger(FakeClient({}), db, chunk_size=2)
+        job = run_purge(purger, ["u0", "u1", "u2", "u1", "missing"])
+        assert job["status"] == "completed" and job["total_chunks"] == 2 and not job["transactional"]
+        assert job["counts"] == {"loyalty_bills": 6, "orders": 6, "student_id_verifications": 1, "users": 3}
+        assert sorted(u["id"] for u in db.users.docs) == ["u3", "u4", "u5"]
+        assert len(db.admin_logs.docs) == 1
+        assert "user_ids" not in job
+
+    def test_resume_after_failure(self):
+        """An interrupted job resumes where it stopped without double counting"""
+        db = FakeDB(make_db())
+        purger = UserPurger(FakeClient({}), db, chunk_size=1)
+
+        async def run():
+            job_id = await purger.create(["u0", "u1", "u2"], "admin-1")
+            original = db.orders.delete_many
+            calls = {"n": 0}
+
+            async def flaky(query, session=None):
+                calls["n"] += 1
+                if calls["n"] == 2:
+                    raise RuntimeError("connection reset")
+                return await original(query, session)
+            db.orders.delete_many = flaky
+
+            with pytest.raises(RuntimeError):
+                await purger.resume(job_id)
+            failed = await purger.get(job_id)
+            assert failed["status"] == "failed" and failed["next_chunk"] == 1
+            return await purger.resume(job_id)
+
+        job = asyncio.run(run())
+        assert job["status"] == "completed"
+        assert job["counts"] == {"loyalty_bills": 6, "orders": 6, "student_id_verifications": 1, "users": 3}
+
+    def test_replica_set_uses_transactions(self):
+        """Each chunk runs in its own transaction with the session passed to every delete"""
+        db = FakeDB(make_db())
+        client = FakeClient({"setName": "rs0"})
+        job = run_purge(UserPurger(client, db, chunk_size=2), ["u0", "u1", "u2"])
+        assert job["transactional"]
+        assert client.transactions == ["transaction", "transaction"]
+        assert all(session is not None for session in db.users.sessions)
+
+    def test_leased_job_is_not_run_twice(self):
+        """A job leased to another worker is returned as-is, not re-run"""
+        db = FakeDB(make_db())
+        purger = UserPurger(FakeClient({}), db)
+
+        async def run():
+            job_id = await purger.create(["u0"], "admin-1")
+            later = (datetime.now(timezone.utc) + timedelta(minutes=1)).isoformat()
+            await purger.jobs.update_one({"id": job_id}, {"$set": {"status": "running", "lease_expires_at": later}})
+            return await purger.resume(job_id)
+
+        job = asyncio.run(run())
+        assert job["status"] == "running" and job["next_chunk"] == 0
+        assert len(db.users.docs) == 6
+
+    def test_worker_stops_when_lease_is_taken_over(self):
+        """A worker whose lease was claimed by another stops without recording progress"""
+        db = FakeDB(make_db())
+        purger = UserPurger(FakeClient({}), db, chunk_size=1)
+
+        async def run():
+            job_id = await purger.create(["u0", "u1", "u2"], "admin-1")
+            original = db.orders.delete_many
+            calls = {"n": 0}
+
+            async def taken_over(query, session=None):
+                calls["n"] += 1
+                if calls["n"] == 2:
+                    # Lease expired mid-chunk and another worker claimed the job
+                    await purger.jobs.update_one({"id": job_id}, {"$set": {"lease_id": "other-worker"}})
+                return await original(query, session)
+            db.orders.delete_many = taken_over
+
+            job = await purger.resume(job_id)
+            stored = purger.jobs.docs[0]
+            return job, stored
+
+        job, stored = asyncio.run(run())
+        assert job["status"] == "running" and job["next_chunk"] == 1
+        assert stored["lease_id"] == "other-worker"
+        assert job["counts"]["orders"] == 2 and job["counts"]["users"] == 1
+        assert "lease_id" not in job
+
+    def test_topology_detection(self):
+        """Replica sets and mongos support transactions; standalone does not"""
+        assert asyncio.run(supports_transactions(FakeClient({"setName": "rs0"})))
+        assert asyncio.run(supports_transactions(FakeClient({"msg": "isdbgrid"})))
+        assert not asyncio.run(supports_transactions(FakeClient({"isWritablePrimary": True})))
@@ -0,0 +1,142 @@
+"""
+Streaming file uploads.
+
+`save_upload` copies an UploadFile to disk in fixed-size chunks: the first
+bytes are checked against the expected magic number, the SHA-256 is computed
+while streaming, writes run in a worker thread, and the file is written to a
+temporary name in the destination directory and renamed into place only once
+complete, so readers never see a partial file. Memory per upload stays at one
+chunk regardless of file size.
+
+Starlette spools multipart bodies before the route runs, so
+`MaxBodySizeMiddleware` enforces the limit while the body is still arriving:
+declared Content-Length is checked up front, and a body that streams past the
+limit aborts parsing with 413.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Tuple
+
+from starlette.exceptions import HTTPException
+
+CHUNK_SIZE = 256 * 1024
+PDF_MAGIC = b"%PDF-"
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds its size limit"""
+
+
+class InvalidUploadContent(Exception):
+    """Raised when an upload's content does not match its declared type"""
+
+
+@dataclass
+class StoredUpload:
+    path: Path
+    size: int
+    sha256: str
+
+
+def _open_temp(directory: Path) -> Tuple[int, str]:
+    directory.mkdir(parents=True, exist_ok=True)
+    return tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".part")
+
+
+def _finish(fd: int, temp_path: str, final_path: Path):
+    os.fsync(fd)
+    os.close(fd)
+    os.replace(temp_path, final_path)
+
+
+def _discard(fd: int, temp_path: str):
+    try:
+        os.close(fd)
+    except OSError:
+        pass
+    try:
+        os.unlink(temp_path)
+    except FileNotFoundError:
+        pass
+
+
+async def save_upload(upload, final_path: Path, max_bytes: int, magic: bytes = b"",
+                      chunk_size: int = CHUNK_SIZE) -> StoredUpload:
+    """Stream `upload` to `final_path` atomically; returns size and SHA-256"""
+    fd, temp_path = await asyncio.to_thread(_open_temp, final_path.parent)
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            if len(head) < len(magic):
+                head += chunk[:len(magic) - len(head)]
+                if not magic.startswith(head):
+                    raise InvalidUploadContent()
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge()
+            digest.update(chunk)
+            await asyncio.to_thread(os.write, fd, chunk)
+        if len(head) < len(magic):
+            raise InvalidUploadContent()
+        await asyncio.to_thread(_finish, fd, temp_path, final_path)
+    except BaseException:
+        await asyncio.to_thread(_discard, fd, temp_path)
+        raise
+    return StoredUpload(final_path, size, digest.hexdigest())
+
+
+def too_large_message(limit: int) -> str:
+    return f"File too large. Maximum size is {limit / (1024 * 1024):g} MB."
+
+
+class MaxBodySizeMiddleware:
+    """Reject request bodies over a per-route limit with 413 (pure ASGI)"""
+
+    def __init__(self, app, limits: Dict[Tuple[str, str], int]):
+        self.app = app
+        self.limits = {(method.upper(), path): limit for (method, path), limit in limits.items()}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        limit = self.limits.get((scope["method"], scope["path"]))
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        for name, value in scope.get("headers", []):
+            if name == b"content-length" and value.isdigit() and int(value) > limit:
+                return await self._reject(send, limit)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised inside body parsing; FastAPI re-raises HTTPException as-is
+                    raise HTTPException(status_code=413, detail=too_large_message(limit))
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    async def _reject(send, limit: int):
+        body = json.dumps({"detail": too_large_message(limit)}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,188 @@
+"""
+Cascading user deletion.
+
+Deleting a user removes their loyalty bills, orders and student ID
+verifications (whose ID photos are stored inline, so the blobs go with the
+documents) and then the user documents themselves. Admin logs are kept as
+the audit trail.
+
+Every purge is recorded as a job in `user_purge_jobs` and processed in chunks
+of user ids. Each chunk is one `delete_many` per collection. On a replica set
+or sharded cluster, a chunk's deletes and the job's progress update commit
+together in one transaction. A standalone server has no transactions, so the
+deletes run plainly, counts are saved after each `delete_many` and progress
+after each chunk. Every step is idempotent, so a job interrupted there can be
+resumed and simply finds nothing left to delete for the work already done;
+the deletion itself always completes. The counts can under-report, though: if
+the process dies between a `delete_many` and the count update that follows
+it, those documents are gone without being counted.
+
+A job is leased to one worker at a time, so a resume never runs concurrently
+with the original run. Each claim gets its own `lease_id` and every progress
+update is filtered on it; a worker whose lease expired and was taken over
+stops at its next update instead of writing over the new owner's progress.
+"""
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+# Dependents first, users last, so a half-finished chunk still lists its users
+CASCADE = (
+    ("loyalty_bills", "user_id"),
+    ("orders", "user_id"),
+    ("student_id_verifications", "user_id"),
+    ("users", "id"),
+)
+CHUNK_SIZE = 200
+LEASE_SECONDS = 120
+
+
+class LeaseLost(Exception):
+    """The job was claimed by another worker after this worker's lease expired"""
+
+
+def empty_counts() -> Dict[str, int]:
+    return {collection: 0 for collection, _ in CASCADE}
+
+
+async def supports_transactions(client) -> bool:
+    """Replica set members and mongos support multi-document transactions"""
+    try:
+        hello = await client.admin.command("hello")
+    except Exception as e:
+        logger.warning(f"Could not detect Mongo topology, assuming standalone: {e}")
+        return False
+    return bool(hello.get("setName")) or hello.get("msg") == "isdbgrid"
+
+
+class UserPurger:
+    """Runs cascading user deletions as resumable jobs"""
+
+    def __init__(self, client, db, chunk_size: int = CHUNK_SIZE, lease_seconds: int = LEASE_SECONDS):
+        self.client = client
+        self.db = db
+        self.jobs = db.user_purge_jobs
+        self.chunk_size = chunk_size
+        self.lease_seconds = lease_seconds
+        self._transactions: Optional[bool] = None
+
+    async def transactional(self) -> bool:
+        if self._transactions is None:
+            self._transactions = await supports_transactions(self.client)
+        return self._transactions
+
+    async def create(self, user_ids: List[str], requested_by: Optional[str]) -> str:
+        """Record a purge job for `user_ids`; run it with `resume`"""
+        user_ids = list(dict.fromkeys(user_ids))
+        now = datetime.now(timezone.utc).isoformat()
+        job = {
+            "id": str(uuid.uuid4()),
+            "user_ids": user_ids,
+            "chunk_size": self.chunk_size,
+            "total_chunks": -(-len(user_ids) // self.chunk_size),
+            "next_chunk": 0,
+            "counts": empty_counts(),
+            "status": "pending",
+            "transactional": await self.transactional(),
+            "requested_by": requested_by,
+            "created_at": now,
+            "updated_at": now,
+            "completed_at": None,
+            "lease_id": None,
+            "lease_expires_at": None,
+        }
+        await self.jobs.insert_one(job)
+        return job["id"]
+
+    async def resume(self, job_id: str) -> Optional[dict]:
+        """Continue an unfinished job; returns the job as it stands (None if unknown)"""
+        job = await self._claim(job_id)
+        if job is None:
+            return await self.get(job_id)
+        leased = {"id": job_id, "lease_id": job["lease_id"]}
+        try:
+            while job["next_chunk"] < job["total_chunks"]:
+                job = await self._run_chunk(job)
+        except LeaseLost:
+            logger.warning(f"User purge {job_id} was taken over by another worker at chunk {job['next_chunk']}")
+            return await self.get(job_id)
+        except Exception as e:
+            logger.error(f"User purge {job_id} stopped at chunk {job['next_chunk']}: {e}")
+            await self.jobs.update_one(leased, {"$set": {
+                "status": "failed", "error": str(e), "lease_id": None, "lease_expires_at": None,
+                "updated_at": datetime.now(timezone.utc).isoformat()
+            }})
+            raise
+        now = datetime.now(timezone.utc).isoformat()
+        await self.jobs.update_one(leased, {"$set": {
+            "status": "completed", "completed_at": now, "updated_at": now, "lease_id": None, "lease_expires_at": None
+        }})
+        return await self.get(job_id)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self.jobs.find_one({"id": job_id}, {"_id": 0, "user_ids": 0, "lease_id": 0})
+
+    async def _claim(self, job_id: str) -> Optional[dict]:
+        now = datetime.now(timezone.utc)
+        return await self.jobs.find_one_and_update(
+            {
+                "id": job_id,
+                "status": {"$in": ["pending", "running", "failed"]},
+                "$or": [{"lease_expires_at": None}, {"lease_expires_at": {"$lte": now.isoformat()}}],
+            },
+            {"$set": {
+                "status": "running",
+                "lease_id": str(uuid.uuid4()),
+                "lease_expires_at": (now + timedelta(seconds=self.lease_seconds)).isoformat(),
+                "updated_at": now.isoformat(),
+            }},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _run_chunk(self, job: dict) -> dict:
+        index = job["next_chunk"]
+        ids = job["user_ids"][index * job["chunk_size"]:(index + 1) * job["chunk_size"]]
+        leased = {"id": job["id"], "lease_id": job["lease_id"]}
+
+        async def update_job(update, session=None):
+            result = await self.jobs.update_one(leased, update, session=session)
+            if result.matched_count == 0:
+                # Raised inside a transaction, this also rolls back the chunk's deletes
+                raise LeaseLost(job["id"])
+
+        async def apply(session=None):
+            counts = {}
+            for collection, field in CASCADE:
+                result = await self.db[collection].delete_many({field: {"$in": ids}}, session=session)
+                counts[collection] = result.deleted_count
+                if session is None:
+                    # No transaction: count each step at once, as a resumed chunk won't see these docs again
+                    await update_job({"$inc": {f"counts.{collection}": result.deleted_count}})
+            now = datetime.now(timezone.utc)
+            update = {"$set": {
+                "next_chunk": index + 1,
+                "updated_at": now.isoformat(),
+                "lease_expires_at": (now + timedelta(seconds=self.lease_seconds)).isoformat(),
+            }}
+            if session is not None:
+                update["$inc"] = {f"counts.{collection}": count for collection, count in counts.items()}
+            await update_job(update, session)
+            return counts
+
+        if job["transactional"]:
+            async with await self.client.start_session() as session:
+                # with_transaction retries the whole chunk on transient errors
+                counts = await session.with_transaction(apply)
+        else:
+            counts = await apply()
+
+        job["next_chunk"] = index + 1
+        for collection, count in counts.items():
+            job["counts"][collection] += count
+        return job
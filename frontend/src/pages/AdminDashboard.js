@@ -24,6 +24,7 @@ const AdminDashboard = () => {
   const [stats, setStats] = useState({});
   const [users, setUsers] = useState([]);
   const [pendingVerifications, setPendingVerifications] = useState([]);
+  const [verificationDetails, setVerificationDetails] = useState({}); // id -> image_data / extracted_text
   const [menuItems, setMenuItems] = useState([]);
   const [orders, setOrders] = useState([]);
   const [coupons, setCoupons] = useState([]);
@@ -357,6 +358,18 @@ const AdminDashboard = () => {
     }
   };
 
+  const loadVerificationDetail = async (verificationId) => {
+    try {
+      const token = localStorage.getItem('token');
+      const response = await axios.get(`${API}/admin/verifications/${verificationId}`, {
+        headers: { Authorization: `Bearer ${token}` }
+      });
+      setVerificationDetails(prev => ({ ...prev, [verificationId]: response.data }));
+    } catch (error) {
+      toast.error(error.response?.data?.detail || 'Failed to load verification');
+    }
+  };
+
   const handleDeleteUser = async (userId) => {
     if (!window.confirm('Are you sure you want to delete this user? This action cannot be undone.')) {
       return;
@@ -518,26 +531,40 @@ const AdminDashboard = () => {
                   <p className="text-center text-gray-500 py-4">No pending verifications</p>
                 ) : (
                   <div className="space-y-4" data-testid="verifications-list">
-                    {pendingVerifications.map((verification) => (
+                    {pendingVerifications.map((verification) => {
+                      // Photo and OCR text are only in the detail response
+                      const detail = verificationDetails[verification.id];
+                      return (
                       <div key={verification.id} className="border rounded-lg p-4" data-testid={`verification-${verification.id}`}>
                         <div className="flex items-start gap-4">
                           {/* Student ID Image */}
-                          {verification.image_data && (
+                          {detail?.image_data ? (
                             <div className="flex-shrink-0">
                               <p className="text-xs font-semibold text-gray-500 mb-1">Student ID Photo:</p>
                               <img 
-                                src={`data:image/jpeg;base64,${verification.image_data}`}
+                                src={`data:image/jpeg;base64,${detail.image_data}`}
                                 alt="Student ID"
                                 className="w-48 h-auto rounded border cursor-pointer hover:opacity-80 transition-opacity"
                                 onClick={() => {
                                   // Open image in new tab for full view
                                   const win = window.open();
-                                  win.document.write(`<img src="data:image/jpeg;base64,${verification.image_data}" style="max-width:100%;" />`);
+                                  win.document.write(`<img src="data:image/jpeg;base64,${detail.image_data}" style="max-width:100%;" />`);
                                 }}
                                 data-testid={`verification-image-${verification.id}`}
                               />
                               <p className="text-xs text-gray-400 mt-1">Click to enlarge</p>
                             </div>
+                          ) : !detail && (
+                            <div className="flex-shrink-0">
+                              <Button
+                                size="sm"
+                                variant="outline"
+                                onClick={() => loadVerificationDetail(verification.id)}
+                                data-testid={`load-verification-${verification.id}`}
+                              >
+                                Show ID photo
+                              </Button>
+                            </div>
                           )}
                           
                           {/* Verification Details */}
@@ -591,12 +618,15 @@ const AdminDashboard = () => {
                             {/* Extracted Text */}
                             <div className="mt-3 p-3 bg-gray-50 rounded text-sm max-h-32 overflow-y-auto">
                               <p className="font-semibold mb-1 text-gray-700">OCR Extracted Text:</p>
-                              <p className="text-gray-600 whitespace-pre-wrap text-xs">{verification.extracted_text || 'No text extracted'}</p>
+                              <p className="text-gray-600 whitespace-pre-wrap text-xs">
+                                {detail ? (detail.extracted_text || 'No text extracted') : 'Shown with the ID photo'}
+                              </p>
                             </div>
                           </div>
                         </div>
                       </div>
-                    ))}
+                      );
+                    })}
                   </div>
                 )}
               </CardContent>
@@ -67,6 +67,9 @@ const Home = () => {
               <span className="status-closed" data-testid="shop-status-closed">
                 <Clock size={16} />
                 {shopStatus.message}
+                {shopStatus.next_open_at && (
+                  <> · Opens {new Date(shopStatus.next_open_at).toLocaleString([], { weekday: 'short', hour: '2-digit', minute: '2-digit' })}</>
+                )}
               </span>
             )}
           </div>
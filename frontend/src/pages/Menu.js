@@ -4,7 +4,8 @@ import axios from 'axios';
 import { Button } from '@/components/ui/button';
 import { Card, CardContent } from '@/components/ui/card';
 import { Badge } from '@/components/ui/badge';
-import { Plus, Minus, ShoppingCart } from 'lucide-react';
+import { Input } from '@/components/ui/input';
+import { Plus, Minus, ShoppingCart, Search } from 'lucide-react';
 import { useAuth } from '@/contexts/AuthContext';
 import { toast } from 'sonner';
 
@@ -15,6 +16,8 @@ const Menu = () => {
   const [menuItems, setMenuItems] = useState([]);
   const [loading, setLoading] = useState(true);
   const [selectedCategory, setSelectedCategory] = useState('All');
+  const [searchQuery, setSearchQuery] = useState('');
+  const [searchResults, setSearchResults] = useState(null);
   const { cart, addToCart, updateCartQuantity, user } = useAuth();
   const navigate = useNavigate();
 
@@ -34,11 +37,29 @@ const Menu = () => {
     }
   };
 
+  useEffect(() => {
+    if (!searchQuery.trim()) {
+      setSearchResults(null);
+      return;
+    }
+    // Debounced server-side search while typing
+    const timer = setTimeout(async () => {
+      try {
+        const response = await axios.get(`${API}/menu/search`, { params: { q: searchQuery } });
+        setSearchResults(response.data.items);
+      } catch (error) {
+        console.error('Menu search failed:', error);
+      }
+    }, 250);
+    return () => clearTimeout(timer);
+  }, [searchQuery]);
+
   const categories = ['All', ...new Set(menuItems.map(item => item.category))];
 
+  const visibleItems = searchResults ?? menuItems;
   const filteredItems = selectedCategory === 'All' 
-    ? menuItems 
-    : menuItems.filter(item => item.category === selectedCategory);
+    ? visibleItems 
+    : visibleItems.filter(item => item.category === selectedCategory);
 
   const getItemQuantityInCart = (itemId) => {
     const cartItem = cart.find(i => i.menu_item_id === itemId);
@@ -74,6 +95,16 @@ const Menu = () => {
           <h1 className="text-2xl font-bold" style={{ fontFamily: 'Manrope, sans-serif' }} data-testid="menu-title">
             Menu
           </h1>
+          <div className="relative mt-3">
+            <Search className="absolute left-3 top-1/2 -translate-y-1/2 w-4 h-4 text-gray-400" />
+            <Input
+              value={searchQuery}
+              onChange={(e) => setSearchQuery(e.target.value)}
+              placeholder="Search dishes"
+              className="pl-9"
+              data-testid="menu-search-input"
+            />
+          </div>
         </div>
 
         {/* Category Tabs */}